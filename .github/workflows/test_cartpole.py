@@ -1,2 +1,116 @@
+import os
+import platform
+import sys
+
+import numpy as np
+
+
+sampling_time = 0.001
+
+
 def test_cartpole():
-    import cartpole
\ No newline at end of file
+    import cartpole
+
+
+def import_python_interface():
+    # Imports the Python interface installed by cartpole.py into the default
+    # prefix of autogenu.install_python_interface(), which may not exist
+    # when the interpreter starts.
+    import cartpole
+    python_version = 'python' + str(sys.version_info.major) + '.' + str(sys.version_info.minor)
+    home = os.environ['HOMEPATH'] if platform.system() == 'Windows' else os.environ['HOME']
+    install_prefix = os.path.join(os.path.abspath(home), '.local', 'lib', python_version, 'site-packages')
+    if install_prefix not in sys.path:
+        sys.path.append(install_prefix)
+    import cgmres.common
+    import cgmres.cartpole
+    return cgmres.common, cgmres.cartpole
+
+
+def init_solver(common, cartpole, solver_type):
+    ocp = cartpole.OCP()
+    settings = common.SolverSettings()
+    settings.sampling_time = sampling_time
+    settings.zeta = 1000
+    settings.max_iter = 50
+    settings.opterr_tol = 1.0e-06
+    horizon = common.Horizon(Tf=2.0, alpha=0.0)
+    initializer = cartpole.ZeroHorizonOCPSolver(ocp, settings)
+    initializer.set_uc(np.array([0.01]))
+    initializer.solve(0.0, np.zeros(4))
+    settings.max_iter = 0
+    mpc = solver_type(ocp, horizon, settings)
+    mpc.set_uc(initializer.ucopt)
+    if solver_type is cartpole.MultipleShootingCGMRESSolver:
+        mpc.init_x_lmd(0.0, np.zeros(4))
+        mpc.init_dummy_mu()
+    return ocp, mpc
+
+
+def test_batch_update():
+    common, cartpole = import_python_interface()
+    batch_size = 4
+    for solver_type, batch_type in [(cartpole.MultipleShootingCGMRESSolver, cartpole.BatchMultipleShootingCGMRESSolver),
+                                    (cartpole.SingleShootingCGMRESSolver, cartpole.BatchSingleShootingCGMRESSolver)]:
+        ocp, mpc = init_solver(common, cartpole, solver_type)
+        batch = batch_type(mpc, batch_size, num_threads=2)
+        solvers = [mpc.clone() for i in range(batch_size)]
+        assert len(batch) == batch_size
+        t = np.linspace(0.0, 0.003, batch_size)
+        x = np.array([[0.0, 0.1*i, 0.0, 0.0] for i in range(batch_size)])
+        for step in range(50):
+            u = batch.update(t, x)
+            assert u.shape == (batch_size, 1)
+            for i in range(batch_size):
+                solvers[i].update(t[i], x[i])
+                assert np.array_equal(u[i], solvers[i].u0())
+            assert np.array_equal(batch.opt_error(), [e.opt_error() for e in solvers])
+            x = x + sampling_time * np.array([ocp.eval_f(t[i], x[i], u[i]) for i in range(batch_size)])
+            t = t + sampling_time
+
+
+def test_trajectory_views():
+    common, cartpole = import_python_interface()
+    ocp, mpc = init_solver(common, cartpole, cartpole.MultipleShootingCGMRESSolver)
+    uopt, xopt = mpc.uopt, mpc.xopt
+    u0 = mpc.u0()
+    uopt_before = uopt.copy()
+    assert not uopt.flags.writeable and not xopt.flags.writeable
+    try:
+        uopt[0, 0] = 1.0
+        assert False, 'uopt must be read-only'
+    except ValueError:
+        pass
+    mpc.update(0.0, np.array([0.0, 0.1, 0.0, 0.0]))
+    assert not np.array_equal(uopt, uopt_before)
+    assert np.array_equal(uopt, mpc.uopt) and np.array_equal(xopt, mpc.xopt)
+    assert np.array_equal(u0, uopt_before[0])
+    del mpc
+    assert np.all(np.isfinite(uopt))
+
+
+def test_simulate():
+    import autogenu
+    common, cartpole = import_python_interface()
+    tsim = 0.5
+    for integrator, integrate in [('rk4', autogenu.RK4), ('forward_euler', autogenu.forward_euler)]:
+        ocp, mpc = init_solver(common, cartpole, cartpole.MultipleShootingCGMRESSolver)
+        reference = mpc.clone()
+        logs = cartpole.simulate(mpc, ocp, 0.0, np.zeros(4), tsim, integrator=integrator)
+        t, x = 0.0, np.zeros(4)
+        t_log, x_log, u_log, opterr_log = [], [], [], []
+        for i in range(int(np.floor(tsim/sampling_time))):
+            u = reference.u0()
+            x1 = integrate(ocp, t, sampling_time, x, u)
+            reference.update(t, x)
+            t_log.append(t)
+            x_log.append(x)
+            u_log.append(u)
+            opterr_log.append(reference.opt_error())
+            x = x1
+            t = t + sampling_time
+        assert np.array_equal(logs['t'], t_log)
+        assert np.allclose(logs['x'], x_log, rtol=0.0, atol=1.0e-12)
+        assert np.allclose(logs['u'], u_log, rtol=0.0, atol=1.0e-12)
+        assert np.allclose(logs['opterr'], opterr_log, rtol=1.0e-06, atol=1.0e-12)
+        assert logs['solve_time_ms'].shape == (len(t_log),)
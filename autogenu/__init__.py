@@ -1,6 +1,77 @@
-from .autogenu import *
-from .logger import *
-from .plotter import *
-from .animator import *
-from .integrator import *
-from .install_python_interface import *
\ No newline at end of file
+import importlib
+
+# The submodules are imported on the first access to their names so that,
+# e.g., `from autogenu import RK4, Logger` does not import sympy or matplotlib.
+_submodules = ['autogenu', 'logger', 'log_reader', 'plotter', 'animator', 'integrator', 'install_python_interface']
+
+_names = {
+    'autogenu_root': 'autogenu',
+    'ScalarVariable': 'autogenu',
+    'ArrayVariable': 'autogenu',
+    'ControlInputBound': 'autogenu',
+    'SymbolicFunctions': 'autogenu',
+    'NLPType': 'autogenu',
+    'HorizonParams': 'autogenu',
+    'SolverParams': 'autogenu',
+    'InitializationParams': 'autogenu',
+    'SimulationParams': 'autogenu',
+    'AutoGenU': 'autogenu',
+    'generate_docs': 'autogenu',
+    'open_docs': 'autogenu',
+    'configure_cpp': 'autogenu',
+    'build_cpp': 'autogenu',
+    'find_windows_cmake_generator': 'autogenu',
+    'remove_dir': 'autogenu',
+    'GeneratedFile': 'autogenu',
+    'BuildCache': 'autogenu',
+    'SymbolicCache': 'autogenu',
+    'hash_files': 'autogenu',
+    'Logger': 'logger',
+    'load_log': 'log_reader',
+    'LogReader': 'log_reader',
+    'LogTail': 'log_reader',
+    'Plotter': 'plotter',
+    'TwoLinkArm': 'animator',
+    'CartPole': 'animator',
+    'Hexacopter': 'animator',
+    'MobileRobot': 'animator',
+    'forward_euler': 'integrator',
+    'RK4': 'integrator',
+    'install_python_interface': 'install_python_interface',
+}
+
+__all__ = list(_names)
+
+
+def _import_submodule(submodule: str):
+    module = importlib.import_module('.'+submodule, __name__)
+    # Importing a submodule binds it to the package, which must not shadow
+    # the function of the same name.
+    if submodule in _names:
+        globals()[submodule] = getattr(importlib.import_module('.'+_names[submodule], __name__), submodule)
+    return module
+
+
+def __getattr__(name: str):
+    if name in _names:
+        value = getattr(_import_submodule(_names[name]), name)
+    elif name in _submodules:
+        value = _import_submodule(name)
+    elif not name.startswith('_'):
+        # The other names that the submodules import, which used to be
+        # exported by `from .submodule import *` in this order.
+        for submodule in reversed(_submodules):
+            module = _import_submodule(submodule)
+            if hasattr(module, name):
+                value = getattr(module, name)
+                break
+        else:
+            raise AttributeError('module '+repr(__name__)+' has no attribute '+repr(name))
+    else:
+        raise AttributeError('module '+repr(__name__)+' has no attribute '+repr(name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_names) | set(_submodules))
@@ -2,18 +2,104 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.animation import FuncAnimation
+import collections
+import multiprocessing
 import os
+import subprocess
 import sys
 
+from .log_reader import LogReader
 
-class TwoLinkArm(object):
+
+# The animator and the canvas of the figure in each worker process of 
+# _Animation._save_mp4().
+_worker_animation = None
+_worker_canvas = None
+
+
+def _init_worker(animation):
+    global _worker_animation, _worker_canvas
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    _worker_animation = animation
+    _worker_canvas = FigureCanvasAgg(animation._setup_figure())
+
+
+def _render_frames(frames):
+    """ Renders the frames in a worker process and returns the width, 
+        height, and RGB bytes of the frames. 
+    """
+    buffers = []
+    for i in frames:
+        _worker_animation._update_frame(i)
+        _worker_canvas.draw()
+        rgba = np.asarray(_worker_canvas.buffer_rgba())
+        buffers.append(rgba[:, :, :3].tobytes())
+    height, width = rgba.shape[:2]
+    return width, height, b''.join(buffers)
+
+
+class _Animation(object):
+    """ Base class of the animators. The subclasses define _setup_figure(), 
+        which creates the figure and the artists and returns the figure, and 
+        _update_frame(i), which updates the artists to the i-th frame. 
+    """
+    # Number of the frames rendered by a task of the process pool.
+    _frames_per_task = 32
+
+    def _save_mp4(self, mp4_file, total_frames: int, fps: int, num_procs: int):
+        """ Renders the frames with a process pool, in which each worker has 
+            its own figure, and pipes them in order to a single ffmpeg 
+            process. At most 2*num_procs tasks are in flight so that the 
+            memory usage does not grow with the number of the frames. 
+        """
+        segments = [range(begin, min(begin+self._frames_per_task, total_frames))
+                    for begin in range(0, total_frames, self._frames_per_task)]
+        ffmpeg = None
+        try:
+            with multiprocessing.Pool(num_procs, initializer=_init_worker, 
+                                      initargs=(self,)) as pool:
+                tasks = collections.deque()
+                for segment in segments:
+                    tasks.append(pool.apply_async(_render_frames, (segment,)))
+                    if len(tasks) >= 2*num_procs:
+                        ffmpeg = self.__write_frames(ffmpeg, mp4_file, fps, tasks.popleft().get())
+                while tasks:
+                    ffmpeg = self.__write_frames(ffmpeg, mp4_file, fps, tasks.popleft().get())
+        except BaseException:
+            if ffmpeg is not None:
+                ffmpeg.kill()
+            raise
+        if ffmpeg is not None:
+            ffmpeg.stdin.close()
+            if ffmpeg.wait() != 0:
+                raise RuntimeError('ffmpeg failed to encode ' + mp4_file)
+
+    def __write_frames(self, ffmpeg, mp4_file, fps: int, frames):
+        width, height, rgb = frames
+        if ffmpeg is None:
+            ffmpeg = subprocess.Popen(
+                [plt.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error', 
+                 '-f', 'rawvideo', '-vcodec', 'rawvideo', 
+                 '-s', str(width)+'x'+str(height), '-pix_fmt', 'rgb24', 
+                 '-r', str(fps), '-i', 'pipe:', 
+                 '-vcodec', plt.rcParams['animation.codec'], '-pix_fmt', 'yuv420p', 
+                 # yuv420p requires the even width and height.
+                 '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', 
+                 mp4_file], 
+                stdin=subprocess.PIPE
+            )
+        ffmpeg.stdin.write(rgb)
+        return ffmpeg
+
+
+class TwoLinkArm(_Animation):
     """ Generates the animation of the simulation results of a 2link arm.
 
         Attributes: 
             set_skip_frames(skip_frames): Sets how many frames you want to 
                 skip in generating the animation. In the default settings, 
                 skip_frames = 1.
-            generate_animation(): Draws an animation of the simulation reult
+            generate_animation(num_procs): Draws an animation of the simulation reult
                 and saves it as a .mp4 files.
     """
 
@@ -22,11 +108,11 @@ class TwoLinkArm(object):
         # Loads the simulation data.
         self.__log_dir = log_dir
         self.__log_name = log_name
-        self.__t_data = np.genfromtxt(os.path.join(log_dir, log_name+"_t.log"))
-        self.__x_data = np.genfromtxt(os.path.join(log_dir, log_name+"_x.log"))
+        # Only the time and state are loaded. NaN is replaced with 0.
+        log = LogReader(log_dir, log_name)
+        self.__t_data = log.t
+        self.__x_data = log.x
         self.__sampling_time = self.__t_data[1] - self.__t_data[0] 
-        # Replaces NaN with 0.
-        self.__x_data[np.isnan(self.__x_data)] = 0
         # Checks the dimension of the state.
         self.__dim_x = self.__x_data.shape[1]
         if self.__dim_x != 4:
@@ -55,8 +141,38 @@ class TwoLinkArm(object):
         self.__skip_frames = skip_frames
         self.__total_frames = (int)(self.__x_data.shape[0]/skip_frames)
 
-    def generate_animation(self):
-        """ Generates the animation and saves it as a .mp4 file. """
+    def generate_animation(self, num_procs: int=1):
+        """ Generates the animation and saves it as a .mp4 file. 
+
+            Args:
+                num_procs: The number of the processes rendering the frames. 
+                    If greater than 1, the frames are split into segments 
+                    that are rendered in parallel and are piped in order to 
+                    a single ffmpeg process. Default is 1.
+        """
+        mp4_file = os.path.join(self.__log_dir, self.__log_name+'.mp4')
+        fps = int(1/(self.__sampling_time*self.__skip_frames))
+        if num_procs > 1:
+            self._save_mp4(mp4_file, self.__total_frames, fps, num_procs)
+        else:
+            self._setup_figure()
+            # Generates an animation.
+            anime = FuncAnimation(
+                self.__fig, 
+                self._update_frame, 
+                interval=self.__sampling_time*1000*self.__skip_frames, 
+                frames=self.__total_frames, 
+                blit=True
+            )
+            anime.save(mp4_file, writer='ffmpeg', fps=fps)
+        print(
+            'The animation of the simlation results is generated at '
+            +self.__log_dir
+        )
+
+    def _setup_figure(self):
+        """ Creates the figure and the artists of the animation. """
+        self.__compute_geometry()
         self.__fig = plt.figure(figsize=(8, 6))
         self.__ax = plt.axes(
             xlim=(self.__x_min, self.__x_max), 
@@ -78,49 +194,34 @@ class TwoLinkArm(object):
             transform=self.__ax.transAxes, 
             fontsize=14
         )
-        # Generates an animation.
-        anime = FuncAnimation(
-            self.__fig, 
-            self.__update_animation, 
-            interval=self.__sampling_time*1000*self.__skip_frames, 
-            frames=self.__total_frames, 
-            blit=True
-        )
-        anime.save(
-            os.path.join(self.__log_dir, self.__log_name+'.mp4'),
-            writer='ffmpeg', 
-            fps=int(
-                1/(self.__sampling_time*self.__skip_frames)
-            )
-        )
-        print(
-            'The animation of the simlation results is generated at '
-            +self.__log_dir
-        )
+        return self.__fig
+
+    def __compute_geometry(self):
+        """ Computes the positions of the links of all the frames at once. """
+        state = self.__x_data[self.__skip_frames*np.arange(self.__total_frames), :]
+        self.__x1 = self.__length * np.sin(state[:, 0])
+        self.__y1 = - self.__length * np.cos(state[:, 0])
+        self.__x2 = self.__x1 + self.__length * np.sin(state[:, 0]+state[:, 1])
+        self.__y2 = self.__y1 - self.__length * np.cos(state[:, 0]+state[:, 1])
 
-    def __update_animation(self, i):
+    def _update_frame(self, i):
         frame = self.__skip_frames * i
-        state = self.__x_data[frame, :]
-        self.__x1 = self.__length * np.sin(state[0])
-        self.__y1 = - self.__length * np.cos(state[0])
-        self.__x2 = self.__x1 + self.__length * np.sin(state[0]+state[1])
-        self.__y2 = self.__y1 - self.__length * np.cos(state[0]+state[1])
-        self.__link1.set_data((0, self.__x1), (0, self.__y1))
-        self.__link2.set_data((self.__x1, self.__x2), (self.__y1, self.__y2))
+        self.__link1.set_data((0, self.__x1[i]), (0, self.__y1[i]))
+        self.__link2.set_data((self.__x1[i], self.__x2[i]), (self.__y1[i], self.__y2[i]))
         self.__time_text.set_text(
             '{0:.1f} [s]'.format(self.__sampling_time*frame)
         )
         return self.__link1, self.__link2, self.__time_text
 
 
-class CartPole(object):
+class CartPole(_Animation):
     """ Generates the animation of the simulation results of a cart pole.
 
         Attributes: 
             set_skip_frames(skip_frames): Sets how many frames you want to 
                 skip in generating the animation. In the default settings, 
                 skip_frames = 1.
-            generate_animation(): Draws an animation of the simulation reult
+            generate_animation(num_procs): Draws an animation of the simulation reult
                 and saves it as a .mp4 files.
     """
 
@@ -129,11 +230,11 @@ class CartPole(object):
         # Loads the simulation data.
         self.__log_dir = log_dir
         self.__log_name = log_name
-        self.__t_data = np.genfromtxt(os.path.join(log_dir, log_name+"_t.log"))
-        self.__x_data = np.genfromtxt(os.path.join(log_dir, log_name+"_x.log"))
+        # Only the time and state are loaded. NaN is replaced with 0.
+        log = LogReader(log_dir, log_name)
+        self.__t_data = log.t
+        self.__x_data = log.x
         self.__sampling_time = self.__t_data[1] - self.__t_data[0] 
-        # Replaces NaN with 0.
-        self.__x_data[np.isnan(self.__x_data)] = 0
         # Checks the dimension of the state.
         self.__dim_x = self.__x_data.shape[1]
         if self.__dim_x != 4:
@@ -167,8 +268,38 @@ class CartPole(object):
         self.__skip_frames = skip_frames
         self.__total_frames = (int)(self.__x_data.shape[0]/skip_frames)
 
-    def generate_animation(self):
-        """ Generates the animation and saves it as a .mp4 file. """
+    def generate_animation(self, num_procs: int=1):
+        """ Generates the animation and saves it as a .mp4 file. 
+
+            Args:
+                num_procs: The number of the processes rendering the frames. 
+                    If greater than 1, the frames are split into segments 
+                    that are rendered in parallel and are piped in order to 
+                    a single ffmpeg process. Default is 1.
+        """
+        mp4_file = os.path.join(self.__log_dir, self.__log_name+'.mp4')
+        fps = int(1/(self.__sampling_time*self.__skip_frames))
+        if num_procs > 1:
+            self._save_mp4(mp4_file, self.__total_frames, fps, num_procs)
+        else:
+            self._setup_figure()
+            # Generates an animation.
+            anime = FuncAnimation(
+                self.__fig, 
+                self._update_frame, 
+                interval=self.__sampling_time*1000*self.__skip_frames, 
+                frames=self.__total_frames, 
+                blit=True
+            )
+            anime.save(mp4_file, writer='ffmpeg', fps=fps)
+        print(
+            'The animation of the simlation results is generated at '
+            +self.__log_dir
+        )
+
+    def _setup_figure(self):
+        """ Creates the figure and the artists of the animation. """
+        self.__compute_geometry()
         self.__fig = plt.figure(figsize=(8, 6))
         self.__ax = plt.axes(
             xlim=(self.__x_min, self.__x_max), 
@@ -193,33 +324,23 @@ class CartPole(object):
             transform=self.__ax.transAxes, 
             fontsize=14
         )
-        # Generates an animation.
-        anime = FuncAnimation(
-            self.__fig, 
-            self.__update_animation, 
-            interval=self.__sampling_time*1000*self.__skip_frames, 
-            frames=self.__total_frames, 
-            blit=True
-        )
-        anime.save(
-            os.path.join(self.__log_dir, self.__log_name+'.mp4'),
-            writer='ffmpeg', 
-            fps=int(
-                1/(self.__sampling_time*self.__skip_frames)
-            )
-        )
-        print(
-            'The animation of the simlation results is generated at '
-            +self.__log_dir
-        )
+        return self.__fig
+
+    def __compute_geometry(self):
+        """ Computes the positions of the cart and pole of all the frames at 
+            once. 
+        """
+        state = self.__x_data[self.__skip_frames*np.arange(self.__total_frames), :]
+        self.__xcs = state[:, 0]
+        self.__xps = self.__xcs + self.__pole_length * np.sin(state[:, 1])
+        self.__yps = 0.5 * self.__cart_height - self.__pole_length*np.cos(state[:, 1])
 
-    def __update_animation(self, i):
+    def _update_frame(self, i):
         frame = self.__skip_frames * i
-        state = self.__x_data[frame, :]
-        self.__xc = state[0]
+        self.__xc = self.__xcs[i]
         self.__yc = 0
-        self.__xp = self.__xc + self.__pole_length * np.sin(state[1])
-        self.__yp = 0.5 * self.__cart_height - self.__pole_length*np.cos(state[1])
+        self.__xp = self.__xps[i]
+        self.__yp = self.__yps[i]
         self.__ground.set_data((self.__x_min, self.__x_max), (0, 0))
         self.__cartt.set_data(
             (self.__xc-0.5*self.__cart_width, self.__xc+0.5*self.__cart_width), 
@@ -250,14 +371,14 @@ class CartPole(object):
         )
 
 
-class Hexacopter(object):
+class Hexacopter(_Animation):
     """ Generates the animation of the simulation results of a hexacopter.
 
         Attributes: 
             set_skip_frames(skip_frames): Sets how many frames you want to 
                 skip in generating the animation. In the default settings, 
                 skip_frames = 1.
-            generate_animation(): Draws an animation of the simulation reult
+            generate_animation(num_procs): Draws an animation of the simulation reult
                 and saves it as a .mp4 files.
     """
 
@@ -266,11 +387,11 @@ class Hexacopter(object):
         # Loads the simulation data.
         self.__log_dir = log_dir
         self.__log_name = log_name
-        self.__t_data = np.genfromtxt(os.path.join(log_dir, log_name+"_t.log"))
-        self.__x_data = np.genfromtxt(os.path.join(log_dir, log_name+"_x.log"))
+        # Only the time and state are loaded. NaN is replaced with 0.
+        log = LogReader(log_dir, log_name)
+        self.__t_data = log.t
+        self.__x_data = log.x
         self.__sampling_time = self.__t_data[1] - self.__t_data[0] 
-        # Replaces NaN with 0.
-        self.__x_data[np.isnan(self.__x_data)] = 0
         # Checks the dimension of the state.
         self.__dim_x = self.__x_data.shape[1]
         if self.__dim_x != 12:
@@ -293,8 +414,38 @@ class Hexacopter(object):
         self.__skip_frames = skip_frames
         self.__total_frames = (int)(self.__x_data.shape[0]/skip_frames)
 
-    def generate_animation(self):
-        """ Generates the animation and saves it as a .mp4 file. """
+    def generate_animation(self, num_procs: int=1):
+        """ Generates the animation and saves it as a .mp4 file. 
+
+            Args:
+                num_procs: The number of the processes rendering the frames. 
+                    If greater than 1, the frames are split into segments 
+                    that are rendered in parallel and are piped in order to 
+                    a single ffmpeg process. Default is 1.
+        """
+        mp4_file = os.path.join(self.__log_dir, self.__log_name+'.mp4')
+        fps = int(1/(self.__sampling_time*self.__skip_frames))
+        if num_procs > 1:
+            self._save_mp4(mp4_file, self.__total_frames, fps, num_procs)
+        else:
+            self._setup_figure()
+            # Generates an animation.
+            anime = FuncAnimation(
+                self.__fig, 
+                self._update_frame, 
+                interval=self.__sampling_time*1000*self.__skip_frames, 
+                frames=self.__total_frames, 
+                blit=True
+            )
+            anime.save(mp4_file, writer='ffmpeg', fps=fps)
+        print(
+            'The animation of the simlation results is generated at '
+            +self.__log_dir
+        )
+
+    def _setup_figure(self):
+        """ Creates the figure and the artists of the animation. """
+        self.__compute_geometry()
         self.__fig = plt.figure(figsize=(10, 10))
         self.__ax = self.__fig.add_subplot(111, projection='3d')
         self.__ax.set_xlabel('x')
@@ -317,29 +468,17 @@ class Hexacopter(object):
             transform=self.__ax.transAxes, 
             fontsize=14
         )
-        # Generates an animation.
-        anime = FuncAnimation(
-            self.__fig, 
-            self.__update_animation, 
-            interval=self.__sampling_time*1000*self.__skip_frames, 
-            frames=self.__total_frames, 
-            blit=True
-        )
-        anime.save(
-            os.path.join(self.__log_dir, self.__log_name+'.mp4'),
-            writer='ffmpeg', 
-            fps=int(
-                1/(self.__sampling_time*self.__skip_frames)
-            )
-        )
-        print(
-            'The animation of the simlation results is generated at '
-            +self.__log_dir
-        )
+        return self.__fig
+
+    def __compute_geometry(self):
+        """ Computes the rotor positions of all the frames at once. """
+        state = self.__x_data[self.__skip_frames*np.arange(self.__total_frames), :]
+        # Each of the arrays has the shape (6, total_frames).
+        self.__X, self.__Y, self.__Z = self.__hexagon_world(state.T)
 
-    def __update_animation(self, i):
+    def _update_frame(self, i):
         frame = self.__skip_frames * i
-        X, Y, Z = self.__hexagon_world(self.__x_data[frame, :])
+        X, Y, Z = self.__X[:, i], self.__Y[:, i], self.__Z[:, i]
         self.__line1.set_data((X[0],X[1]), (Y[0],Y[1]))
         self.__line1.set_3d_properties([Z[0],Z[1]])
         self.__line2.set_data((X[1],X[2]), (Y[1],Y[2]))
@@ -361,6 +500,7 @@ class Hexacopter(object):
         )
 
     def __hexagon_world(self, x):
+        # x is the state or the states of the frames stacked in columns.
         # Configurations in the body frame
         X_b = [self.__radius*np.cos((1/3)*np.pi*i) for i in range(6)]
         Y_b = [self.__radius*np.sin((1/3)*np.pi*i) for i in range(6)]
@@ -392,17 +532,17 @@ class Hexacopter(object):
             +Z_b[i]*np.cos(x[4])*np.cos(x[5]) 
             for i in range(6)
         ]
-        return X_w, Y_w, Z_w
+        return np.array(X_w), np.array(Y_w), np.array(Z_w)
 
 
-class MobileRobot(object):
+class MobileRobot(_Animation):
     """ Generates the animation of the simulation results of a cart pole.
 
         Attributes: 
             set_skip_frames(skip_frames): Sets how many frames you want to 
                 skip in generating the animation. In the default settings, 
                 skip_frames = 1.
-            generate_animation(): Draws an animation of the simulation reult
+            generate_animation(num_procs): Draws an animation of the simulation reult
                 and saves it as a .mp4 files.
     """
 
@@ -411,11 +551,11 @@ class MobileRobot(object):
         # Loads the simulation data.
         self.__log_dir = log_dir
         self.__log_name = log_name
-        self.__t_data = np.genfromtxt(os.path.join(log_dir, log_name+"_t.log"))
-        self.__x_data = np.genfromtxt(os.path.join(log_dir, log_name+"_x.log"))
+        # Only the time and state are loaded. NaN is replaced with 0.
+        log = LogReader(log_dir, log_name)
+        self.__t_data = log.t
+        self.__x_data = log.x
         self.__sampling_time = self.__t_data[1] - self.__t_data[0] 
-        # Replaces NaN with 0.
-        self.__x_data[np.isnan(self.__x_data)] = 0
         # Checks the dimension of the state.
         self.__dim_x = self.__x_data.shape[1]
         if self.__dim_x != 3:
@@ -452,8 +592,38 @@ class MobileRobot(object):
         self.__skip_frames = skip_frames
         self.__total_frames = (int)(self.__x_data.shape[0]/skip_frames)
 
-    def generate_animation(self):
-        """ Generates the animation and saves it as a .mp4 file. """
+    def generate_animation(self, num_procs: int=1):
+        """ Generates the animation and saves it as a .mp4 file. 
+
+            Args:
+                num_procs: The number of the processes rendering the frames. 
+                    If greater than 1, the frames are split into segments 
+                    that are rendered in parallel and are piped in order to 
+                    a single ffmpeg process. Default is 1.
+        """
+        mp4_file = os.path.join(self.__log_dir, self.__log_name+'.mp4')
+        fps = int(1/(self.__sampling_time*self.__skip_frames))
+        if num_procs > 1:
+            self._save_mp4(mp4_file, self.__total_frames, fps, num_procs)
+        else:
+            self._setup_figure()
+            # Generates an animation.
+            anime = FuncAnimation(
+                self.__fig, 
+                self._update_frame, 
+                interval=self.__sampling_time*1000*self.__skip_frames, 
+                frames=self.__total_frames, 
+                blit=True
+            )
+            anime.save(mp4_file, writer='ffmpeg', fps=fps)
+        print(
+            'The animation of the simlation results is generated at '
+            +self.__log_dir
+        )
+
+    def _setup_figure(self):
+        """ Creates the figure and the artists of the animation. """
+        self.__compute_geometry()
         margin = max(self.__robot_length, self.__robot_width)
         self.__fig = plt.figure(figsize=(10, 5))
         xrange = self.__x_max - self.__x_min
@@ -488,34 +658,22 @@ class MobileRobot(object):
             transform=self.__ax.transAxes, 
             fontsize=14
         )
-        # Generates an animation.
-        anime = FuncAnimation(
-            self.__fig, 
-            self.__update_animation, 
-            interval=self.__sampling_time*1000*self.__skip_frames, 
-            frames=self.__total_frames, 
-            blit=True
-        )
-        anime.save(
-            os.path.join(self.__log_dir, self.__log_name+'.mp4'),
-            writer='ffmpeg', 
-            fps=int(
-                1/(self.__sampling_time*self.__skip_frames)
-            )
-        )
-        print(
-            'The animation of the simlation results is generated at '
-            +self.__log_dir
-        )
+        return self.__fig
+
+    def __compute_geometry(self):
+        """ Computes the corners of the robot of all the frames at once. """
+        state = self.__x_data[self.__skip_frames*np.arange(self.__total_frames), :]
+        # Each of the arrays has the shape (2, total_frames).
+        self.__corners = [np.array(p) for p in self.__robot_world(state.T)]
 
-    def __update_animation(self, i):
+    def _update_frame(self, i):
         frame = self.__skip_frames * i
-        p_fl, p_fr, p_bl, p_br = self.__robot_world(self.__x_data[frame, :])
+        p_fl, p_fr, p_bl, p_br = (p[:, i] for p in self.__corners)
         self.__line1.set_data((p_fl[0], p_fr[0]), (p_fl[1], p_fr[1]))
         self.__line2.set_data((p_fl[0], p_bl[0]), (p_fl[1], p_bl[1]))
         self.__line3.set_data((p_fr[0], p_br[0]), (p_fr[1], p_br[1]))
         self.__line4.set_data((p_bl[0], p_br[0]), (p_bl[1], p_br[1]))
-        self.__ref.set_data(self.__get_time(i)*self.__vx_ref, 0)
+        self.__ref.set_data([self.__get_time(i)*self.__vx_ref], [0])
         self.__time_text.set_text(
             '{0:.1f} [s]'.format(self.__sampling_time*frame)
         )
@@ -525,6 +683,7 @@ class MobileRobot(object):
         )
 
     def __robot_world(self, x):
+        # x is the state or the states of the frames stacked in columns.
         hlength = 0.5*self.__robot_length
         hwidth = 0.5*self.__robot_width
         # Configurations in the world frame
@@ -1,5 +1,8 @@
 import subprocess
 import platform
+import io
+import glob
+import re
 from enum import Enum, auto
 from collections import namedtuple
 import sympy
@@ -10,6 +13,7 @@ autogenu_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(autogenu_root)
 import symutils
 from install_python_interface import install_python_interface
+from build_cache import GeneratedFile, BuildCache, SymbolicCache, hash_files, read_cmake_cache
 
 
 class ScalarVariable:
@@ -78,6 +82,15 @@ class AutoGenU(object):
         self.__solver_params = None
         self.__initialization_params = None
         self.__simulation_params = None
+        self.__build_cache = BuildCache()
+        self.__symbolic_backend = 'sympy'
+        self.__symbolic_cache_size = 64*1024*1024
+        self.__symbolic_key = None
+        self.__max_statements = None
+        self.__loop_rolling = False
+        self.__kernel_helpers = []
+        self.__precision = 'double'
+        self.__separate_compilation = False
 
     def get_ocp_name(self):
         return self.__ocp_name
@@ -94,6 +107,16 @@ class AutoGenU(object):
     def get_ocp_log_dir(self):
         return os.path.join(os.getcwd(), self.get_ocp_dir(), 'log')
 
+    def set_build_cache_dir(self, cache_dir):
+        """ Sets the directory of the build artifact store used by 
+            build_main() and build_python_interface(). The default directory 
+            is $AUTOGENU_CACHE_DIR or '~/.cache/autogenu'.
+
+            Args: 
+                cache_dir: Directory of the build artifact store. 
+        """
+        self.__build_cache = BuildCache(cache_dir)
+
     def define_t(self):
         """ Returns symbolic scalar variable 't'.
         """
@@ -193,7 +216,36 @@ class AutoGenU(object):
                 assert array_var.size == len(values)
                 array_var.values = values
 
-    def set_functions(self, f, C, h, L, phi):
+    def set_symbolic_cache_size(self, max_size: int):
+        """ Sets the maximum size of the on-disk memo of the symbolic 
+            computations, i.e., the derivation of the symbolic functions in 
+            set_functions() and their simplification and code generation in 
+            generate_ocp_definition(). The memo is stored in 
+            'generated/ocp_name/symbolic_cache' and the least recently used 
+            entries are evicted when its size exceeds max_size. 
+
+            Args: 
+                max_size: The maximum size in bytes. If 0, the memo is not 
+                    used. Default is 64 MiB.
+        """
+        assert max_size >= 0
+        self.__symbolic_cache_size = max_size
+
+    def set_symbolic_backend(self, backend: str):
+        """ Sets the symbolic backend used in the symbolic differentiation and 
+            common subexpression elimination. The simplification always uses 
+            sympy. 
+
+            Args: 
+                backend: The symbolic backend. Choose from 'sympy' and 
+                    'symengine'. 'symengine' requires the symengine package and 
+                    is much faster than 'sympy' on large models. Default is 
+                    'sympy'.
+        """
+        assert backend in symutils.BACKENDS, "backend must be 'sympy' or 'symengine'!"
+        self.__symbolic_backend = backend
+
+    def set_functions(self, f, C, h, L, phi, num_procs: int=1, backend=None):
         """ Sets functions that defines the optimal control problem.
 
             Args: 
@@ -205,25 +257,100 @@ class AutoGenU(object):
                     constraints, set the empty list.
                 L: The stage cost.
                 phi: The terminal cost.
+                num_procs: The number of processes used in the symbolic 
+                    differentiation. Default is 1.
+                backend: The symbolic backend used in the construction of the 
+                    Hamiltonian and the symbolic differentiation, 'sympy' or 
+                    'symengine'. Default is None, i.e., the one set by 
+                    set_symbolic_backend() is used.
         """
         assert len(f) > 0 
         assert len(f) == self.__nx, "Dimension of f must be nx!"
+        if backend is None:
+            backend = self.__symbolic_backend
         self.__nc = len(C)
         self.__nh = len(h)
+        # The key contains symutils.py and this file since the results, e.g., 
+        # the derived functions and the generated code, depend on them.
+        cache = self.__get_symbolic_cache()
+        self.__symbolic_key = cache.key('set_functions', sympy.__version__, backend, 
+                                        hash_files([symutils.__file__, __file__]), self.__nx, self.__nu, 
+                                        *[sympy.srepr(e) for e in (list(f), list(C), list(h), L, phi)])
+        functions = cache.get_or_compute(
+            self.__symbolic_key, 
+            lambda: self.__derive_symbolic_functions(f, C, h, L, phi, num_procs, backend)
+        )
+        self.__symbolic_functions = SymbolicFunctions(*functions)
+
+    def __derive_symbolic_functions(self, f, C, h, L, phi, num_procs: int, backend: str):
         x = sympy.symbols('x[0:%d]' %(self.__nx))
         u = sympy.symbols('u[0:%d]' %(self.__nu+self.__nc+self.__nh))
-        lmd = sympy.symbols('lmd[0:%d]' %(self.__nx))
-        hamiltonian = L + sum(lmd[i] * f[i] for i in range(self.__nx))
-        hamiltonian += sum(u[self.__nu+i] * C[i] for i in range(self.__nc))
+        lmd = symutils.to_backend(sympy.symbols('lmd[0:%d]' %(self.__nx)), backend)
+        uc = symutils.to_backend(u, backend)
+        f_, C_, h_ = [symutils.to_backend(list(e), backend) for e in (f, C, h)]
+        hamiltonian = symutils.to_backend(L, backend) + sum(lmd[i] * f_[i] for i in range(self.__nx))
+        hamiltonian += sum(uc[self.__nu+i] * C_[i] for i in range(self.__nc))
         nuc = self.__nu + self.__nc
-        hamiltonian += sum(u[nuc+i] * h[i] for i in range(self.__nh))
-        hx = symutils.diff_scalar_func(hamiltonian, x)
-        hu = symutils.diff_scalar_func(hamiltonian, u)
+        hamiltonian += sum(uc[nuc+i] * h_[i] for i in range(self.__nh))
+        hx = symutils.diff_scalar_func(hamiltonian, x, num_procs, backend)
+        hu = symutils.diff_scalar_func(hamiltonian, u, num_procs, backend)
         fb_eps = sympy.symbols('fb_eps[0:%d]' %(self.__nh))
         for i in range(self.__nh):
             hu[nuc+i] = sympy.sqrt(u[nuc+i]**2 + h[i]**2 + fb_eps[i]) - (u[nuc+i] - h[i])
-        phix = symutils.diff_scalar_func(phi, x)
-        self.__symbolic_functions = SymbolicFunctions(f, phix, hx, hu)
+        phix = symutils.diff_scalar_func(phi, x, num_procs, backend)
+        return [list(f), phix, hx, hu]
+
+    def __write_kernel_body(self, f_model_h, kernel_name: str, params: str, functions, output_value_names, 
+                            common_subexpression_elimination: bool, output_indices, backend: str):
+        # Writes the body of the kernel kernel_name(params). If the code has 
+        # more statements than max_statements, it is split into the helper 
+        # functions kernel_name_0, kernel_name_1, ..., which are called in order 
+        # from the body, share the common subexpressions via a local array, 
+        # and are written at the end of the class.
+        if self.__max_statements is not None:
+            cache = self.__get_symbolic_cache()
+            bodies, num_temporaries = cache.get_or_compute(
+                cache.key(self.__symbolic_key, 'split_symfuncs', output_value_names, 
+                          common_subexpression_elimination, output_indices, self.__max_statements, backend, 
+                          self.__get_scalar_type()), 
+                lambda: symutils.split_symfuncs(functions, output_value_names, common_subexpression_elimination, 
+                                                self.__max_statements, output_indices, backend, 
+                                                scalar_type=self.__get_scalar_type())
+            )
+            if len(bodies) > 1:
+                args = ', '.join(re.findall(r'(\w+)\s*(?:,|$)', params))
+                if num_temporaries > 0:
+                    f_model_h.write('    double cse['+str(num_temporaries)+'];\n')
+                    params += ', double* cse'
+                    args += ', cse'
+                for i in range(len(bodies)):
+                    helper_name = kernel_name+'_'+str(i)
+                    f_model_h.write('    '+helper_name+'('+args+');\n')
+                    self.__kernel_helpers.append(
+                        '  CGMRES_NOINLINE void '+helper_name+'('+params+') const {\n'+bodies[i]+'  }\n'
+                    )
+                return
+        self.__write_symbolic(f_model_h, symutils.write_symfuncs, functions, output_value_names, 
+                              common_subexpression_elimination, output_indices, backend, self.__loop_rolling)
+
+    def __get_symbolic_cache(self):
+        return SymbolicCache(os.path.join(self.get_ocp_dir(), 'symbolic_cache'), 
+                             self.__symbolic_cache_size)
+
+    def __get_scalar_type(self):
+        return 'double' if self.__precision == 'double' else 'float'
+
+    def __write_symbolic(self, f_model_h, write_func, functions, *args, **kwargs):
+        # Writes the code of functions by write_func of symutils, which is 
+        # memoized. functions are identified by the output value names in args.
+        kwargs['scalar_type'] = self.__get_scalar_type()
+        cache = self.__get_symbolic_cache()
+        key = cache.key(self.__symbolic_key, write_func.__name__, *args, *sorted(kwargs.items()))
+        def write():
+            code = io.StringIO()
+            write_func(code, functions, *args, **kwargs)
+            return code.getvalue()
+        f_model_h.write(cache.get_or_compute(key, write))
 
     def add_control_input_bounds(
         self, uindex: int, umin, umax, dummy_weight
@@ -330,7 +457,11 @@ class AutoGenU(object):
         assert simulation_length > 0
         self.__simulation_params = SimulationParams(initial_time, initial_state, simulation_length)
 
-    def generate_ocp_definition(self, simplification: bool=False, common_subexpression_elimination: bool=False):
+    def generate_ocp_definition(self, simplification: bool=False, common_subexpression_elimination: bool=False,
+                                num_procs: int=1, simplification_timeout=None, 
+                                fused_kernels: bool=False, exploit_sparsity: bool=False, 
+                                backend=None, max_statements=None, separate_compilation: bool=False, 
+                                loop_rolling: bool=False, precision: str='double'):
         """ Generates the C++ source file in which the equations to solve the 
             optimal control problem are described. Before call this method, 
             set_functions() must be called.
@@ -340,20 +471,105 @@ class AutoGenU(object):
                     Symbolic functions are simplified. Default is False.
                 common_subexpression_elimination: The flag for common subexpression elimination. If True, 
                     common subexpressions are eliminated. Default is False.
+                num_procs: The number of processes used in the simplification. 
+                    Default is 1.
+                simplification_timeout: The timeout in seconds for the 
+                    simplification of each element used if num_procs > 1. The 
+                    element whose simplification times out is left 
+                    unsimplified. Default is None, i.e., no timeout.
+                fused_kernels: The flag for the fused kernel. If True, 
+                    eval_hx_hu() that evaluates hx and hu on the same 
+                    (t, x, u, lmd) at once is generated, in which common 
+                    subexpressions are eliminated jointly if 
+                    common_subexpression_elimination is True. The solvers 
+                    then evaluate hx only by eval_hx_hu(), whose rounding 
+                    differs from that of eval_hx(). Default is False.
+                exploit_sparsity: The flag for the sparsity-aware code 
+                    generation of hx and hu. If True, the pointer versions of 
+                    the kernels, e.g., eval_hx() and eval_hx_hu(), do not write 
+                    the structurally zero and constant elements of hx and hu, 
+                    which must be set beforehand by init_hx() and init_hu(). 
+                    The solvers do this once for their buffers. The Eigen 
+                    versions of eval_hx() and eval_hu() still write all the 
+                    elements. Default is False.
+                backend: The symbolic backend used in the common subexpression 
+                    elimination, 'sympy' or 'symengine'. The simplification 
+                    always uses sympy. Default is None, i.e., the one set by 
+                    set_symbolic_backend() is used.
+                max_statements: The maximum number of the statements in a 
+                    function. If it is set, the code of the kernels longer than 
+                    max_statements is split into the helper functions, which 
+                    bounds the time and memory to compile each function. 
+                    Default is None, i.e., the code is not split.
+                separate_compilation: The flag for the separate compilation of 
+                    the kernels. If True, the kernels are only declared in 
+                    ocp.hpp and are defined in ocp.cpp, which is compiled once 
+                    into a library that main.cpp and the Python bindings link 
+                    against. This cuts the build time of large models at the 
+                    cost of the inlining of the kernels into the solvers. 
+                    Default is False.
+                loop_rolling: The flag for the loop rolling. If True, the runs 
+                    of the statements of f, phix, hx, and hu, including those 
+                    of the common subexpressions, that are the same up to 
+                    constant shifts of the indices of the arrays, e.g., those 
+                    of the identical links of a chain, are written as for 
+                    loops. The common subexpressions are 
+                    then stored in a local array. This shrinks the code of the 
+                    array-structured models. The runs are found 
+                    most reliably with the 'sympy' backend, whose ordering of 
+                    the operands only depends on the names of the symbols. 
+                    The kernels split by max_statements are not rolled. 
+                    Default is False.
+                precision: The floating-point precision of the OCP, 'double', 
+                    'float', or 'mixed'. If 'float', the OCP and the solvers 
+                    are in single precision, which doubles the SIMD width. If 
+                    'mixed', the OCP and the Krylov basis of GMRES are in 
+                    single precision and the least squares problem of GMRES and 
+                    the update of its solution are in double precision. The 
+                    CMakeLists.txt generated by generate_cmake() then defines 
+                    CGMRES_USE_FLOAT or CGMRES_MIXED_PRECISION. In single 
+                    precision, finite_difference_epsilon of 
+                    set_solver_params() should be about 1.0e-04 because the 
+                    finite difference with a smaller epsilon is dominated by the 
+                    rounding errors. Default is 'double'.
         """
         assert self.__symbolic_functions is not None, \
                 "Symbolic functions are not set!. Before call this method, call set_functions()"
+        if backend is None:
+            backend = self.__symbolic_backend
+        assert backend in symutils.BACKENDS, "backend must be 'sympy' or 'symengine'!"
+        assert max_statements is None or max_statements > 0
+        assert precision in ['double', 'float', 'mixed'], "precision must be 'double', 'float', or 'mixed'!"
+        self.__max_statements = max_statements
+        self.__loop_rolling = loop_rolling
+        self.__precision = precision
+        self.__separate_compilation = separate_compilation
+        self.__kernel_helpers = []
         if self.__nh > 0:
             assert len(self.__FB_epsilon) == self.__nh
         os.makedirs(self.get_ocp_pybind_dir(), exist_ok=True)
         os.makedirs(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name), exist_ok=True)
         os.makedirs(os.path.join(self.get_ocp_pybind_dir(), 'common'), exist_ok=True)
+        cache = self.__get_symbolic_cache()
         if simplification:
-            symutils.simplify(self.__f)
-            symutils.simplify(self.__hx)
-            symutils.simplify(self.__hu)
-            symutils.simplify(self.__phix)
-        f_model_h = open(os.path.join(self.get_ocp_dir(), 'ocp.hpp'), 'w')
+            def simplify():
+                for e in self.__symbolic_functions:
+                    symutils.simplify(e, num_procs, simplification_timeout)
+                return list(self.__symbolic_functions)
+            self.__symbolic_key = cache.key(self.__symbolic_key, 'simplify', simplification_timeout)
+            functions = cache.get_or_compute(self.__symbolic_key, simplify)
+            for e, simplified in zip(self.__symbolic_functions, functions):
+                e[:] = simplified
+        if exploit_sparsity:
+            hx_zeros, hx_constants, hx_indices, hu_zeros, hu_constants, hu_indices = cache.get_or_compute(
+                cache.key(self.__symbolic_key, 'sparsity_pattern'), 
+                lambda: [*symutils.sparsity_pattern(self.__symbolic_functions.hx), 
+                         *symutils.sparsity_pattern(self.__symbolic_functions.hu)]
+            )
+        else:
+            hx_indices = None
+            hu_indices = None
+        f_model_h = GeneratedFile(os.path.join(self.get_ocp_dir(), 'ocp.hpp'))
         f_model_h.write('// This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). \n')
         f_model_h.write('// The autogenu-jupyter copyright holders make no ownership claim of its contents. \n\n')
         f_model_h.write(
@@ -533,7 +749,10 @@ public:
               double* dx) const {
 """ 
         ])
-        symutils.write_symfunc(f_model_h, self.__symbolic_functions.f, 'dx', common_subexpression_elimination)
+        self.__write_kernel_body(f_model_h, 'eval_f', 
+                                 'const double t, const double* x, const double* u, double* dx', 
+                                 [self.__symbolic_functions.f], 
+                                 ['dx'], common_subexpression_elimination, [None], backend)
         f_model_h.writelines([
 """ 
   }
@@ -550,7 +769,10 @@ public:
   void eval_phix(const double t, const double* x, double* phix) const {
 """ 
         ])
-        symutils.write_symfunc(f_model_h, self.__symbolic_functions.phix, 'phix', common_subexpression_elimination)
+        self.__write_kernel_body(f_model_h, 'eval_phix', 
+                                 'const double t, const double* x, double* phix', 
+                                 [self.__symbolic_functions.phix], 
+                                 ['phix'], common_subexpression_elimination, [None], backend)
         f_model_h.writelines([
 """ 
   }
@@ -565,12 +787,20 @@ public:
   /// @param[out] hx Evaluated value of the partial derivative of the Hamiltonian.
   /// @remark This method is intended to be used inside of the cgmres solvers and does not check size of each argument. 
   /// Use the overloaded method if you call this outside of the cgmres solvers. 
-  ///
+""" 
+        ])
+        if exploit_sparsity:
+            f_model_h.write('  /// The structurally zero and constant elements of hx are not written. Set them by init_hx() beforehand. \n')
+        f_model_h.writelines([
+"""  ///
   void eval_hx(const double t, const double* x, const double* u, 
                const double* lmd, double* hx) const {
 """ 
         ])
-        symutils.write_symfunc(f_model_h, self.__symbolic_functions.hx, 'hx', common_subexpression_elimination)
+        self.__write_kernel_body(f_model_h, 'eval_hx', 
+                                 'const double t, const double* x, const double* u, const double* lmd, double* hx', 
+                                 [self.__symbolic_functions.hx], 
+                                 ['hx'], common_subexpression_elimination, [hx_indices], backend)
         f_model_h.writelines([
 """ 
   }
@@ -585,15 +815,62 @@ public:
   /// @param[out] hu Evaluated value of the partial derivative of the Hamiltonian.
   /// @remark This method is intended to be used inside of the cgmres solvers and does not check size of each argument. 
   /// Use the overloaded method if you call this outside of the cgmres solvers. 
-  ///
+""" 
+        ])
+        if exploit_sparsity:
+            f_model_h.write('  /// The structurally zero and constant elements of hu are not written. Set them by init_hu() beforehand. \n')
+        f_model_h.writelines([
+"""  ///
   void eval_hu(const double t, const double* x, const double* u, 
                const double* lmd, double* hu) const {
 """ 
         ])
-        symutils.write_symfunc(f_model_h, self.__symbolic_functions.hu, 'hu', common_subexpression_elimination)
+        self.__write_kernel_body(f_model_h, 'eval_hu', 
+                                 'const double t, const double* x, const double* u, const double* lmd, double* hu', 
+                                 [self.__symbolic_functions.hu], 
+                                 ['hu'], common_subexpression_elimination, [hu_indices], backend)
         f_model_h.writelines([
 """ 
   }
+"""
+        ])
+        if exploit_sparsity:
+            f_model_h.writelines([
+"""
+  ///
+  /// @brief Sets the structurally zero and constant elements of hx, which are not written by 
+  /// eval_hx() and eval_hx_hu(). 
+  /// It suffices to call this once for each output buffer.
+  /// @param[out] hx Partial derivative of the Hamiltonian with respect to state.
+  ///
+  void init_hx(double* hx) const {
+"""
+            ])
+            self.__write_symbolic(f_model_h, symutils.write_symfunc, 
+                                  self.__symbolic_functions.hx, 'hx', False, hx_zeros+hx_constants)
+            f_model_h.writelines([
+"""  }
+
+  ///
+  /// @brief Sets the structurally zero and constant elements of hu, which are not written by 
+  /// eval_hu() and eval_hx_hu(). 
+  /// It suffices to call this once for each output buffer.
+  /// @param[out] hu Partial derivative of the Hamiltonian with respect to control input and the equality constraints.
+  ///
+  void init_hu(double* hu) const {
+"""
+            ])
+            self.__write_symbolic(f_model_h, symutils.write_symfunc, 
+                                  self.__symbolic_functions.hu, 'hu', False, hu_zeros+hu_constants)
+            f_model_h.writelines([
+"""  }
+"""
+            ])
+        if fused_kernels:
+            self.__write_fused_functions(f_model_h, common_subexpression_elimination, hx_indices, hu_indices, 
+                                         backend)
+        f_model_h.writelines([
+"""
 
   ///
   /// @brief Computes the state equation dx = f(t, x, u).
@@ -660,10 +937,15 @@ public:
     if (lmd.size() != nx) {
       throw std::invalid_argument("[OCP]: lmd.size() must be " + std::to_string(nx));
     }
-    if (hx.size() != nuc) {
+    if (hx.size() != nx) {
       throw std::invalid_argument("[OCP]: hx.size() must be " + std::to_string(nx));
     }
-    eval_hx(t, x.derived().data(), uc.derived().data(), lmd.derived().data(), CGMRES_EIGEN_CONST_CAST(VectorType4, hx).data());
+""" 
+        ])
+        if exploit_sparsity:
+            f_model_h.write('    init_hx(CGMRES_EIGEN_CONST_CAST(VectorType4, hx).data());\n')
+        f_model_h.writelines([
+"""    eval_hx(t, x.derived().data(), uc.derived().data(), lmd.derived().data(), CGMRES_EIGEN_CONST_CAST(VectorType4, hx).data());
   }
 
   ///
@@ -692,26 +974,106 @@ public:
     if (hu.size() != nuc) {
       throw std::invalid_argument("[OCP]: hu.size() must be " + std::to_string(nuc));
     }
-    eval_hu(t, x.derived().data(), uc.derived().data(), lmd.derived().data(), CGMRES_EIGEN_CONST_CAST(VectorType4, hu).data());
+""" 
+        ])
+        if exploit_sparsity:
+            f_model_h.write('    init_hu(CGMRES_EIGEN_CONST_CAST(VectorType4, hu).data());\n')
+        f_model_h.writelines([
+"""    eval_hu(t, x.derived().data(), uc.derived().data(), lmd.derived().data(), CGMRES_EIGEN_CONST_CAST(VectorType4, hu).data());
   }
 
-};
+""" 
+        ])
+        if len(self.__kernel_helpers) > 0:
+            f_model_h.write('private:\n')
+            f_model_h.write('\n'.join(self.__kernel_helpers))
+            f_model_h.write('\n')
+        f_model_h.writelines([
+"""};
 
 } // namespace cgmres
 
 #endif // CGMRES_OCP_HPP_
 """ 
         ])
+        if self.__precision != 'double':
+            # All the scalars of the OCP, e.g., the arguments of the kernels 
+            # and the scalar and array variables, are in Scalar of the solvers.
+            code = re.sub(r'\bdouble\b', 'float', f_model_h.getvalue())
+            code = code.replace('#include <iostream>\n', '#include <iostream>\n#include <type_traits>\n', 1)
+            code = code.replace(
+                '\nnamespace cgmres {\n', 
+                '\nnamespace cgmres {\n\n'
+                'static_assert(std::is_same<Scalar, float>::value, \n'
+                '              "This OCP is generated in single precision. Define CGMRES_USE_FLOAT or CGMRES_MIXED_PRECISION.");\n', 
+                1
+            )
+            f_model_h.seek(0)
+            f_model_h.truncate()
+            f_model_h.write(code)
+        ocp_cpp_path = os.path.join(self.get_ocp_dir(), 'ocp.cpp')
+        if separate_compilation:
+            header, definitions = _split_kernel_definitions(f_model_h.getvalue(), 'OCP_'+self.__ocp_name)
+            f_model_h.seek(0)
+            f_model_h.truncate()
+            f_model_h.write(header)
+            f_model_cpp = GeneratedFile(ocp_cpp_path)
+            f_model_cpp.write('// This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). \n')
+            f_model_cpp.write('// The autogenu-jupyter copyright holders make no ownership claim of its contents. \n\n')
+            f_model_cpp.write('#include "ocp.hpp"\n\nnamespace cgmres {\n\n')
+            f_model_cpp.write('\n'.join(definitions))
+            f_model_cpp.write('\n} // namespace cgmres\n')
+            f_model_cpp.close()
+        elif os.path.isfile(ocp_cpp_path):
+            os.remove(ocp_cpp_path)
         f_model_h.close()
         print('\'ocp.hpp\', the definition of the OCP, is generated at', self.get_ocp_dir())
 
-    def generate_main(self):
+    def __write_fused_functions(self, f_model_h, common_subexpression_elimination: bool, 
+                                hx_indices=None, hu_indices=None, backend: str='sympy'):
+        f_model_h.writelines([
+"""
+  ///
+  /// @brief Computes the partial derivatives of the Hamiltonian hx = dH/dx(t, x, u, lmd) and 
+  /// hu = dH/du(t, x, u, lmd) at once.
+  /// @param[in] t Time.
+  /// @param[in] x State.
+  /// @param[in] u Concatenatin of the control input and Lagrange multiplier with respect to the equality constraints. 
+  /// @param[in] lmd Costate. 
+  /// @param[out] hx Evaluated value of the partial derivative of the Hamiltonian with respect to state.
+  /// @param[out] hu Evaluated value of the partial derivative of the Hamiltonian with respect to control input.
+  /// @remark This method is intended to be used inside of the cgmres solvers and does not check size of each argument. 
+  ///
+  void eval_hx_hu(const double t, const double* x, const double* u, 
+                  const double* lmd, double* hx, double* hu) const {
+"""
+        ])
+        self.__write_kernel_body(f_model_h, 'eval_hx_hu', 
+                                 'const double t, const double* x, const double* u, const double* lmd, double* hx, double* hu', 
+                                 [self.__symbolic_functions.hx, self.__symbolic_functions.hu], 
+                                 ['hx', 'hu'], common_subexpression_elimination, [hx_indices, hu_indices], backend)
+        f_model_h.writelines([
+""" 
+  }
+"""
+        ])
+
+    def generate_main(self, binary_log: bool=False, log_batch_size: int=1000):
         """ Generates main.cpp that defines NMPC solver, set parameters for the 
             solver, and run numerical simulation. Befire call this method,
             set_nlp_type(), set_horizon_params(), set_solver_params(), 
             set_initialization_params(), and set_simulation_params(),
             must be called!
+
+            Args:
+                binary_log: If True, the simulation saves the logs as binary 
+                    .npy files in batches instead of the text .log files, 
+                    which removes the cost of the text formatting from the 
+                    simulation. Plotter loads either format. Default is False.
+                log_batch_size: The number of the samples batched in memory 
+                    in the binary logs. Default is 1000.
         """
+        assert log_batch_size > 0
         assert self.__nlp_type is not None, "Solver type is not set! Before call this method, call set_nlp_type()"
         assert self.__horizon_params is not None, "Horizon params are not set! Before call this method, call set_horizon_params()"
         assert self.__solver_params is not None, "Solver params are not set! Before call this method, call set_solver_params()"
@@ -720,7 +1082,7 @@ public:
         """ Makes a directory where the C++ source files are generated.
         """
 
-        f_main = open(os.path.join(self.get_ocp_dir(), 'main.cpp'), 'w')
+        f_main = GeneratedFile(os.path.join(self.get_ocp_dir(), 'main.cpp'))
         f_main.writelines([
 """ 
 // This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -828,10 +1190,18 @@ int main() {
 
 """ 
         ])
-        f_main.write('  const std::string log_name("../log/' + self.__ocp_name + '");')
+        f_main.write('  const std::string log_name("../log/' + self.__ocp_name + '"); \n')
+        if binary_log:
+            f_main.write(
+                '  cgmres::LoggerSettings logger_settings;\n'
+                '  logger_settings.binary = true;\n'
+                '  logger_settings.batch_size = '+str(log_batch_size)+';\n'
+                '  cgmres::Logger logger(log_name, logger_settings);'
+            )
+        else:
+            f_main.write('  cgmres::Logger logger(log_name);')
         f_main.writelines([
-""" 
-  cgmres::Logger logger(log_name);
+"""
 
   std::cout << "Start a simulation..." << std::endl;
   for (unsigned int i=0; i<sim_steps; ++i) {
@@ -859,7 +1229,7 @@ int main() {
         print('\'main.cpp\', the closed-loop simulation code, is generated at', self.get_ocp_dir())
 
     def generate_python_bindings(self):
-        f_pybind11 = open(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'ocp.cpp'), 'w')
+        f_pybind11 = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'ocp.cpp'))
         f_pybind11.writelines([
 """
 // This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -985,7 +1355,7 @@ PYBIND11_MODULE(ocp, m) {
 """ 
         ])
         f_pybind11.close()
-        f_pybind11 = open(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'zero_horizon_ocp_solver.cpp'), 'w')
+        f_pybind11 = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'zero_horizon_ocp_solver.cpp'))
         f_pybind11.writelines([
 """
 // This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1020,7 +1390,7 @@ namespace py = pybind11;
 """ 
         ])
         f_pybind11.close()
-        f_pybind11 = open(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'single_shooting_cgmres_solver.cpp'), 'w')
+        f_pybind11 = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'single_shooting_cgmres_solver.cpp'))
         f_pybind11.writelines([
 """
 // This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1056,7 +1426,7 @@ namespace py = pybind11;
 """ 
         ])
         f_pybind11.close()
-        f_pybind11 = open(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'multiple_shooting_cgmres_solver.cpp'), 'w')
+        f_pybind11 = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'multiple_shooting_cgmres_solver.cpp'))
         f_pybind11.writelines([
 """
 // This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1092,7 +1462,7 @@ namespace py = pybind11;
 """ 
         ])
         f_pybind11.close()
-        f_pybind11 = open(os.path.join(self.get_ocp_pybind_dir(), 'common', 'horizon.cpp'), 'w')
+        f_pybind11 = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), 'common', 'horizon.cpp'))
         f_pybind11.writelines([
 """
 // This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1122,7 +1492,7 @@ DEFINE_PYBIND11_MODULE_HORIZON()
 """ 
         ])
         f_pybind11.close()
-        f_pybind11 = open(os.path.join(self.get_ocp_pybind_dir(), 'common', 'solver_settings.cpp'), 'w')
+        f_pybind11 = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), 'common', 'solver_settings.cpp'))
         f_pybind11.writelines([
 """
 // This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1151,7 +1521,7 @@ DEFINE_PYBIND11_MODULE_SOLVER_SETTINGS()
 """ 
         ])
         f_pybind11.close()
-        f_pybind11 = open(os.path.join(self.get_ocp_pybind_dir(), 'common', 'timer.cpp'), 'w')
+        f_pybind11 = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), 'common', 'timer.cpp'))
         f_pybind11.writelines([
 """
 // This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1180,7 +1550,7 @@ DEFINE_PYBIND11_MODULE_TIMER()
 """ 
         ])
         f_pybind11.close()
-        f_pybind11 = open(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, '__init__.py'), 'w')
+        f_pybind11 = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, '__init__.py'))
         f_pybind11.writelines([
 """
 # This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1190,10 +1560,33 @@ from .ocp import *
 from .zero_horizon_ocp_solver import *
 from .single_shooting_cgmres_solver import *
 from .multiple_shooting_cgmres_solver import *
+from . import single_shooting_cgmres_solver as _single_shooting
+from . import multiple_shooting_cgmres_solver as _multiple_shooting
+
+
+def simulate(mpc, ocp, t0, x0, tsim, integrator='rk4'):
+    ''' Runs the closed-loop simulation in C++ without the GIL. 
+
+        Args:
+            mpc: The initialized SingleShootingCGMRESSolver or 
+                MultipleShootingCGMRESSolver.
+            ocp: The OCP whose dynamics is simulated.
+            t0: The initial time.
+            x0: The initial state.
+            tsim: The length of the simulation.
+            integrator: 'rk4' or 'forward_euler'.
+
+        Returns:
+            The dict of the arrays 't', 'x', 'u', 'opterr', and 'solve_time_ms'
+            whose i-th rows are the i-th sampling step.
+    '''
+    if isinstance(mpc, SingleShootingCGMRESSolver):
+        return _single_shooting.simulate(mpc, ocp, t0, x0, tsim, integrator)
+    return _multiple_shooting.simulate(mpc, ocp, t0, x0, tsim, integrator)
 """ 
         ])
         f_pybind11.close()
-        f_pybind11 = open(os.path.join(self.get_ocp_pybind_dir(), 'common', '__init__.py'), 'w')
+        f_pybind11 = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), 'common', '__init__.py'))
         f_pybind11.writelines([
 """
 # This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1212,7 +1605,8 @@ from .timer import *
         """ Generates CMakeLists.txt in a directory where your .ipynb files 
             locates.
         """
-        f_cmake = open(os.path.join(self.get_ocp_dir(), 'CMakeLists.txt'), 'w')
+        separate_compilation = self.__separate_compilation
+        f_cmake = GeneratedFile(os.path.join(self.get_ocp_dir(), 'CMakeLists.txt'))
         f_cmake.writelines([
 """
 # This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1235,7 +1629,42 @@ find_package(cgmres QUIET)
 if (NOT cgmres_FOUND)
   set(CGMRES_INCLUDE_DIR ${PROJECT_SOURCE_DIR}/../../include)
 endif()
-
+"""
+            ])
+        if self.__precision == 'float':
+            f_cmake.write('\nadd_definitions(-DCGMRES_USE_FLOAT)\n')
+        elif self.__precision == 'mixed':
+            f_cmake.write('\nadd_definitions(-DCGMRES_MIXED_PRECISION)\n')
+        if separate_compilation:
+            f_cmake.writelines([
+"""
+add_library(
+  ${PROJECT_NAME}_ocp
+  STATIC
+  ocp.cpp
+)
+set_target_properties(
+  ${PROJECT_NAME}_ocp
+  PROPERTIES
+  POSITION_INDEPENDENT_CODE ON
+)
+target_include_directories(
+  ${PROJECT_NAME}_ocp
+  PUBLIC
+  ${CGMRES_INCLUDE_DIR}
+  ${PROJECT_SOURCE_DIR}
+)
+if (VECTORIZE)
+  target_compile_options(
+    ${PROJECT_NAME}_ocp
+    PRIVATE
+    -march=native
+  )
+endif()
+"""
+            ])
+        f_cmake.writelines([
+"""
 if (BUILD_MAIN)
   add_executable(
     ${PROJECT_NAME}
@@ -1253,7 +1682,19 @@ if (BUILD_MAIN)
       -march=native
     )
   endif()
-endif()
+"""
+            ])
+        if separate_compilation:
+            f_cmake.writelines([
+"""  target_link_libraries(
+    ${PROJECT_NAME}
+    PRIVATE
+    ${PROJECT_NAME}_ocp
+  )
+"""
+            ])
+        f_cmake.writelines([
+"""endif()
 
 if (BUILD_PYTHON_INTERFACE)
     add_subdirectory(python/common)
@@ -1262,7 +1703,7 @@ endif()
 """
             ])
         f_cmake.close()
-        f_cmake_python = open(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'CMakeLists.txt'), 'w')
+        f_cmake_python = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), self.__ocp_name, 'CMakeLists.txt'))
         f_cmake_python.writelines([
 """
 # This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1289,6 +1730,13 @@ macro(pybind11_add_cgmres_module MODULE)
         -march=native
     )
     endif()
+    if (TARGET ${PROJECT_NAME}_ocp)
+    target_link_libraries(
+        ${MODULE}
+        PRIVATE
+        ${PROJECT_NAME}_ocp
+    )
+    endif()
 endmacro()
 
 add_subdirectory(${CGMRES_INCLUDE_DIR}/cgmres/thirdparty/pybind11 ${CMAKE_CURRENT_BINARY_DIR}/thirdparty/pybind11)
@@ -1317,7 +1765,7 @@ install(
 """
             ])
         f_cmake_python.close()
-        f_cmake_python = open(os.path.join(self.get_ocp_pybind_dir(), 'common', 'CMakeLists.txt'), 'w')
+        f_cmake_python = GeneratedFile(os.path.join(self.get_ocp_pybind_dir(), 'common', 'CMakeLists.txt'))
         f_cmake_python.writelines([
 """
 # This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
@@ -1387,7 +1835,7 @@ install(
         print('Successfully updated git submodules\n')
 
     def build_main(self, generator: str='Auto', vectorize: bool=True, 
-                   remove_build_dir: bool=False):
+                   remove_build_dir: bool=False, use_cache: bool=True):
         """ Builds execute file to run numerical simulation. 
 
             Args: 
@@ -1404,6 +1852,12 @@ install(
                     removed and if False, the build directory is not removed.
                     Need to be set True is you change CMake configuration, e.g., 
                     if you change the generator. The default value is False.
+                use_cache: If True, the build artifacts are restored from the 
+                    build cache if the generated source files, the cgmres 
+                    headers, the compiler, and the build options are 
+                    unchanged, and are stored in the build cache after the 
+                    build otherwise. 
+                    Default is True.
         """
         if remove_build_dir:
             remove_dir(self.get_ocp_dir(), 'build')
@@ -1414,10 +1868,18 @@ install(
         else:
             build_options = ['-DCMAKE_BUILD_TYPE=Release', '-DVECTORIZE=OFF', '-DBUILD_MAIN=ON', '-DBUILD_PYTHON_INTERFACE=OFF']
         print('CMake options:', *build_options)
-        build_cpp(generator, build_dir, build_options)
+        source_files = [os.path.join(self.get_ocp_dir(), e) for e in ['ocp.hpp', 'ocp.cpp', 'main.cpp', 'CMakeLists.txt']]
+        configure_cpp(generator, build_dir, build_options)
+        cache_key = self.__get_build_cache_key(source_files, [generator, *build_options])
+        if use_cache and self.__build_cache.restore(cache_key, build_dir):
+            print('Restored the executable from the build cache', self.__build_cache.cache_dir, '\n')
+            return
+        if build_cpp(generator, build_dir, build_options, configure=False) == 0 and use_cache:
+            artifacts = [os.path.join(build_dir, e) for e in [self.__ocp_name, self.__ocp_name+'.exe']]
+            self.__build_cache.store(cache_key, build_dir, [e for e in artifacts if os.path.isfile(e)])
 
     def build_python_interface(self, generator: str='Auto', vectorize: bool=True, 
-                               remove_build_dir: bool=False):
+                               remove_build_dir: bool=False, use_cache: bool=True):
         """ Builds Python interfaces. 
 
             Args: 
@@ -1434,6 +1896,12 @@ install(
                     removed and if False, the build directory is not removed.
                     Need to be set True is you change CMake configuration, e.g., 
                     if you change the generator. The default value is False.
+                use_cache: If True, the build artifacts are restored from the 
+                    build cache if the generated source files, the cgmres 
+                    headers, the compiler, and the build options are 
+                    unchanged, and are stored in the build cache after the 
+                    build otherwise. 
+                    Default is True.
         """
         if remove_build_dir:
             remove_dir(self.get_ocp_dir(), 'build')
@@ -1444,7 +1912,36 @@ install(
         else:
             build_options = ['-DCMAKE_BUILD_TYPE=Release', '-DVECTORIZE=OFF', '-DBUILD_MAIN=OFF', '-DBUILD_PYTHON_INTERFACE=ON']
         print('CMake options:', *build_options)
-        build_cpp(generator, build_dir, build_options)
+        source_files = [os.path.join(self.get_ocp_dir(), e) for e in ['ocp.hpp', 'ocp.cpp', 'CMakeLists.txt']]
+        for e in [self.__ocp_name, 'common']:
+            source_files.extend(glob.glob(os.path.join(self.get_ocp_pybind_dir(), e, '*.cpp')))
+            source_files.append(os.path.join(self.get_ocp_pybind_dir(), e, 'CMakeLists.txt'))
+        configure_cpp(generator, build_dir, build_options)
+        cache_key = self.__get_build_cache_key(source_files, [generator, *build_options])
+        if use_cache and self.__build_cache.restore(cache_key, build_dir):
+            print('Restored the Python interfaces from the build cache', self.__build_cache.cache_dir, '\n')
+            return
+        if build_cpp(generator, build_dir, build_options, configure=False) == 0 and use_cache:
+            artifacts = []
+            for e in [self.__ocp_name, 'common']:
+                for ext in ['*.so', '*.pyd', '*.dylib', '*.dll']:
+                    artifacts.extend(glob.glob(os.path.join(build_dir, 'python', e, ext)))
+            self.__build_cache.store(cache_key, build_dir, artifacts)
+
+    def __get_build_cache_key(self, source_files, build_options):
+        # The key contains the cgmres headers and the C++ compiler that CMake 
+        # resolved when configuring the build directory, i.e., the installed 
+        # cgmres if find_package() found it and this repository otherwise.
+        cmake_cache = read_cmake_cache(self.get_ocp_build_dir())
+        include_dir = os.path.abspath(os.path.join(self.get_ocp_dir(), '..', '..', 'include'))
+        cgmres_config = os.path.join(cmake_cache.get('cgmres_DIR', ''), 'cgmres-config.cmake')
+        if os.path.isfile(cgmres_config):
+            with open(cgmres_config, 'r') as f:
+                m = re.search(r'set\("?CGMRES_INCLUDE_DIR"?\s+"?([^")]*)"?\)', f.read())
+            if m is not None:
+                include_dir = os.path.abspath(m.group(1))
+        return self.__build_cache.key(source_files, build_options, include_dir, 
+                                      cmake_cache.get('CMAKE_CXX_COMPILER'))
 
     def install_python_interface(self, install_prefix=None):
         install_python_interface(self.get_ocp_dir(), self.get_ocp_name(), install_prefix)
@@ -1489,6 +1986,50 @@ install(
                 print(line.rstrip().decode("utf8"))
         print('The log files are generated at ', self.get_ocp_log_dir())
 
+def _split_kernel_definitions(code: str, class_name: str):
+    """ Moves the definitions of the kernels, i.e., the non-template const 
+        member functions named eval_*() or init_*() and their helpers, out of 
+        the class definition in code.
+
+        Args:
+            code: The code of the header that defines the class.
+            class_name: The name of the class.
+
+        Returns:
+            Tuple of the code of the header in which the kernels are only 
+            declared and the list of the out-of-class definitions of the kernels.
+    """
+    lines = code.splitlines(keepends=True)
+    header, definitions = [], []
+    i = 0
+    while i < len(lines):
+        match = re.match(r'^  (CGMRES_NOINLINE )?void ((eval|init)_\w+)\(', lines[i])
+        if match is None or (i > 0 and lines[i-1].lstrip().startswith('template')):
+            header.append(lines[i])
+            i += 1
+            continue
+        signature = []
+        while not lines[i].rstrip().endswith(') const {'):
+            signature.append(lines[i])
+            i += 1
+        signature.append(lines[i])
+        i += 1
+        body = []
+        while lines[i].rstrip() != '  }':
+            body.append(lines[i])
+            i += 1
+        i += 1
+        header.extend(signature[:-1])
+        header.append(signature[-1].rstrip()[:-len(' {')]+';\n')
+        definition = [signature[0].replace('  '+(match.group(1) or '')+'void '+match.group(2)+'(', 
+                                           'void '+class_name+'::'+match.group(2)+'(', 1)]
+        definition.extend([e[2:] if e.startswith('  ') else e for e in signature[1:]])
+        definition.extend(body)
+        definition.append('}\n')
+        definitions.append(''.join(definition))
+    return ''.join(header), definitions
+
+
 def generate_docs():
     """ Generate docs. Doxygen and webbrowser are required.
     """
@@ -1504,8 +2045,11 @@ def open_docs():
     import webbrowser
     webbrowser.open('file:///'+str(os.path.join(os.getcwd(), 'doc', 'html', 'annotated.html')))
 
-def build_cpp(generator: str, build_dir, build_options):
-    """ Builds cpp file. 
+def configure_cpp(generator: str, build_dir, build_options):
+    """ Configures the CMake project of cpp file. 
+
+        Returns:
+            The return code of the configuration.
     """
     os.makedirs(build_dir, exist_ok=True)
     if platform.system() == 'Windows':
@@ -1537,6 +2081,21 @@ def build_cpp(generator: str, build_dir, build_options):
     for line in iter(proc.stdout.readline, b''):
         print(line.rstrip().decode("utf8"))
     print('\n')
+    return proc.wait()
+
+def build_cpp(generator: str, build_dir, build_options, configure: bool=True):
+    """ Builds cpp file. 
+
+        Args:
+            configure: If True, the CMake project is configured before the 
+                build. Set False if it is already configured by 
+                configure_cpp(). Default is True.
+
+        Returns:
+            The return code of the build.
+    """
+    if configure:
+        configure_cpp(generator, build_dir, build_options)
     proc = subprocess.Popen(
         ['cmake', '--build', '.'], 
         cwd=build_dir, 
@@ -1547,6 +2106,7 @@ def build_cpp(generator: str, build_dir, build_options):
     for line in iter(proc.stdout.readline, b''):
         print(line.rstrip().decode("utf8"))
     print('\n')
+    return proc.wait()
 
 def find_windows_cmake_generator():
     """ Finds the CMake generator in Windows.
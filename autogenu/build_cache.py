@@ -0,0 +1,315 @@
+import hashlib
+import platform
+import shutil
+import glob
+import io
+import os
+import pickle
+import re
+import subprocess
+import sys
+
+
+def default_cache_dir():
+    """ Returns the default directory of the build artifact store.
+        The environment variable AUTOGENU_CACHE_DIR is used if it is set,
+        and '~/.cache/autogenu' otherwise.
+    """
+    cache_dir = os.environ.get('AUTOGENU_CACHE_DIR')
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'autogenu')
+    return os.path.abspath(cache_dir)
+
+
+def write_if_changed(file_path, content: str):
+    """ Writes content onto file_path only if the content differs from that of
+        the existing file. Keeping the unchanged files untouched preserves
+        their mtimes so that CMake does not recompile them.
+
+        Args:
+            file_path: Path of the file.
+            content: The text content of the file.
+
+        Returns:
+            True if the file is written and False if the file is unchanged.
+    """
+    if os.path.isfile(file_path):
+        with open(file_path, 'r') as f:
+            if f.read() == content:
+                return False
+    with open(file_path, 'w') as f:
+        f.write(content)
+    return True
+
+
+class GeneratedFile(io.StringIO):
+    """ A writable text stream used in place of open(file_path, 'w') for the
+        generated source files. The content is written onto file_path when
+        close() is called and only if it has changed.
+
+        Args:
+            file_path: Path of the generated file.
+    """
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.written = False
+
+    def close(self):
+        if not self.closed:
+            self.written = write_if_changed(self.file_path, self.getvalue())
+        super().close()
+
+
+def hash_files(file_paths, extra_keys=None):
+    """ Computes the content hash of the files and the extra keys.
+
+        Args:
+            file_paths: Paths of the files. The files that do not exist are
+                ignored.
+            extra_keys: Strings that are also hashed, e.g., build options.
+
+        Returns:
+            SHA-256 hex digest.
+    """
+    extra_keys = extra_keys or []
+    sha = hashlib.sha256()
+    for file_path in sorted(file_paths):
+        if not os.path.isfile(file_path):
+            continue
+        sha.update(os.path.basename(file_path).encode())
+        with open(file_path, 'rb') as f:
+            sha.update(hashlib.sha256(f.read()).digest())
+    for key in extra_keys:
+        sha.update(str(key).encode())
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+def read_cmake_cache(build_dir):
+    """ Reads the entries of CMakeCache.txt in the build directory.
+
+        Args:
+            build_dir: The build directory.
+
+        Returns:
+            Dictionary of the names and values of the entries, which is empty 
+            if the build directory is not configured.
+    """
+    entries = {}
+    cmake_cache = os.path.join(build_dir, 'CMakeCache.txt')
+    if not os.path.isfile(cmake_cache):
+        return entries
+    with open(cmake_cache, 'r') as f:
+        for line in f:
+            m = re.match(r'^([A-Za-z_][^:=]*):[^=]*=(.*)$', line.rstrip('\n'))
+            if m is not None:
+                entries[m.group(1)] = m.group(2)
+    return entries
+
+
+def compiler_version(compiler):
+    """ Returns the output of `compiler --version`.
+
+        Args:
+            compiler: Path or command of the compiler.
+
+        Returns:
+            The output, or an empty string if the compiler cannot be run.
+    """
+    if not compiler:
+        return ''
+    try:
+        proc = subprocess.run([compiler, '--version'], stdout=subprocess.PIPE, 
+                              stderr=subprocess.STDOUT, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return ''
+    return proc.stdout.decode('utf8', errors='replace')
+
+
+class BuildCache(object):
+    """ Content-addressed store of the built executables and Python bindings.
+        The key is the hash of the generated source files (which describe the
+        symbolic functions, dimensions, variables, bounds, and solver
+        parameters), the cgmres headers, the compiler and its version, and 
+        the build options. The store can be shared by several projects.
+
+        Args:
+            cache_dir: Directory of the artifact store. If None,
+                default_cache_dir() is used.
+    """
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self.cache_dir = os.path.abspath(cache_dir)
+
+    def key(self, source_files, build_options, include_dir=None, compiler=None):
+        """ Computes the cache key.
+
+            Args:
+                source_files: Paths of the generated source files.
+                build_options: Build options, e.g., the CMake options and
+                    the generator.
+                include_dir: Directory that contains the cgmres headers.
+                    If None, the headers are not hashed.
+                compiler: The C++ compiler, whose output of --version is 
+                    hashed. If None, the environment variable CXX is used.
+
+            Returns:
+                The cache key.
+        """
+        headers = []
+        if include_dir is not None and os.path.isdir(include_dir):
+            headers = glob.glob(os.path.join(include_dir, 'cgmres', '*.hpp')) \
+                        + glob.glob(os.path.join(include_dir, 'cgmres', 'detail', '*.hpp')) \
+                        + glob.glob(os.path.join(include_dir, 'cgmres', 'python', '*.hpp'))
+        if compiler is None:
+            compiler = os.environ.get('CXX', '')
+        extra_keys = [*build_options, platform.system(), platform.machine(),
+                      sys.version_info.major, sys.version_info.minor,
+                      include_dir, compiler, compiler_version(compiler)]
+        return hash_files(list(source_files)+headers, extra_keys)
+
+    def restore(self, key: str, build_dir):
+        """ Copies the artifacts stored with key into build_dir.
+
+            Returns:
+                True if the artifacts are found and False otherwise.
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry_dir):
+            return False
+        for root, _, files in os.walk(entry_dir):
+            rel_dir = os.path.relpath(root, entry_dir)
+            os.makedirs(os.path.join(build_dir, rel_dir), exist_ok=True)
+            for e in files:
+                shutil.copy2(os.path.join(root, e), os.path.join(build_dir, rel_dir, e))
+        return True
+
+    def store(self, key: str, build_dir, artifacts):
+        """ Stores the artifacts in build_dir with key.
+
+            Args:
+                key: The cache key.
+                build_dir: The build directory.
+                artifacts: Paths of the artifacts in build_dir.
+        """
+        if len(artifacts) == 0:
+            return
+        entry_dir = os.path.join(self.cache_dir, key)
+        tmp_dir = entry_dir + '.tmp' + str(os.getpid())
+        for e in artifacts:
+            rel_path = os.path.relpath(e, build_dir)
+            os.makedirs(os.path.dirname(os.path.join(tmp_dir, rel_path)), exist_ok=True)
+            shutil.copy2(e, os.path.join(tmp_dir, rel_path))
+        if os.path.isdir(entry_dir):
+            shutil.rmtree(tmp_dir)
+        else:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            os.replace(tmp_dir, entry_dir)
+
+
+class SymbolicCache(object):
+    """ On-disk memo of the results of the symbolic computations, e.g., the 
+        derived symbolic functions, the simplified functions, and the generated 
+        code of them. The entries are pickled files whose names are the keys, 
+        and the least recently used entries are evicted when the total size 
+        exceeds max_size.
+
+        Args:
+            cache_dir: Directory of the cache.
+            max_size: The maximum total size of the entries in bytes. If 0, 
+                nothing is cached. Default is 64 MiB.
+    """
+    def __init__(self, cache_dir, max_size: int=64*1024*1024):
+        assert max_size >= 0
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_size = max_size
+
+    @staticmethod
+    def key(*keys):
+        """ Computes the key of an entry. 
+
+            Args:
+                keys: Strings that identify the entry, e.g., the canonical 
+                    representations of the symbolic expressions and the 
+                    options.
+
+            Returns:
+                SHA-256 hex digest.
+        """
+        sha = hashlib.sha256()
+        for key in keys:
+            sha.update(str(key).encode())
+            sha.update(b'\0')
+        return sha.hexdigest()
+
+    def load(self, key: str):
+        """ Loads the entry stored with key and marks it as recently used.
+
+            Returns:
+                The stored value if the entry is found and None otherwise.
+        """
+        if self.max_size == 0:
+            return None
+        entry_path = os.path.join(self.cache_dir, key)
+        try:
+            with open(entry_path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(entry_path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return value
+
+    def store(self, key: str, value):
+        """ Stores value with key and evicts the least recently used entries 
+            if the total size exceeds max_size.
+
+            Args:
+                key: The key of the entry.
+                value: A picklable value that is not None.
+        """
+        if self.max_size == 0:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path = os.path.join(self.cache_dir, key)
+        tmp_path = entry_path + '.tmp' + str(os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+        self.__evict()
+
+    def get_or_compute(self, key: str, compute):
+        """ Returns the value stored with key. If it is not found, computes 
+            it by compute() and stores it.
+
+            Args:
+                key: The key of the entry.
+                compute: A function without arguments that returns the value.
+
+            Returns:
+                The value.
+        """
+        value = self.load(key)
+        if value is None:
+            value = compute()
+            self.store(key, value)
+        return value
+
+    def __evict(self):
+        entries = []
+        for e in os.listdir(self.cache_dir):
+            entry_path = os.path.join(self.cache_dir, e)
+            if '.tmp' in e or not os.path.isfile(entry_path):
+                continue
+            stat = os.stat(entry_path)
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        total_size = sum(e[1] for e in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+            total_size -= size
@@ -0,0 +1,195 @@
+import io
+import numpy as np
+import os
+
+
+def _log_file(log_dir, log_name: str, channel: str):
+    """ Returns the path to the log of the channel. If both of the text and
+        binary logs exist, the newer one is returned.
+    """
+    npy_file = os.path.join(log_dir, log_name+'_'+channel+'.npy')
+    text_file = os.path.join(log_dir, log_name+'_'+channel+'.log')
+    if os.path.isfile(npy_file) and (not os.path.isfile(text_file)
+                                     or os.path.getmtime(npy_file) >= os.path.getmtime(text_file)):
+        return npy_file
+    return text_file
+
+
+def _read_npy_header(f):
+    """ Reads the header of the .npy file of the version 1.0, which Logger 
+        writes, and returns the shape and dtype. 
+    """
+    np.lib.format.read_magic(f)
+    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    return shape, dtype
+
+
+def load_log(log_dir, log_name: str, channel: str):
+    """ Loads a log saved by Logger in either format. If both of the text and
+        binary logs exist, the newer one is loaded.
+
+        Args:
+            log_dir: The directory where the logs are saved.
+            log_name: The name of the logs.
+            channel: The name of the channel, e.g., 't', 'x', 'u', or 'opterr'.
+
+        Returns:
+            The array of the log. The binary log is memory-mapped read-only.
+    """
+    log_file = _log_file(log_dir, log_name, channel)
+    if log_file.endswith('.npy'):
+        return np.load(log_file, mmap_mode='r')
+    # The C parser of np.loadtxt is several times faster than np.genfromtxt
+    # and does not hold the intermediate lists of the whole file.
+    return np.loadtxt(log_file)
+
+
+class LogReader(object):
+    """ Reader of the logs of the closed-loop simulation. Each channel is
+        loaded on the first access and is cached. The binary logs are
+        memory-mapped and are not read until they are used.
+
+        Args:
+            log_dir: The directory where the logs are saved.
+            log_name: The name of the logs.
+
+        Attributes:
+            t, x, u, opterr: The logs of the time, state, control input, and
+                optimality error, in which NaN is replaced with 0.
+    """
+    def __init__(self, log_dir, log_name: str):
+        self.log_dir = log_dir
+        self.log_name = log_name
+        self.__data = {}
+
+    @property
+    def t(self):
+        return self.load('t')
+
+    @property
+    def x(self):
+        return self.load('x')
+
+    @property
+    def u(self):
+        return self.load('u')
+
+    @property
+    def opterr(self):
+        return self.load('opterr')
+
+    def load(self, channel: str):
+        """ Loads the log of the channel, in which NaN is replaced with 0.
+
+            Args:
+                channel: The name of the channel, e.g., 't', 'x', 'u', or
+                    'opterr'.
+
+            Returns:
+                The array of the log. The binary log without NaN remains
+                memory-mapped read-only.
+        """
+        if channel not in self.__data:
+            data = load_log(self.log_dir, self.log_name, channel)
+            nan = np.isnan(data)
+            if nan.any():
+                data = np.array(data)
+                data[nan] = 0
+            self.__data[channel] = data
+        return self.__data[channel]
+
+    def dim(self, channel: str):
+        """ Gets the dimension of the channel without loading the log.
+
+            Args:
+                channel: The name of the channel, e.g., 'x' or 'u'.
+
+            Returns:
+                The number of the columns of the log, which is 0 if the log 
+                does not exist yet or is empty.
+        """
+        if channel in self.__data:
+            data = self.__data[channel]
+            return 1 if data.ndim == 1 else data.shape[1]
+        log_file = _log_file(self.log_dir, self.log_name, channel)
+        if not os.path.isfile(log_file):
+            return 0
+        if log_file.endswith('.npy'):
+            with open(log_file, 'rb') as f:
+                try:
+                    shape, dtype = _read_npy_header(f)
+                except ValueError:
+                    # The header is being written by the logger.
+                    return 0
+            return 1 if len(shape) == 1 else shape[1]
+        with open(log_file) as f:
+            return len(f.readline().split())
+
+
+class LogTail(object):
+    """ Reader of the rows appended to a log while it is being written. Each 
+        call of read() returns only the new complete rows, so the history is 
+        never read again. 
+
+        Args:
+            log_dir: The directory where the logs are saved.
+            log_name: The name of the logs.
+            channel: The name of the channel, e.g., 't', 'x', 'u', or 'opterr'.
+    """
+    def __init__(self, log_dir, log_name: str, channel: str):
+        self.log_dir = log_dir
+        self.log_name = log_name
+        self.channel = channel
+        self.__log_file = None
+        # The offset of the unread data in bytes for the text log and the 
+        # number of the read rows for the binary log.
+        self.__offset = 0
+        self.__num_rows = 0
+
+    def read(self):
+        """ Reads the rows appended since the last call, in which NaN is 
+            replaced with 0.
+
+            Returns:
+                The 2D array of the new rows, which is empty if the log does 
+                not exist yet or has no new rows.
+        """
+        if self.__log_file is None:
+            log_file = _log_file(self.log_dir, self.log_name, self.channel)
+            if not os.path.isfile(log_file):
+                return np.empty((0, 0))
+            self.__log_file = log_file
+        if self.__log_file.endswith('.npy'):
+            rows = self.__read_binary()
+        else:
+            rows = self.__read_text()
+        rows[np.isnan(rows)] = 0
+        return rows
+
+    def __read_text(self):
+        with open(self.__log_file, 'rb') as f:
+            f.seek(self.__offset)
+            data = f.read()
+        # The last line may be being written.
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return np.empty((0, 0))
+        self.__offset += end
+        return np.loadtxt(io.BytesIO(data[:end]), ndmin=2)
+
+    def __read_binary(self):
+        with open(self.__log_file, 'rb') as f:
+            try:
+                shape, dtype = _read_npy_header(f)
+            except ValueError:
+                # The header is being written by the logger.
+                return np.empty((0, 0))
+            dim = 1 if len(shape) == 1 else shape[1]
+            if shape[0] <= self.__num_rows or dim == 0:
+                return np.empty((0, dim))
+            f.seek(f.tell()+self.__num_rows*dim*dtype.itemsize)
+            count = (shape[0]-self.__num_rows) * dim
+            rows = np.fromfile(f, dtype=dtype, count=count).astype(np.float64)
+        rows = rows[:rows.size//dim*dim].reshape(-1, dim)
+        self.__num_rows += rows.shape[0]
+        return rows
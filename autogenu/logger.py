@@ -1,28 +1,231 @@
 import numpy as np
 import os
+import struct
+import threading
+import time
+
+from .log_reader import load_log
+
+# Size of the header of the .npy files written by Logger. The header is
+# rewritten in place with the number of the rows at each flush, so it is
+# padded to a fixed size that fits any shape.
+_NPY_HEADER_SIZE = 128
+
+
+class _BinaryLog(object):
+    """ Append-only .npy file of float64 rows that are buffered in memory and
+        written in blocks. The header is updated at each flush so that the
+        file is always readable by np.load(), e.g., with mmap_mode='r'.
+    """
+    def __init__(self, file_path, buffer_size: int, scalar: bool):
+        self.__file = open(file_path, mode='wb')
+        self.__buffer_size = buffer_size
+        self.__scalar = scalar
+        self.__buffer = None
+        self.__num_buffered = 0
+        self.__num_rows = 0
+        self.__write_header()
+
+    def write(self, row):
+        if self.__buffer is None:
+            dim = 1 if self.__scalar else np.asarray(row).size
+            self.__buffer = np.empty((self.__buffer_size, dim))
+        self.__buffer[self.__num_buffered] = np.ravel(row)
+        self.__num_buffered += 1
+        if self.__num_buffered == self.__buffer_size:
+            self.flush()
+
+    def write_rows(self, rows):
+        # Writes the block of the rows directly, bypassing the buffer.
+        rows = np.asarray(rows, dtype=np.float64).reshape(len(rows), -1)
+        if self.__buffer is None:
+            self.__buffer = np.empty((self.__buffer_size, rows.shape[1]))
+        self.flush()
+        self.__file.seek(0, os.SEEK_END)
+        self.__file.write(rows.tobytes())
+        self.__num_rows += len(rows)
+        self.__write_header()
+
+    def flush(self):
+        if self.__num_buffered > 0:
+            self.__file.seek(0, os.SEEK_END)
+            self.__file.write(self.__buffer[:self.__num_buffered].tobytes())
+            self.__num_rows += self.__num_buffered
+            self.__num_buffered = 0
+            self.__write_header()
+        self.__file.flush()
+
+    def close(self):
+        self.flush()
+        self.__file.close()
+
+    def __write_header(self):
+        if self.__scalar:
+            shape = (self.__num_rows,)
+        else:
+            shape = (self.__num_rows, 0 if self.__buffer is None else self.__buffer.shape[1])
+        header = "{'descr': '<f8', 'fortran_order': False, 'shape': "+repr(shape)+", }"
+        header = header.ljust(_NPY_HEADER_SIZE-11) + '\n'
+        self.__file.seek(0)
+        self.__file.write(b'\x93NUMPY\x01\x00'+struct.pack('<H', len(header))+header.encode('latin1'))
+
 
 class Logger(object):
-    def __init__(self, log_dir, log_name: str):
+    """ Logger of the closed-loop simulation.
+
+        Args:
+            log_dir: The directory where the logs are saved.
+            log_name: The name of the logs. The time, state, control input,
+                and optimality error are saved in log_name+'_t', '_x', '_u',
+                and '_opterr' with the extension '.log' or '.npy'.
+            binary: If False, the logs are saved as text files (.log) line by
+                line. If True, the logs are buffered in memory and are saved
+                as .npy files in blocks of buffer_size rows, which can be
+                loaded by np.load(mmap_mode='r'). Default is False.
+            buffer_size: The number of the rows buffered in memory in the
+                binary mode. Default is 1000.
+            asynchronous: If True, save() only copies the data into a ring
+                buffer and a background thread writes them onto the files. 
+                close() must then be called to write all the data. Default is 
+                False.
+            capacity: The number of the rows of the ring buffer in the
+                asynchronous mode. Default is 65536.
+            overflow: The policy when the ring buffer is full in the
+                asynchronous mode. If 'block', save() waits for the
+                background thread. If 'drop', the data is discarded and
+                counted in num_dropped. Default is 'block'.
+    """
+    def __init__(self, log_dir, log_name: str, binary: bool=False, buffer_size: int=1000, 
+                 asynchronous: bool=False, capacity: int=65536, overflow: str='block'):
+        assert buffer_size > 0
+        assert capacity > 0
+        assert overflow in ['block', 'drop'], "overflow must be 'block' or 'drop'!"
         os.makedirs(log_dir, exist_ok=True)
-        self.t_log = open(os.path.join(log_dir, log_name+"_t.log"), mode='w')
-        self.x_log = open(os.path.join(log_dir, log_name+"_x.log"), mode='w')
-        self.u_log = open(os.path.join(log_dir, log_name+"_u.log"), mode='w')
-        self.opterr_log = open(os.path.join(log_dir, log_name+"_opterr.log"), mode='w')
+        self.binary = binary
+        self.asynchronous = asynchronous
+        self.num_dropped = 0
+        if binary:
+            self.t_log = _BinaryLog(os.path.join(log_dir, log_name+"_t.npy"), buffer_size, True)
+            self.x_log = _BinaryLog(os.path.join(log_dir, log_name+"_x.npy"), buffer_size, False)
+            self.u_log = _BinaryLog(os.path.join(log_dir, log_name+"_u.npy"), buffer_size, False)
+            self.opterr_log = _BinaryLog(os.path.join(log_dir, log_name+"_opterr.npy"), buffer_size, True)
+        else:
+            self.t_log = open(os.path.join(log_dir, log_name+"_t.log"), mode='w')
+            self.x_log = open(os.path.join(log_dir, log_name+"_x.log"), mode='w')
+            self.u_log = open(os.path.join(log_dir, log_name+"_u.log"), mode='w')
+            self.opterr_log = open(os.path.join(log_dir, log_name+"_opterr.log"), mode='w')
         self.open = True
+        if asynchronous:
+            # Single-producer single-consumer ring buffer of the rows of 
+            # [t, x, u, opterr], which is allocated when the dimensions are 
+            # known. The producer only advances __head and the consumer only 
+            # advances __tail, so no lock is needed.
+            self.__capacity = capacity
+            self.__overflow = overflow
+            self.__ring = None
+            self.__head = 0
+            self.__tail = 0
+            self.__closing = False
+            self.__wakeup = threading.Event()
+            self.__writer = threading.Thread(target=self.__write_loop, daemon=True)
+            self.__writer.start()
 
     def __del__(self):
         self.close()
 
     def save(self, t: float, x: np.ndarray, u: np.ndarray, opterr: float):
         if self.open:
-            np.savetxt(self.t_log, np.array([t]))
-            np.savetxt(self.x_log, [x])
-            np.savetxt(self.u_log, [u])
-            np.savetxt(self.opterr_log, np.array([opterr]))
+            if self.asynchronous:
+                self.__push(t, x, u, opterr)
+            elif self.binary:
+                self.t_log.write(t)
+                self.x_log.write(x)
+                self.u_log.write(u)
+                self.opterr_log.write(opterr)
+            else:
+                np.savetxt(self.t_log, np.array([t]))
+                np.savetxt(self.x_log, [x])
+                np.savetxt(self.u_log, [u])
+                np.savetxt(self.opterr_log, np.array([opterr]))
+
+    def flush(self):
+        """ Writes the buffered logs onto the files. """
+        if self.open:
+            if self.asynchronous:
+                self.__wakeup.set()
+                while self.__tail < self.__head:
+                    time.sleep(1.0e-04)
+            self.t_log.flush()
+            self.x_log.flush()
+            self.u_log.flush()
+            self.opterr_log.flush()
 
     def close(self):
-        self.t_log.close()
-        self.x_log.close()
-        self.u_log.close()
-        self.opterr_log.close()
-        self.open = False
\ No newline at end of file
+        if self.open:
+            if self.asynchronous:
+                self.__closing = True
+                self.__wakeup.set()
+                self.__writer.join()
+            self.t_log.close()
+            self.x_log.close()
+            self.u_log.close()
+            self.opterr_log.close()
+        self.open = False
+
+    def __push(self, t, x, u, opterr):
+        x = np.ravel(x)
+        u = np.ravel(u)
+        if self.__ring is None:
+            self.__dim_x = x.size
+            self.__dim_u = u.size
+            self.__ring = np.empty((self.__capacity, 2+x.size+u.size))
+        head = self.__head
+        if head - self.__tail >= self.__capacity:
+            if self.__overflow == 'drop':
+                self.num_dropped += 1
+                return
+            self.__wakeup.set()
+            while head - self.__tail >= self.__capacity:
+                time.sleep(1.0e-04)
+        row = self.__ring[head%self.__capacity]
+        row[0] = t
+        row[1:1+self.__dim_x] = x
+        row[1+self.__dim_x:-1] = u
+        row[-1] = opterr
+        self.__head = head + 1
+        # Wakes the writer only when the ring buffer is half full so that 
+        # save() does not touch the lock of the event every time.
+        if head + 1 - self.__tail == self.__capacity // 2:
+            self.__wakeup.set()
+
+    def __write_loop(self):
+        while True:
+            head = self.__head
+            tail = self.__tail
+            if head == tail:
+                if self.__closing:
+                    return
+                self.__wakeup.wait(0.01)
+                self.__wakeup.clear()
+                continue
+            begin = tail % self.__capacity
+            end = min(begin+head-tail, self.__capacity)
+            self.__write_rows(self.__ring[begin:end])
+            self.__tail = tail + end - begin
+
+    def __write_rows(self, rows):
+        t = rows[:, 0]
+        x = rows[:, 1:1+self.__dim_x]
+        u = rows[:, 1+self.__dim_x:-1]
+        opterr = rows[:, -1]
+        if self.binary:
+            self.t_log.write_rows(t)
+            self.x_log.write_rows(x)
+            self.u_log.write_rows(u)
+            self.opterr_log.write_rows(opterr)
+        else:
+            np.savetxt(self.t_log, t)
+            np.savetxt(self.x_log, x)
+            np.savetxt(self.u_log, u)
+            np.savetxt(self.opterr_log, opterr)
+
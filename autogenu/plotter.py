@@ -2,6 +2,148 @@ import numpy as np
 import matplotlib.pylab as plt
 import seaborn as sns
 import os
+import time
+
+from .log_reader import LogReader, LogTail
+
+
+def _min_max_downsample(t, y, max_points):
+    """ Downsamples a line to at most max_points points keeping its envelope. 
+        The samples are divided into max_points/2 buckets and the minimum and 
+        maximum of each bucket are kept in the order of time, so that spikes 
+        remain visible. 
+
+        Args:
+            t: The time. 
+            y: The values at t. 
+            max_points: The maximum number of the points. If None, the line 
+                is not downsampled. 
+
+        Returns:
+            The downsampled t and y. 
+    """
+    t = np.ravel(t)
+    y = np.ravel(y)
+    if max_points is None or y.size <= max_points:
+        return t, y
+    bucket_size = int(np.ceil(2*y.size/max_points))
+    num_buckets = y.size // bucket_size
+    buckets = y[:num_buckets*bucket_size].reshape(num_buckets, bucket_size)
+    offsets = bucket_size * np.arange(num_buckets)
+    imin = offsets + np.argmin(buckets, axis=1)
+    imax = offsets + np.argmax(buckets, axis=1)
+    if num_buckets*bucket_size < y.size:
+        # The last bucket with the rest of the samples.
+        rest = y[num_buckets*bucket_size:]
+        imin = np.append(imin, num_buckets*bucket_size+np.argmin(rest))
+        imax = np.append(imax, num_buckets*bucket_size+np.argmax(rest))
+    indices = np.sort(np.stack([imin, imax], axis=1), axis=1).ravel()
+    return t[indices], y[indices]
+
+
+class _MinMaxEnvelope(object):
+    """ Min/max envelope of a line that grows by appending samples. The 
+        samples are divided into buckets of bucket_size samples, and only the 
+        minimum and maximum of each bucket and of the last incomplete bucket 
+        are kept. When the number of the buckets exceeds max_points/2, the 
+        pairs of the buckets are merged and bucket_size is doubled, so that 
+        the memory and the cost of append() are bounded by max_points and the 
+        number of the new samples regardless of the length of the history.
+
+        Args:
+            max_points: The maximum number of the points of the envelope. If 
+                None, all the samples are kept. 
+    """
+    def __init__(self, max_points):
+        self.__max_buckets = None if max_points is None else max(max_points//2, 1)
+        self.__bucket_size = 1
+        # (tmin, ymin, tmax, ymax) of the complete buckets.
+        self.__buckets = np.empty((0, 4))
+        # (tmin, ymin, tmax, ymax) and the number of the samples of the last 
+        # incomplete bucket.
+        self.__last = None
+        self.__last_size = 0
+
+    def append(self, t, y):
+        """ Appends samples.
+
+            Args:
+                t: The time of the samples. 
+                y: The values of the samples. 
+        """
+        t = np.ravel(t)
+        y = np.ravel(y)
+        while t.size > 0:
+            # Fills the last bucket.
+            n = min(self.__bucket_size-self.__last_size, t.size)
+            self.__last = _merge_buckets(self.__last, _bucket(t[:n], y[:n]))
+            self.__last_size += n
+            t, y = t[n:], y[n:]
+            if self.__last_size == self.__bucket_size:
+                self.__buckets = np.append(self.__buckets, self.__last[None, :], axis=0)
+                self.__last = None
+                self.__last_size = 0
+            # The complete buckets of the rest of the samples at once.
+            n = t.size // self.__bucket_size * self.__bucket_size
+            if n > 0:
+                tb = t[:n].reshape(-1, self.__bucket_size)
+                yb = y[:n].reshape(-1, self.__bucket_size)
+                rows = np.arange(tb.shape[0])
+                imin = np.argmin(yb, axis=1)
+                imax = np.argmax(yb, axis=1)
+                buckets = np.stack([tb[rows, imin], yb[rows, imin], 
+                                    tb[rows, imax], yb[rows, imax]], axis=1)
+                self.__buckets = np.append(self.__buckets, buckets, axis=0)
+                t, y = t[n:], y[n:]
+            while self.__max_buckets is not None and self.__buckets.shape[0] > self.__max_buckets:
+                self.__coarsen()
+
+    def data(self):
+        """ Returns the time and values of the points of the envelope in the 
+            order of time. 
+        """
+        buckets = self.__buckets
+        if self.__last is not None:
+            buckets = np.append(buckets, self.__last[None, :], axis=0)
+        # The minimum and maximum of each bucket in the order of time.
+        first_min = buckets[:, 0] <= buckets[:, 2]
+        t = np.where(first_min[:, None], buckets[:, [0, 2]], buckets[:, [2, 0]])
+        y = np.where(first_min[:, None], buckets[:, [1, 3]], buckets[:, [3, 1]])
+        return t.ravel(), y.ravel()
+
+    def __coarsen(self):
+        """ Merges the pairs of the buckets and doubles the bucket size. """
+        num_pairs = self.__buckets.shape[0] // 2
+        if self.__buckets.shape[0] % 2 == 1:
+            # The odd bucket is the first half of the new last bucket.
+            self.__last = _merge_buckets(self.__buckets[-1], self.__last)
+            self.__last_size += self.__bucket_size
+        self.__buckets = _merge_buckets(self.__buckets[0:2*num_pairs:2], 
+                                        self.__buckets[1:2*num_pairs:2])
+        self.__bucket_size *= 2
+
+
+def _bucket(t, y):
+    """ Returns (tmin, ymin, tmax, ymax) of the samples. """
+    imin = np.argmin(y)
+    imax = np.argmax(y)
+    return np.array([t[imin], y[imin], t[imax], y[imax]])
+
+
+def _merge_buckets(first, second):
+    """ Merges (tmin, ymin, tmax, ymax) of the buckets, in which first 
+        precedes second in time. Either of them can be None. 
+    """
+    if first is None:
+        return second
+    if second is None:
+        return first
+    merged = np.array(first, dtype=np.float64)
+    use_second_min = second[..., 1] < first[..., 1]
+    use_second_max = second[..., 3] > first[..., 3]
+    merged[..., 0:2] = np.where(use_second_min[..., None], second[..., 0:2], first[..., 0:2])
+    merged[..., 2:4] = np.where(use_second_max[..., None], second[..., 2:4], first[..., 2:4])
+    return merged
 
 
 class Plotter(object):
@@ -10,8 +152,12 @@ class Plotter(object):
         Attributes: 
             set_scales(figure_scale, font_scale, space_scale): Sets scales 
                 about the graphs to adjust its size. 
+            set_max_points(max_points): Sets the maximum number of the points 
+                of each graph. 
             show(): Shows the graph of the log.
             save(): Saves the graph of the logs as a .pdf file.
+            show_live(refresh_interval, duration): Shows the graphs of the 
+                logs while they are being written.
     """
 
     def __init__(self, log_dir, log_name: str):
@@ -19,32 +165,12 @@ class Plotter(object):
         # Load the data of the simulation results. 
         self.__log_dir = log_dir
         self.__log_name = log_name
-        self.__t_data = np.genfromtxt(os.path.join(log_dir, log_name+'_t.log'))
-        self.__x_data = np.genfromtxt(os.path.join(log_dir, log_name+'_x.log'))
-        self.__u_data = np.genfromtxt(os.path.join(log_dir, log_name+'_u.log'))
-        self.__opterr_data = np.genfromtxt(os.path.join(log_dir, log_name+'_opterr.log'))
-        # Replace NaN with 0.
-        self.__t_data[np.isnan(self.__t_data)] = 0
-        self.__x_data[np.isnan(self.__x_data)] = 0
-        self.__u_data[np.isnan(self.__u_data)] = 0
-        self.__opterr_data[np.isnan(self.__opterr_data)] = 0
-        # Set dimensions of the state and the control input.
-        if self.__x_data.shape[0] == self.__x_data.size:
-            self.__dim_x= 1
-        else:
-            self.__dim_x = self.__x_data.shape[1]
-        if self.__u_data.shape[0] == self.__u_data.size:
-            self.__dim_u = 1
-        else:
-            self.__dim_u = self.__u_data.shape[1]
-        # Set the layout of the graphs.
-        self.__num_plots = self.__dim_x + self.__dim_u + 1
-        self.__num_plot_x = int(np.floor(
-            self.__num_plots/np.sqrt(self.__num_plots)
-        ))
-        self.__num_plot_y = int(np.ceil(
-            self.__num_plots/self.__num_plot_x
-        ))
+        # The logs are loaded when the graphs are plotted. NaN is replaced 
+        # with 0.
+        self.__log = LogReader(log_dir, log_name)
+        # Set the layout of the graphs from the dimensions of the state and 
+        # the control input.
+        self.__set_layout(self.__log.dim('x'), self.__log.dim('u'))
         # Set default figure scales. 
         self.__figure_scale = 1
         self.__font_scale = 1
@@ -68,6 +194,7 @@ class Plotter(object):
         plt.rcParams['axes.linewidth'] = 0.5
 
         self.set_scales(2, 5, 2) # default scales
+        self.set_max_points(4000)
 
     def set_scales(self, figure_scale, font_scale, space_scale):
         """ Set parameters for the scales of the graph.
@@ -81,6 +208,20 @@ class Plotter(object):
         self.__font_scale = font_scale
         self.__space_scale = space_scale
 
+    def set_max_points(self, max_points):
+        """ Set the maximum number of the points of each graph. Longer logs 
+            are downsampled by keeping the minimum and maximum of the buckets 
+            of the samples, which preserves the envelope and the spikes of 
+            the graphs while the size of the figure and the time to draw it 
+            do not grow with the length of the logs.
+
+            Args:
+                max_points: The maximum number of the points of each graph. 
+                    If None, all the samples are plotted. Default is 4000.
+        """
+        assert max_points is None or max_points >= 2
+        self.__max_points = max_points
+
     def show(self):
         """ Show the graphs of the simulation results. """
         self.__plot()
@@ -93,10 +234,86 @@ class Plotter(object):
         plt.savefig(log_file, bbox_inches="tight", pad_inches=0.1)
         print('The graph of the simlation results is generated at ' + log_file)
 
-    def __plot(self):
-        """ Plots the simulation results in figure object. """
+    def show_live(self, refresh_interval: float=1.0, duration=None):
+        """ Show the graphs of the logs while they are being written, e.g., 
+            during a long closed-loop simulation. At each refresh, only the 
+            rows appended to the logs since the last refresh are read and 
+            appended to the lines, whose min/max envelopes are bounded by 
+            set_max_points(), so that the memory and the cost of a refresh 
+            do not grow with the length of the run. An interactive 
+            matplotlib backend, e.g., %matplotlib widget in Jupyter, is 
+            required. Returns when the figure is closed, when duration has 
+            passed, or on KeyboardInterrupt.
+
+            Args:
+                refresh_interval: The interval of the refreshes in seconds. 
+                    Default is 1.0.
+                duration: The time in seconds to show the graphs. If None, 
+                    the graphs are shown until the figure is closed. 
+                    Default is None.
+        """
+        assert refresh_interval > 0
+        channels = ['t', 'x', 'u', 'opterr']
+        tails = [LogTail(self.__log_dir, self.__log_name, channel) for channel in channels]
+        # The rows that have been read but not plotted yet because the other 
+        # channels lag behind.
+        pending = [np.empty((0, 0)) for channel in channels]
+        lines = None
+        start = time.time()
+        try:
+            while duration is None or time.time() - start < duration:
+                for i, tail in enumerate(tails):
+                    rows = tail.read()
+                    if rows.size > 0:
+                        pending[i] = rows if pending[i].size == 0 else np.append(pending[i], rows, axis=0)
+                num_rows = min(rows.shape[0] for rows in pending)
+                if num_rows > 0:
+                    t, x, u, opterr = [rows[:num_rows] for rows in pending]
+                    pending = [rows[num_rows:] for rows in pending]
+                    if lines is None:
+                        self.__set_layout(x.shape[1], u.shape[1])
+                        axes = self.__setup_axes()
+                        lines = [(ax, ax.plot([], [])[0], _MinMaxEnvelope(self.__max_points)) 
+                                 for ax in axes]
+                        t0 = t[0, 0]
+                    with np.errstate(divide='ignore'):
+                        columns = [x[:, i] for i in range(x.shape[1])] \
+                                  + [u[:, i] for i in range(u.shape[1])] \
+                                  + [np.log10(opterr[:, 0])]
+                    for (ax, line, envelope), column in zip(lines, columns):
+                        envelope.append(t[:, 0], column)
+                        line.set_data(*envelope.data())
+                        ax.relim()
+                        ax.autoscale_view(scalex=False)
+                        if t[-1, 0] > t0:
+                            ax.set_xlim(t0, t[-1, 0])
+                if lines is not None:
+                    if not plt.fignum_exists(self.__figure.number):
+                        break
+                    plt.pause(refresh_interval)
+                else:
+                    time.sleep(refresh_interval)
+        except KeyboardInterrupt:
+            pass
+
+    def __set_layout(self, dim_x: int, dim_u: int):
+        """ Sets the layout of the graphs from the dimensions. """
+        self.__dim_x = dim_x
+        self.__dim_u = dim_u
+        self.__num_plots = self.__dim_x + self.__dim_u + 1
+        self.__num_plot_x = int(np.floor(
+            self.__num_plots/np.sqrt(self.__num_plots)
+        ))
+        self.__num_plot_y = int(np.ceil(
+            self.__num_plots/self.__num_plot_x
+        ))
+
+    def __setup_axes(self):
+        """ Creates the figure and the labeled axes of x, u, and the 
+            optimality error in this order. 
+        """
         # Sets the figure size.
-        plt.figure(figsize=(
+        self.__figure = plt.figure(figsize=(
             2.5*self.__num_plot_x*self.__figure_scale, 
             self.__num_plot_y*self.__figure_scale
         )) 
@@ -108,49 +325,35 @@ class Plotter(object):
             hspace=2*self.__space_scale/self.__num_plots
         ) 
         if self.__dim_x > 1:
-            for i in range(self.__dim_x):
-                plt.subplot(self.__num_plot_y, self.__num_plot_x, i+1)
-                plt.plot(self.__t_data, self.__x_data[:, i])
-                plt.xlabel(r'${\rm Time}$ $[s]$')
-                plt.ylabel(r'$x_{' + str(i+1)+ r'}$')
-                plt.xlim(self.__t_data[0], self.__t_data[-1])
+            labels = [r'$x_{' + str(i+1)+ r'}$' for i in range(self.__dim_x)]
         else:
-            plt.subplot(
-                self.__num_plot_y, 
-                self.__num_plot_x, 
-                1
-            )
-            plt.plot(self.__t_data, self.__x_data)
-            plt.xlabel(r'${\rm Time}$ $[s]$')
-            plt.ylabel(r'$x$')
-            plt.xlim(self.__t_data[0], self.__t_data[-1])
+            labels = [r'$x$']
         if self.__dim_u > 1:
-            for i in range(self.__dim_u):
-                plt.subplot(
-                    self.__num_plot_y, 
-                    self.__num_plot_x, 
-                    i+self.__dim_x+1
-                )
-                plt.plot(self.__t_data, self.__u_data[:, i])
-                plt.xlabel(r'${\rm Time}$ $[s]$')
-                plt.ylabel(r'$u_{' + str(i+1)+ r'}$')
-                plt.xlim(self.__t_data[0], self.__t_data[-1])
+            labels += [r'$u_{' + str(i+1)+ r'}$' for i in range(self.__dim_u)]
         else:
-            plt.subplot(
-                self.__num_plot_y, 
-                self.__num_plot_x, 
-                self.__dim_x+1
-            )
-            plt.plot(self.__t_data, self.__u_data)
-            plt.xlabel(r'${\rm Time}$ $[s]$')
-            plt.ylabel(r'$u$')
-            plt.xlim(self.__t_data[0], self.__t_data[-1])
-        plt.subplot(
-            self.__num_plot_y, 
-            self.__num_plot_x, 
-            self.__dim_x+self.__dim_u+1
-        )
-        plt.plot(self.__t_data, np.log10(self.__opterr_data))
-        plt.xlabel(r'${\rm Time}$ $[s]$')
-        plt.ylabel(r'$\log_{10} \| {\rm Opt \; Error} \|$')
-        plt.xlim(self.__t_data[0], self.__t_data[-1])
\ No newline at end of file
+            labels += [r'$u$']
+        labels += [r'$\log_{10} \| {\rm Opt \; Error} \|$']
+        axes = []
+        for i, label in enumerate(labels):
+            ax = plt.subplot(self.__num_plot_y, self.__num_plot_x, i+1)
+            ax.set_xlabel(r'${\rm Time}$ $[s]$')
+            ax.set_ylabel(label)
+            axes.append(ax)
+        return axes
+
+    def __plot(self):
+        """ Plots the simulation results in figure object. """
+        self.__t_data = self.__log.t
+        num_rows = self.__t_data.shape[0]
+        x_data = self.__log.x.reshape(num_rows, -1)
+        u_data = self.__log.u.reshape(num_rows, -1)
+        axes = self.__setup_axes()
+        columns = [x_data[:, i] for i in range(self.__dim_x)] \
+                  + [u_data[:, i] for i in range(self.__dim_u)]
+        for ax, column in zip(axes, columns):
+            ax.plot(*_min_max_downsample(self.__t_data, column, self.__max_points))
+            ax.set_xlim(self.__t_data[0], self.__t_data[-1])
+        # The downsampling commutes with log10, which is applied afterwards.
+        t, opterr = _min_max_downsample(self.__t_data, self.__log.opterr, self.__max_points)
+        axes[-1].plot(t, np.log10(opterr))
+        axes[-1].set_xlim(self.__t_data[0], self.__t_data[-1])
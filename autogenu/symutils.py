@@ -1,34 +1,426 @@
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import time
 import sympy
+from sympy.codegen.ast import real, float32
+from sympy.printing.c import C99CodePrinter
 
 
-def diff_scalar_func(scalar_func, var):
+BACKENDS = ('sympy', 'symengine')
+
+
+def to_backend(expr, backend: str='sympy'):
+    """ Converts a symbolic expression or a list of symbolic expressions into 
+        those of the backend.
+
+        Args:
+            expr: A symbolic expression or a list of symbolic expressions.
+            backend: The symbolic backend, 'sympy' or 'symengine'. Default is 
+                'sympy'.
+
+        Returns: 
+            The converted expression or list of expressions.
+    """
+    assert backend in BACKENDS, "backend must be 'sympy' or 'symengine'!"
+    if type(expr) in (list, tuple):
+        return [to_backend(e, backend) for e in expr]
+    if backend == 'symengine':
+        return _import_symengine().sympify(expr)
+    return sympy.sympify(expr)
+
+
+def diff_scalar_func(scalar_func, var, num_procs: int=1, backend: str='sympy'):
     """ Calculate partial derivative of a function with respect to a scalar or
         a vector. 
 
         Args:
             scalar_func: A symbolic scalar function.
             var: A symbolic scalar or a symbolic vector.
+            num_procs: The number of processes. If num_procs > 1, the partial 
+                derivatives are computed in a process pool. Default is 1. 
+                Ignored if backend is 'symengine'.
+            backend: The symbolic backend used in the differentiation, 'sympy' 
+                or 'symengine'. Default is 'sympy'. The results are sympy 
+                expressions regardless of backend.
 
         Returns: 
             Partial derivative of scalar_func with respect to var. If var is a 
             vector, Returns Jacobian.
     """
+    assert backend in BACKENDS, "backend must be 'sympy' or 'symengine'!"
+    if backend == 'symengine':
+        scalar_func = to_backend(scalar_func, backend)
+        return [to_backend(scalar_func.diff(e), 'sympy') for e in to_backend(list(var), backend)]
+    if num_procs > 1 and len(var) > 1:
+        return parallel_map(_diff, [(scalar_func, var[i]) for i in range(len(var))], 
+                            num_procs)
     return [sympy.diff(scalar_func, var[i]) for i in range(len(var))]
 
 
-def simplify(func):
+def simplify(func, num_procs: int=1, timeout=None):
     """ Simplifies a scalar-valued or vector-valued function.
 
         Args:
             func: A symbolic functions.
+            num_procs: The number of processes. If num_procs > 1, the elements 
+                of func are simplified in a process pool. Default is 1.
+            timeout: The timeout in seconds for simplification of each element 
+                used if num_procs > 1. The element whose simplification times 
+                out is left unsimplified. If None, there is no timeout.
     """
     if type(func) == list:
-        for i in range(len(func)):
-            func[i] = sympy.simplify(sympy.nsimplify(func[i]))
+        if num_procs > 1 and len(func) > 1:
+            func[:] = parallel_map(_simplify, [(e, timeout) for e in func], 
+                                   num_procs, timeout, fallbacks=list(func))
+        else:
+            for i in range(len(func)):
+                func[i] = sympy.simplify(sympy.nsimplify(func[i]))
     else:
         func = sympy.simplify(sympy.nsimplify(func))
 
-def write_symfunc(writable_file, function, output_value_name: str, common_subexpression_elimination: bool):
+
+def parallel_map(function, args_list, num_procs: int, timeout=None, fallbacks=None):
+    """ Applies function to each element of args_list in a process pool. The 
+        order of the results is the same as that of args_list.
+
+        Args:
+            function: A picklable function that takes a tuple of arguments.
+            args_list: The list of the tuples of arguments.
+            num_procs: The number of processes.
+            timeout: The timeout in seconds for each element. If None, there 
+                is no timeout.
+            fallbacks: The results used for the elements whose evaluation 
+                times out. Must be set if timeout is not None.
+
+        Returns: 
+            The list of the results.
+    """
+    if timeout is None:
+        with multiprocessing.Pool(min(num_procs, len(args_list))) as pool:
+            return pool.map(function, args_list)
+    assert fallbacks is not None and len(fallbacks) == len(args_list)
+    # The workers abort by themselves if setitimer is available. As a guard 
+    # for the other platforms, the workers report when they start each 
+    # element, and a worker is killed if its element is not finished within 
+    # 2*timeout+1 seconds from the start. The elements that are lost with the 
+    # killed worker are resubmitted, so the results do not depend on the 
+    # queueing order.
+    start_queue = multiprocessing.Queue()
+    pool = multiprocessing.Pool(min(num_procs, len(args_list)), 
+                                _init_worker, (start_queue,))
+    try:
+        pending = {i: pool.apply_async(_timed_call, ((function, i, args),)) 
+                   for i, args in enumerate(args_list)}
+        results = [None] * len(args_list)
+        running = {}
+        killed_pids = set()
+        while pending:
+            try:
+                while True:
+                    i, pid = start_queue.get(timeout=0.01)
+                    if i not in pending:
+                        continue
+                    if pid in killed_pids:
+                        pending[i] = pool.apply_async(_timed_call, ((function, i, args_list[i]),))
+                    else:
+                        running[i] = (pid, time.monotonic())
+            except queue.Empty:
+                pass
+            for i in [i for i in pending if pending[i].ready()]:
+                results[i] = pending.pop(i).get()
+                running.pop(i, None)
+            now = time.monotonic()
+            for i, (pid, start_time) in list(running.items()):
+                if now - start_time <= 2*timeout+1:
+                    continue
+                del running[i]
+                if i not in pending:
+                    continue
+                del pending[i]
+                results[i] = fallbacks[i]
+                killed_pids.add(pid)
+                os.kill(pid, signal.SIGTERM)
+                for j, (other_pid, _) in list(running.items()):
+                    if other_pid == pid:
+                        del running[j]
+                        pending[j] = pool.apply_async(_timed_call, ((function, j, args_list[j]),))
+    finally:
+        pool.terminate()
+        pool.join()
+    return results
+
+
+_start_queue = None
+
+
+def _init_worker(start_queue):
+    global _start_queue
+    _start_queue = start_queue
+
+
+def _timed_call(args):
+    function, index, function_args = args
+    _start_queue.put((index, os.getpid()))
+    return function(function_args)
+
+
+def _import_symengine():
+    try:
+        import symengine
+    except ImportError:
+        raise ImportError("The symengine backend requires symengine. Install it by 'python3 -m pip install symengine'.")
+    return symengine
+
+
+def _cse(exprs, backend: str='sympy'):
+    assert backend in BACKENDS, "backend must be 'sympy' or 'symengine'!"
+    if backend == 'symengine':
+        replacements, reduced_exprs = _import_symengine().cse(to_backend(exprs, backend))
+        replacements = [(to_backend(lhs, 'sympy'), to_backend(rhs, 'sympy')) for lhs, rhs in replacements]
+        reduced_exprs = to_backend(list(reduced_exprs), 'sympy')
+        # symengine does not avoid the names of the symbols in exprs for the 
+        # temporaries, so fall back to sympy in the case of name clashes.
+        names = set(str(e) for expr in exprs for e in sympy.sympify(expr).free_symbols)
+        if not any(str(lhs) in names for lhs, rhs in replacements):
+            return replacements, reduced_exprs
+    return sympy.cse(exprs)
+
+
+_ARRAY_ELEMENT = re.compile(r'^(\w+)\[(\d+)\]$')
+_MIN_LOOP_COUNT = 3
+_MAX_LOOP_PERIOD = 8
+
+
+def _array_element(symbol):
+    # Returns the tuple of the name of the array and the index if symbol is 
+    # an array element, e.g., x[3], and None otherwise.
+    match = _ARRAY_ELEMENT.match(symbol.name)
+    return None if match is None else (match.group(1), int(match.group(2)))
+
+
+def _padded_array_elements(exprs):
+    # Returns the dict from the array elements in exprs to the symbols whose 
+    # indices are zero-padded to the same width, e.g., x[9] to x[09]. sympy 
+    # orders the arguments by the names of the symbols, so that x[9] - x[10] 
+    # and x[1] - x[2] are otherwise written in the opposite orders. 
+    elements = {e: _array_element(e) for expr in exprs for e in sympy.sympify(expr).free_symbols 
+                if _array_element(e) is not None}
+    if len(elements) == 0:
+        return {}
+    width = max(len(str(index)) for _, index in elements.values())
+    return {e: sympy.Symbol('%s[%0*d]'%(name, width, index)) for e, (name, index) in elements.items()}
+
+
+def _canonical_form(expr):
+    # Returns the tree of expr, in which the array elements are replaced with 
+    # the names of the arrays and the arguments of Add and Mul are sorted by 
+    # their trees, and the list of the array elements in the order of the 
+    # leaves of the tree. The tree is invariant under the shifts of the 
+    # indices. 
+    if expr.is_Symbol:
+        element = _array_element(expr)
+        return (expr, []) if element is None else (element[0], [element])
+    if len(expr.args) == 0:
+        return expr, []
+    children = [_canonical_form(arg) for arg in expr.args]
+    if expr.is_Add or expr.is_Mul:
+        children.sort(key=lambda child: (str(child[0]), [index for _, index in child[1]]))
+    return (expr.func, tuple(tree for tree, _ in children)), [e for _, elements in children for e in elements]
+
+
+def _statement_shift(form, next_form):
+    # Returns the tuple of the shifts of the indices of the array elements of 
+    # the canonical form of a statement that map it to next_form, or None if 
+    # there are no such shifts. An array element that appears more than once 
+    # must be shifted in the same way.
+    tree, elements = form
+    next_tree, next_elements = next_form
+    if tree != next_tree:
+        return None
+    shifts = tuple(j - i for (_, i), (_, j) in zip(elements, next_elements))
+    element_shifts = {}
+    for element, shift in zip(elements, shifts):
+        if element_shifts.setdefault(element, shift) != shift:
+            return None
+    return shifts
+
+
+def _find_loops(forms):
+    # Finds the runs of the blocks of statements that are the same up to 
+    # constant shifts of the indices from the canonical forms of the 
+    # statements. Returns the list of the tuples of the position of the first 
+    # statement, the number of the statements in a block, the number of the 
+    # blocks, and the shifts of the statements in a block.
+    trees = [hash(tree) for tree, _ in forms]
+    loops = []
+    begin = 0
+    while begin < len(forms):
+        best = None
+        for period in range(1, _MAX_LOOP_PERIOD+1):
+            if begin+_MIN_LOOP_COUNT*period > len(forms):
+                break
+            if any(trees[begin+b] != trees[begin+period+b] for b in range(period)):
+                continue
+            shifts = [_statement_shift(forms[begin+b], forms[begin+period+b]) for b in range(period)]
+            if any(e is None for e in shifts):
+                continue
+            count = 2
+            while (begin+(count+1)*period <= len(forms) 
+                   and all(trees[begin+(count-1)*period+b] == trees[begin+count*period+b] 
+                           for b in range(period))
+                   and all(_statement_shift(forms[begin+(count-1)*period+b], 
+                                            forms[begin+count*period+b]) == shifts[b] 
+                           for b in range(period))):
+                count += 1
+            if count >= _MIN_LOOP_COUNT and (best is None or period*count > best[0]*best[1]):
+                best = (period, count, shifts)
+        if best is None:
+            begin += 1
+            continue
+        loops.append((begin, *best))
+        begin += best[0] * best[1]
+    return loops
+
+
+def _loop_index(start: int, stride: int):
+    if stride == 0:
+        return str(start)
+    index = 'idx' if stride == 1 else str(stride)+'*idx'
+    return index if start == 0 else str(start)+'+'+index
+
+
+def _write_rolled_symfuncs(writable_file, functions, output_value_names, common_subexpression_elimination: bool, 
+                           output_indices, backend: str='sympy', scalar_type: str='double', 
+                           temporary_name: str='cse'):
+    # Writes the functions in which the runs of the statements that are the 
+    # same up to constant shifts of the indices are rolled into for loops. 
+    # The common subexpressions are stored in the array temporary_name so that 
+    # they can be computed in the loops. Returns False and writes nothing if 
+    # there are no such runs.
+    outputs = [(output_value_name, i, sympy.sympify(function[i])) 
+               for function, output_value_name, indices in zip(functions, output_value_names, output_indices) 
+               for i in indices]
+    padded = _padded_array_elements([e for _, _, e in outputs])
+    exprs = [e.xreplace(padded) for _, _, e in outputs]
+    if common_subexpression_elimination:
+        replacements, reduced_exprs = _cse(exprs, backend)
+    else:
+        replacements, reduced_exprs = [], exprs
+    width = len(str(len(replacements)))
+    temporaries = {lhs: sympy.Symbol('%s[%0*d]'%(temporary_name, width, k)) 
+                   for k, (lhs, rhs) in enumerate(replacements)}
+    statements = [(temporary_name, k, sympy.sympify(rhs).xreplace(temporaries)) 
+                  for k, (lhs, rhs) in enumerate(replacements)]
+    statements.extend([(outputs[j][0], outputs[j][1], sympy.sympify(reduced_exprs[j]).xreplace(temporaries)) 
+                       for j in range(len(outputs))])
+    forms = []
+    for name, index, expr in statements:
+        tree, elements = _canonical_form(expr)
+        forms.append(((name, tree), [(name, index)]+elements))
+    loops = _find_loops(forms)
+    if len(loops) == 0:
+        return False
+    if len(replacements) > 0:
+        writable_file.write('    '+scalar_type+' '+temporary_name+'[%d];\n'%len(replacements))
+    unpadded = lambda expr: expr.xreplace({e: sympy.Symbol('%s[%d]'%_array_element(e)) 
+                                           for e in expr.free_symbols if _array_element(e) is not None})
+    position = 0
+    for begin, period, count, shifts in loops + [(len(statements), 0, 0, [])]:
+        for name, index, expr in statements[position:begin]:
+            writable_file.write('    '+name+'[%d] = '%index+_ccode(unpadded(expr), scalar_type)+';\n')
+        if count > 0:
+            writable_file.write('    for (int idx=0; idx<%d; ++idx) {\n'%count)
+            for (name, index, expr), (_, elements), element_shifts in zip(statements[begin:begin+period], 
+                                                                          forms[begin:begin+period], shifts):
+                loop_indices = {element: _loop_index(element[1], shift) 
+                                for element, shift in zip(elements, element_shifts)}
+                expr = expr.xreplace({e: sympy.Symbol(_array_element(e)[0]+'['+loop_indices[_array_element(e)]+']') 
+                                      for e in expr.free_symbols if _array_element(e) is not None})
+                writable_file.write('      '+name+'['+loop_indices[(name, index)]+'] = '+_ccode(expr, scalar_type)+';\n')
+            writable_file.write('    }\n')
+        position = begin + period * count
+    return True
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+
+def _diff(args):
+    scalar_func, var = args
+    return sympy.diff(scalar_func, var)
+
+
+def _simplify(args):
+    func, timeout = args
+    use_timer = timeout is not None and hasattr(signal, 'setitimer')
+    if use_timer:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return sympy.simplify(sympy.nsimplify(func))
+    except _Timeout:
+        return func
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class _CodePrinter(C99CodePrinter):
+    """ C code printer that expands the small integer powers of symbols into 
+        multiplications. pow() with an integer exponent other than 2 is a 
+        library call, which is much slower than the multiplications.
+    """
+    def _print_Pow(self, expr):
+        if expr.base.is_Symbol and expr.exp.is_Integer and 2 <= expr.exp <= 4:
+            return '('+'*'.join([self._print(expr.base)]*int(expr.exp))+')'
+        return super()._print_Pow(expr)
+
+
+SCALAR_TYPES = ('double', 'float')
+
+
+_code_printers = {}
+
+
+def _ccode(expr, scalar_type: str='double'):
+    # Constructing a printer is as expensive as printing a small expression, 
+    # so a single printer is reused for each scalar type.
+    if scalar_type not in _code_printers:
+        if scalar_type == 'float':
+            _code_printers[scalar_type] = _CodePrinter(settings={'type_aliases': {real: float32}})
+        else:
+            _code_printers[scalar_type] = _CodePrinter()
+    return _code_printers[scalar_type].doprint(expr)
+
+
+def sparsity_pattern(function):
+    """ Classifies the elements of input symbolic function into the structural 
+        zeros, the constants, and the others.
+
+        Args: 
+            function: A symbolic function.
+
+        Returns:
+            Tuple of the lists of the indices of the zero elements, the 
+            constant elements, and the other elements.
+    """
+    zeros = [i for i in range(len(function)) if sympy.sympify(function[i]).is_zero is True]
+    constants = [i for i in range(len(function)) 
+                 if i not in zeros and len(sympy.sympify(function[i]).free_symbols) == 0]
+    others = [i for i in range(len(function)) if i not in zeros and i not in constants]
+    return zeros, constants, others
+
+
+def write_symfunc(writable_file, function, output_value_name: str, common_subexpression_elimination: bool,
+                  output_indices=None, backend: str='sympy', scalar_type: str='double'):
     """ Write input symbolic function onto writable_file. The function's 
         return value name must be set. common_subexpression_elimination is optional.
 
@@ -39,22 +431,146 @@ def write_symfunc(writable_file, function, output_value_name: str, common_subexp
             output_value_name: The name of the output value.
             common_subexpression_elimination: If true, common subexpression elimination is used. If 
                 False, it is not used.
+            output_indices: The indices of the elements that are written. If 
+                None, all the elements are written.
+            backend: The symbolic backend used in common subexpression 
+                elimination, 'sympy' or 'symengine'. Default is 'sympy'.
+            scalar_type: The C++ type of the scalars, 'double' or 'float'. If 
+                'float', the literals and the math functions are also written 
+                in single precision, e.g., 0.5F and sinf(). Default is 'double'.
     """
+    if output_indices is None:
+        output_indices = range(len(function))
+    output_indices = list(output_indices)
     if common_subexpression_elimination:
-        func_cse = sympy.cse(function)
+        func_cse = _cse([function[i] for i in output_indices], backend)
         for i in range(len(func_cse[0])):
             cse_exp, cse_rhs = func_cse[0][i]
             writable_file.write(
-                '    const double '+sympy.ccode(cse_exp)
-                +' = '+sympy.ccode(cse_rhs)+';\n'
+                '    const '+scalar_type+' '+_ccode(cse_exp, scalar_type)
+                +' = '+_ccode(cse_rhs, scalar_type)+';\n'
             )
         for i in range(len(func_cse[1])):
             writable_file.write(
-                '    '+output_value_name+'[%d] = '%i
-                +sympy.ccode(func_cse[1][i])+';\n'
+                '    '+output_value_name+'[%d] = '%output_indices[i]
+                +_ccode(func_cse[1][i], scalar_type)+';\n'
             )
     else:
         writable_file.writelines(
             ['    '+output_value_name+'[%d] = '%i
-            +sympy.ccode(function[i])+';\n' for i in range(len(function))]
-        )
\ No newline at end of file
+            +_ccode(function[i], scalar_type)+';\n' for i in output_indices]
+        )
+
+
+def write_symfuncs(writable_file, functions, output_value_names, common_subexpression_elimination: bool,
+                   output_indices=None, backend: str='sympy', loop_rolling: bool=False, 
+                   scalar_type: str='double'):
+    """ Write input symbolic functions onto writable_file as a single fused 
+        kernel. If common_subexpression_elimination is True, the common 
+        subexpressions are eliminated over all the functions jointly.
+
+        Args: 
+            writable_file: A writable file, i.e., a file streaming that is 
+                already opened as writing mode.
+            functions: A list of symbolic functions wrote onto the writable_file.
+            output_value_names: The names of the output values of functions.
+            common_subexpression_elimination: If true, common subexpression elimination is used. If 
+                False, it is not used.
+            output_indices: A list of the indices of the elements of each 
+                function that are written. If None, all the elements are written.
+            backend: The symbolic backend used in common subexpression 
+                elimination, 'sympy' or 'symengine'. Default is 'sympy'.
+            loop_rolling: If true, the runs of the statements that are the 
+                same up to constant shifts of the indices of the arrays, e.g., 
+                x[i] and q[i], are written as for loops. The operands of the 
+                sums and products are compared regardless of their order. 
+                Default is False.
+            scalar_type: The C++ type of the scalars, 'double' or 'float'. If 
+                'float', the literals and the math functions are also written 
+                in single precision, e.g., 0.5F and sinf(). Default is 'double'.
+    """
+    assert len(functions) == len(output_value_names)
+    if output_indices is None:
+        output_indices = [None for function in functions]
+    assert len(functions) == len(output_indices)
+    output_indices = [list(range(len(function))) if indices is None else list(indices) 
+                      for function, indices in zip(functions, output_indices)]
+    if loop_rolling and _write_rolled_symfuncs(writable_file, functions, output_value_names, 
+                                               common_subexpression_elimination, output_indices, backend, 
+                                               scalar_type):
+        return
+    if not common_subexpression_elimination:
+        for function, output_value_name, indices in zip(functions, output_value_names, output_indices):
+            write_symfunc(writable_file, function, output_value_name, False, indices, 
+                          scalar_type=scalar_type)
+        return
+    func_cse = _cse([function[i] for function, indices in zip(functions, output_indices) for i in indices], backend)
+    for i in range(len(func_cse[0])):
+        cse_exp, cse_rhs = func_cse[0][i]
+        writable_file.write(
+            '    const '+scalar_type+' '+_ccode(cse_exp, scalar_type)
+            +' = '+_ccode(cse_rhs, scalar_type)+';\n'
+        )
+    offset = 0
+    for output_value_name, indices in zip(output_value_names, output_indices):
+        for i in range(len(indices)):
+            writable_file.write(
+                '    '+output_value_name+'[%d] = '%indices[i]
+                +_ccode(func_cse[1][offset+i], scalar_type)+';\n'
+            )
+        offset += len(indices)
+
+
+def split_symfuncs(functions, output_value_names, common_subexpression_elimination: bool, 
+                   max_statements: int, output_indices=None, backend: str='sympy', 
+                   temporary_name: str='cse', scalar_type: str='double'):
+    """ Splits the code of input symbolic functions into several bodies of 
+        kernels that are executed in order, each of which has at most 
+        max_statements statements. If common_subexpression_elimination is 
+        True, the common subexpressions are eliminated over all the functions 
+        jointly and are stored in the array temporary_name, which is shared by 
+        the bodies, so that no subexpression is computed twice.
+
+        Args: 
+            functions: A list of symbolic functions.
+            output_value_names: The names of the output values of functions.
+            common_subexpression_elimination: If true, common subexpression elimination is used. If 
+                False, it is not used.
+            max_statements: The maximum number of the statements in a body.
+            output_indices: A list of the indices of the elements of each 
+                function that are written. If None, all the elements are written.
+            backend: The symbolic backend used in common subexpression 
+                elimination, 'sympy' or 'symengine'. Default is 'sympy'.
+            temporary_name: The name of the array of the common subexpressions.
+            scalar_type: The C++ type of the scalars, 'double' or 'float'. If 
+                'float', the literals and the math functions are also written 
+                in single precision, e.g., 0.5F and sinf(). Default is 'double'.
+
+        Returns:
+            Tuple of the list of the bodies and the size of the array of the 
+            common subexpressions.
+    """
+    assert len(functions) == len(output_value_names)
+    assert max_statements > 0
+    if output_indices is None:
+        output_indices = [None for function in functions]
+    assert len(functions) == len(output_indices)
+    outputs = [(output_value_name, i, function[i]) 
+               for function, output_value_name, indices in zip(functions, output_value_names, output_indices) 
+               for i in (range(len(function)) if indices is None else indices)]
+    if common_subexpression_elimination:
+        replacements, reduced_exprs = _cse([e for _, _, e in outputs], backend)
+    else:
+        replacements, reduced_exprs = [], [e for _, _, e in outputs]
+    # The temporaries are renamed in the printed code rather than substituted 
+    # in the expressions, which would reorder the operands and change the 
+    # rounding from the code written by write_symfuncs().
+    temporaries = {_ccode(lhs, scalar_type): temporary_name+'[%d]'%k for k, (lhs, rhs) in enumerate(replacements)}
+    def rename(code):
+        return re.sub(r'\b\w+\b', lambda m: temporaries.get(m.group(0), m.group(0)), code)
+    statements = ['    '+temporary_name+'[%d] = '%k+rename(_ccode(rhs, scalar_type))+';\n' 
+                  for k, (lhs, rhs) in enumerate(replacements)]
+    statements.extend(['    '+outputs[j][0]+'[%d] = '%outputs[j][1]+rename(_ccode(reduced_exprs[j], scalar_type))+';\n' 
+                       for j in range(len(outputs))])
+    bodies = [''.join(statements[i:i+max_statements]) for i in range(0, len(statements), max_statements)]
+    return bodies, len(replacements)
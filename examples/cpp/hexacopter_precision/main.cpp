@@ -0,0 +1,91 @@
+#if defined(CGMRES_USE_FLOAT) || defined(CGMRES_MIXED_PRECISION)
+  #include "ocp_float.hpp"
+#else
+  #include "ocp_double.hpp"
+#endif
+
+#include "cgmres/zero_horizon_ocp_solver.hpp"
+#include "cgmres/multiple_shooting_cgmres_solver.hpp"
+
+#include <algorithm>
+#include <string>
+
+int main() {
+#if defined(CGMRES_MIXED_PRECISION)
+  const std::string precision = "mixed";
+#elif defined(CGMRES_USE_FLOAT)
+  const std::string precision = "float";
+#else
+  const std::string precision = "double";
+#endif
+
+  // Define the optimal control problem.
+  cgmres::OCP_hexacopter ocp;
+
+  // Define the horizon.
+  const double Tf = 1.0;
+  const double alpha = 1.0;
+  cgmres::Horizon horizon(Tf, alpha); // time-varying length
+
+  // Define the solver settings. The default finite_difference_epsilon depends on the precision.
+  cgmres::SolverSettings settings;
+  settings.sampling_time = 0.001;
+  settings.zeta = 1000;
+  // For initialization.
+  settings.max_iter = 0;
+  settings.opterr_tol = 1e-06;
+
+  // Define the initial time and initial state.
+  const double t0 = 0;
+  cgmres::Vector<12> x0;
+  x0 << 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0;
+
+  // Initialize the solution of the C/GMRES method.
+  constexpr int kmax_init = 6;
+  cgmres::ZeroHorizonOCPSolver<cgmres::OCP_hexacopter, kmax_init> initializer(ocp, settings);
+  cgmres::Vector<6> uc0;
+  uc0 << 2.353596, 2.353596, 2.353596, 2.353596, 2.353596, 2.353596;
+  initializer.set_uc(uc0);
+  initializer.solve(t0, x0);
+
+  // Define the C/GMRES solver.
+  constexpr int N = 50;
+  constexpr int kmax = 6;
+  cgmres::MultipleShootingCGMRESSolver<cgmres::OCP_hexacopter, N, kmax> mpc(ocp, horizon, settings);
+  mpc.set_uc(initializer.ucopt());
+  mpc.init_x_lmd(t0, x0);
+  mpc.init_dummy_mu();
+
+  // Perform a numerical simulation and record the optimality error of each update.
+  const double tsim = 10.0;
+  const double sampling_time = settings.sampling_time;
+  const int sim_steps = std::floor(tsim / sampling_time);
+
+  double t = t0;
+  cgmres::VectorX x = x0;
+  cgmres::VectorX dx = cgmres::VectorX::Zero(x0.size());
+  double opterr_sum = 0.0;
+  double opterr_max = 0.0;
+  for (int i=0; i<sim_steps; ++i) {
+    const auto& u = mpc.uopt()[0]; // const reference to the initial optimal control input
+    dx.setZero();
+    ocp.eval_f(t, x, u, dx); // eval the state equation
+    const cgmres::VectorX x1 = x + sampling_time * dx;
+    mpc.update(t, x);
+    const double opterr = mpc.optError();
+    opterr_sum += opterr;
+    opterr_max = std::max(opterr_max, opterr);
+    x = x1;
+    t = t + sampling_time;
+  }
+
+  const auto profile = mpc.getProfile();
+  std::cout << "precision: " << precision << std::endl;
+  std::cout << "  average time per update [ms]: " << profile.average_time_ms << std::endl;
+  std::cout << "  max time per update [ms]:     " << profile.max_time_ms << std::endl;
+  std::cout << "  average opt error:            " << opterr_sum / sim_steps << std::endl;
+  std::cout << "  max opt error:                " << opterr_max << std::endl;
+  std::cout << "  final state:                  " << x.transpose() << std::endl;
+
+  return 0;
+}
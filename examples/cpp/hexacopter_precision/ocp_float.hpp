@@ -0,0 +1,384 @@
+// This file was automatically generated by autogenu-jupyter (https://github.com/ohtsukalab/autogenu-jupyter). 
+// The autogenu-jupyter copyright holders make no ownership claim of its contents. 
+
+#ifndef CGMRES__OCP_HEXACOPTER_HPP_ 
+#define CGMRES__OCP_HEXACOPTER_HPP_ 
+ 
+#define _USE_MATH_DEFINES
+
+#include <cmath>
+#include <array>
+#include <iostream>
+#include <type_traits>
+
+#include "cgmres/types.hpp"
+#include "cgmres/detail/macros.hpp"
+
+namespace cgmres {
+
+static_assert(std::is_same<Scalar, float>::value, 
+              "This OCP is generated in single precision. Define CGMRES_USE_FLOAT or CGMRES_MIXED_PRECISION.");
+
+/// 
+/// @class OCP_hexacopter
+/// @brief Definition of the optimal control problem (OCP) of hexacopter.
+/// 
+class OCP_hexacopter { 
+public:
+  ///
+  /// @brief Dimension of the state. 
+  ///
+  static constexpr int nx = 12;
+ 
+  ///
+  /// @brief Dimension of the control input. 
+  ///
+  static constexpr int nu = 6;
+ 
+  ///
+  /// @brief Dimension of the equality constraints. 
+  ///
+  static constexpr int nc = 0;
+ 
+  ///
+  /// @brief Dimension of the Fischer-Burmeister function (already counded in nc). 
+  ///
+  static constexpr int nh = 0;
+ 
+  ///
+  /// @brief Dimension of the concatenation of the control input and equality constraints. 
+  ///
+  static constexpr int nuc = nu + nc;
+
+  ///
+  /// @brief Dimension of the bound constraints on the control input. 
+  ///
+  static constexpr int nub = 6;
+
+  float m = 1.44;
+  float l = 0.23;
+  float k = 1.6e-09;
+  float Ixx = 0.0348;
+  float Iyy = 0.0459;
+  float Izz = 0.0977;
+  float gamma = 0.01;
+  float g = 9.80665;
+  float z_ref = 5;
+
+  std::array<float, 12> q = {1, 1, 1, 0.01, 0.01, 0, 0.01, 0.01, 0.01, 0.1, 0.1, 0.001};
+  std::array<float, 12> q_terminal = {1, 1, 1, 0.01, 0.01, 0, 0.01, 0.01, 0.01, 0.1, 0.1, 0.001};
+  std::array<float, 6> r = {0.01, 0.01, 0.01, 0.01, 0.01, 0.01};
+
+  static constexpr std::array<int, nub> ubound_indices = {0, 1, 2, 3, 4, 5};
+  std::array<float, nub> umin = {0.144, 0.144, 0.144, 0.144, 0.144, 0.144};
+  std::array<float, nub> umax = {6.0, 6.0, 6.0, 6.0, 6.0, 6.0};
+  std::array<float, nub> dummy_weight = {0.1, 0.1, 0.1, 0.1, 0.1, 0.1};
+
+  void disp(std::ostream& os) const {
+    os << "OCP_hexacopter:" << std::endl;
+    os << "  nx:  " << nx << std::endl;
+    os << "  nu:  " << nu << std::endl;
+    os << "  nc:  " << nc << std::endl;
+    os << "  nh:  " << nh << std::endl;
+    os << "  nuc: " << nuc << std::endl;
+    os << "  nub: " << nub << std::endl;
+    os << std::endl;
+    os << "  m: " << m << std::endl;
+    os << "  l: " << l << std::endl;
+    os << "  k: " << k << std::endl;
+    os << "  Ixx: " << Ixx << std::endl;
+    os << "  Iyy: " << Iyy << std::endl;
+    os << "  Izz: " << Izz << std::endl;
+    os << "  gamma: " << gamma << std::endl;
+    os << "  g: " << g << std::endl;
+    os << "  z_ref: " << z_ref << std::endl;
+    os << std::endl;
+    Eigen::IOFormat fmt(4, 0, ", ", "", "[", "]");
+    Eigen::IOFormat intfmt(1, 0, ", ", "", "[", "]");
+    os << "  q: " << Map<const VectorX>(q.data(), q.size()).transpose().format(fmt) << std::endl;
+    os << "  q_terminal: " << Map<const VectorX>(q_terminal.data(), q_terminal.size()).transpose().format(fmt) << std::endl;
+    os << "  r: " << Map<const VectorX>(r.data(), r.size()).transpose().format(fmt) << std::endl;
+    os << std::endl;
+    os << "  ubound_indices: " << Map<const VectorXi>(ubound_indices.data(), ubound_indices.size()).transpose().format(intfmt) << std::endl;
+    os << "  umin: " << Map<const VectorX>(umin.data(), umin.size()).transpose().format(fmt) << std::endl;
+    os << "  umax: " << Map<const VectorX>(umax.data(), umax.size()).transpose().format(fmt) << std::endl;
+    os << "  dummy_weight: " << Map<const VectorX>(dummy_weight.data(), dummy_weight.size()).transpose().format(fmt) << std::endl;
+  }
+
+  friend std::ostream& operator<<(std::ostream& os, const OCP_hexacopter& ocp) { 
+    ocp.disp(os);
+    return os;
+  }
+
+
+  ///
+  /// @brief Synchrozies the internal parameters of this OCP with the external references.
+  /// This method is called at the beginning of each MPC update.
+  ///
+  void synchronize() {
+  }
+
+  ///
+  /// @brief Computes the state equation dx = f(t, x, u).
+  /// @param[in] t Time.
+  /// @param[in] x State.
+  /// @param[in] u Control input.
+  /// @param[out] dx Evaluated value of the state equation.
+  /// @remark This method is intended to be used inside of the cgmres solvers and does not check size of each argument. 
+  /// Use the overloaded method if you call this outside of the cgmres solvers. 
+  ///
+  void eval_f(const float t, const float* x, const float* u, 
+              float* dx) const {
+    const float x0 = sinf(x[3]);
+    const float x1 = sinf(x[5]);
+    const float x2 = cosf(x[5]);
+    const float x3 = cosf(x[3]);
+    const float x4 = sinf(x[4]);
+    const float x5 = 1.0F/m;
+    const float x6 = u[0] + u[2] + u[4];
+    const float x7 = u[1] + u[3] + u[5] + x6;
+    const float x8 = x5*x7;
+    const float x9 = 1.0F/Ixx;
+    const float x10 = -Izz;
+    const float x11 = (1.0F/2.0F)*u[0];
+    const float x12 = 1.0F/Iyy;
+    const float x13 = sqrtf(3);
+    const float x14 = 1.0F/Izz;
+    dx[0] = x[6];
+    dx[1] = x[7];
+    dx[2] = x[8];
+    dx[3] = x[9];
+    dx[4] = x[10];
+    dx[5] = x[11];
+    dx[6] = x8*(x0*x1 + x2*x3*x4);
+    dx[7] = x8*(-x0*x2 + x1*x3*x4);
+    dx[8] = -g + x3*x5*x7*cosf(x[4]);
+    dx[9] = l*x9*(-u[1] - 1.0F/2.0F*u[2] + (1.0F/2.0F)*u[3] + u[4] + (1.0F/2.0F)*u[5] - x11) + x9*x[10]*x[11]*(Iyy + x10);
+    dx[10] = l*x12*((1.0F/2.0F)*u[2]*x13 + (1.0F/2.0F)*u[3]*x13 - 1.0F/2.0F*u[5]*x13 - x11*x13) + x12*x[11]*x[9]*(-Ixx - x10);
+    dx[11] = x14*x[10]*x[9]*(Ixx - Iyy) + x14*(-gamma*x[11] + k*(u[1] + u[3] + u[5] - x6));
+ 
+  }
+
+  ///
+  /// @brief Computes the partial derivative of terminal cost with respect to state, 
+  /// i.e., phix = dphi/dx(t, x).
+  /// @param[in] t Time.
+  /// @param[in] x State.
+  /// @param[out] phix Evaluated value of the partial derivative of terminal cost.
+  /// @remark This method is intended to be used inside of the cgmres solvers and does not check size of each argument. 
+  /// Use the overloaded method if you call this outside of the cgmres solvers. 
+  ///
+  void eval_phix(const float t, const float* x, float* phix) const {
+    const float x0 = 2*t;
+    const float x1 = sinf(x0);
+    const float x2 = cosf(x0);
+    phix[0] = (1.0F/2.0F)*q_terminal[0]*(-2*x1 + 2*x[0]);
+    phix[1] = (1.0F/2.0F)*q_terminal[1]*(2*x2 + 2*x[1] - 2);
+    phix[2] = (1.0F/2.0F)*q_terminal[2]*(2*x[2] - 2*z_ref - 4*sinf(t));
+    phix[3] = q_terminal[3]*x[3];
+    phix[4] = q_terminal[4]*x[4];
+    phix[5] = q_terminal[5]*x[5];
+    phix[6] = (1.0F/2.0F)*q_terminal[6]*(-4*x2 + 2*x[6]);
+    phix[7] = (1.0F/2.0F)*q_terminal[7]*(-4*x1 + 2*x[7]);
+    phix[8] = (1.0F/2.0F)*q_terminal[8]*(2*x[8] - 4*cosf(t));
+    phix[9] = q_terminal[9]*x[9];
+    phix[10] = q_terminal[10]*x[10];
+    phix[11] = q_terminal[11]*x[11];
+ 
+  }
+
+  ///
+  /// @brief Computes the partial derivative of the Hamiltonian with respect to state, 
+  /// i.e., hx = dH/dx(t, x, u, lmd).
+  /// @param[in] t Time.
+  /// @param[in] x State.
+  /// @param[in] u Concatenatin of the control input and Lagrange multiplier with respect to the equality constraints. 
+  /// @param[in] lmd Costate. 
+  /// @param[out] hx Evaluated value of the partial derivative of the Hamiltonian.
+  /// @remark This method is intended to be used inside of the cgmres solvers and does not check size of each argument. 
+  /// Use the overloaded method if you call this outside of the cgmres solvers. 
+  ///
+  void eval_hx(const float t, const float* x, const float* u, 
+               const float* lmd, float* hx) const {
+    const float x0 = 2*t;
+    const float x1 = sinf(x0);
+    const float x2 = cosf(x0);
+    const float x3 = sinf(x[3]);
+    const float x4 = cosf(x[4]);
+    const float x5 = (u[0] + u[1] + u[2] + u[3] + u[4] + u[5])/m;
+    const float x6 = lmd[8]*x5;
+    const float x7 = sinf(x[5]);
+    const float x8 = cosf(x[3]);
+    const float x9 = sinf(x[4]);
+    const float x10 = cosf(x[5]);
+    const float x11 = x10*x3;
+    const float x12 = lmd[6]*x5;
+    const float x13 = x10*x8;
+    const float x14 = x3*x7;
+    const float x15 = lmd[7]*x5;
+    const float x16 = x7*x8;
+    const float x17 = -Izz;
+    const float x18 = lmd[10]*(-Ixx - x17)/Iyy;
+    const float x19 = lmd[11]/Izz;
+    const float x20 = x19*(Ixx - Iyy);
+    const float x21 = lmd[9]*(Iyy + x17)/Ixx;
+    hx[0] = (1.0F/2.0F)*q[0]*(-2*x1 + 2*x[0]);
+    hx[1] = (1.0F/2.0F)*q[1]*(2*x2 + 2*x[1] - 2);
+    hx[2] = (1.0F/2.0F)*q[2]*(2*x[2] - 2*z_ref - 4*sinf(t));
+    hx[3] = q[3]*x[3] + x12*(-x11*x9 + x7*x8) + x15*(-x13 - x14*x9) - x3*x4*x6;
+    hx[4] = q[4]*x[4] + x12*x13*x4 + x15*x16*x4 - x6*x8*x9;
+    hx[5] = q[5]*x[5] + x12*(x11 - x16*x9) + x15*(x13*x9 + x14);
+    hx[6] = lmd[0] + (1.0F/2.0F)*q[6]*(-4*x2 + 2*x[6]);
+    hx[7] = lmd[1] + (1.0F/2.0F)*q[7]*(-4*x1 + 2*x[7]);
+    hx[8] = lmd[2] + (1.0F/2.0F)*q[8]*(2*x[8] - 4*cosf(t));
+    hx[9] = lmd[3] + q[9]*x[9] + x18*x[11] + x20*x[10];
+    hx[10] = lmd[4] + q[10]*x[10] + x20*x[9] + x21*x[11];
+    hx[11] = -gamma*x19 + lmd[5] + q[11]*x[11] + x18*x[9] + x21*x[10];
+ 
+  }
+
+  ///
+  /// @brief Computes the partial derivative of the Hamiltonian with respect to control input and the equality constraints, 
+  /// i.e., hu = dH/du(t, x, u, lmd).
+  /// @param[in] t Time.
+  /// @param[in] x State.
+  /// @param[in] u Concatenatin of the control input and Lagrange multiplier with respect to the equality constraints. 
+  /// @param[in] lmd Costate. 
+  /// @param[out] hu Evaluated value of the partial derivative of the Hamiltonian.
+  /// @remark This method is intended to be used inside of the cgmres solvers and does not check size of each argument. 
+  /// Use the overloaded method if you call this outside of the cgmres solvers. 
+  ///
+  void eval_hu(const float t, const float* x, const float* u, 
+               const float* lmd, float* hu) const {
+    const float x0 = (1.0F/3.0F)*g*m;
+    const float x1 = (1.0F/2.0F)*sqrtf(3)*l*lmd[10]/Iyy;
+    const float x2 = -x1;
+    const float x3 = l*lmd[9]/Ixx;
+    const float x4 = (1.0F/2.0F)*x3;
+    const float x5 = k*lmd[11]/Izz;
+    const float x6 = 1.0F/m;
+    const float x7 = sinf(x[3]);
+    const float x8 = sinf(x[5]);
+    const float x9 = cosf(x[5]);
+    const float x10 = cosf(x[3]);
+    const float x11 = sinf(x[4]);
+    const float x12 = lmd[6]*x6*(x10*x11*x9 + x7*x8) + lmd[7]*x6*(x10*x11*x8 - x7*x9) + lmd[8]*x10*x6*cosf(x[4]);
+    const float x13 = x12 - x5;
+    const float x14 = x13 - x4;
+    const float x15 = x12 + x5;
+    const float x16 = x15 + x4;
+    hu[0] = (1.0F/2.0F)*r[0]*(2*u[0] - x0) + x14 + x2;
+    hu[1] = (1.0F/2.0F)*r[1]*(2*u[1] - x0) + x15 - x3;
+    hu[2] = (1.0F/2.0F)*r[2]*(2*u[2] - x0) + x1 + x14;
+    hu[3] = (1.0F/2.0F)*r[3]*(2*u[3] - x0) + x1 + x16;
+    hu[4] = (1.0F/2.0F)*r[4]*(2*u[4] - x0) + x13 + x3;
+    hu[5] = (1.0F/2.0F)*r[5]*(2*u[5] - x0) + x16 + x2;
+ 
+  }
+
+
+  ///
+  /// @brief Computes the state equation dx = f(t, x, u).
+  /// @param[in] t Time.
+  /// @param[in] x State. Size must be nx.
+  /// @param[in] u Control input. Size must be nu.
+  /// @param[out] dx Evaluated value of the state equation. Size must be nx.
+  ///
+  template <typename VectorType1, typename VectorType2, typename VectorType3>
+  void eval_f(const float t, const MatrixBase<VectorType1>& x, 
+              const MatrixBase<VectorType2>& u, 
+              const MatrixBase<VectorType3>& dx) const {
+    if (x.size() != nx) {
+      throw std::invalid_argument("[OCP]: x.size() must be " + std::to_string(nx));
+    }
+    if (u.size() != nu) {
+      throw std::invalid_argument("[OCP]: u.size() must be " + std::to_string(nu));
+    }
+    if (dx.size() != nx) {
+      throw std::invalid_argument("[OCP]: dx.size() must be " + std::to_string(nx));
+    }
+    eval_f(t, x.derived().data(), u.derived().data(), CGMRES_EIGEN_CONST_CAST(VectorType3, dx).data());
+  }
+
+  ///
+  /// @brief Computes the partial derivative of terminal cost with respect to state, 
+  /// i.e., phix = dphi/dx(t, x).
+  /// @param[in] t Time.
+  /// @param[in] x State. Size must be nx.
+  /// @param[out] phix Evaluated value of the partial derivative of terminal cost. Size must be nx.
+  ///
+  template <typename VectorType1, typename VectorType2>
+  void eval_phix(const float t, const MatrixBase<VectorType1>& x, 
+                 const MatrixBase<VectorType2>& phix) const {
+    if (x.size() != nx) {
+      throw std::invalid_argument("[OCP]: x.size() must be " + std::to_string(nx));
+    }
+    if (phix.size() != nx) {
+      throw std::invalid_argument("[OCP]: phix.size() must be " + std::to_string(nx));
+    }
+    eval_phix(t, x.derived().data(), CGMRES_EIGEN_CONST_CAST(VectorType2, phix).data());
+  }
+
+  ///
+  /// @brief Computes the partial derivative of the Hamiltonian with respect to the state, 
+  /// i.e., hx = dH/dx(t, x, u, lmd).
+  /// @param[in] t Time.
+  /// @param[in] x State. Size must be nx.
+  /// @param[in] uc Concatenatin of the control input and Lagrange multiplier with respect to the equality constraints. Size must be nuc. 
+  /// @param[in] lmd Costate.  Size must be nx.
+  /// @param[out] hx Evaluated value of the partial derivative of the Hamiltonian. Size must be nx.
+  ///
+  template <typename VectorType1, typename VectorType2, typename VectorType3, typename VectorType4>
+  void eval_hx(const float t, const MatrixBase<VectorType1>& x, 
+               const MatrixBase<VectorType2>& uc, 
+               const MatrixBase<VectorType3>& lmd, 
+               const MatrixBase<VectorType4>& hx) const {
+    if (x.size() != nx) {
+      throw std::invalid_argument("[OCP]: x.size() must be " + std::to_string(nx));
+    }
+    if (uc.size() != nuc) {
+      throw std::invalid_argument("[OCP]: uc.size() must be " + std::to_string(nuc));
+    }
+    if (lmd.size() != nx) {
+      throw std::invalid_argument("[OCP]: lmd.size() must be " + std::to_string(nx));
+    }
+    if (hx.size() != nx) {
+      throw std::invalid_argument("[OCP]: hx.size() must be " + std::to_string(nx));
+    }
+    eval_hx(t, x.derived().data(), uc.derived().data(), lmd.derived().data(), CGMRES_EIGEN_CONST_CAST(VectorType4, hx).data());
+  }
+
+  ///
+  /// @brief Computes the partial derivative of the Hamiltonian with respect to control input and the equality constraints, 
+  /// i.e., hu = dH/du(t, x, u, lmd).
+  /// @param[in] t Time.
+  /// @param[in] x State. Size must be nx.
+  /// @param[in] uc Concatenatin of the control input and Lagrange multiplier with respect to the equality constraints. Size must be nuc. 
+  /// @param[in] lmd Costate. Size must be nx. 
+  /// @param[out] hu Evaluated value of the partial derivative of the Hamiltonian. Size must be nuc.
+  ///
+  template <typename VectorType1, typename VectorType2, typename VectorType3, typename VectorType4>
+  void eval_hu(const float t, const MatrixBase<VectorType1>& x, 
+               const MatrixBase<VectorType2>& uc, 
+               const MatrixBase<VectorType3>& lmd, 
+               const MatrixBase<VectorType4>& hu) const {
+    if (x.size() != nx) {
+      throw std::invalid_argument("[OCP]: x.size() must be " + std::to_string(nx));
+    }
+    if (uc.size() != nuc) {
+      throw std::invalid_argument("[OCP]: uc.size() must be " + std::to_string(nuc));
+    }
+    if (lmd.size() != nx) {
+      throw std::invalid_argument("[OCP]: lmd.size() must be " + std::to_string(nx));
+    }
+    if (hu.size() != nuc) {
+      throw std::invalid_argument("[OCP]: hu.size() must be " + std::to_string(nuc));
+    }
+    eval_hu(t, x.derived().data(), uc.derived().data(), lmd.derived().data(), CGMRES_EIGEN_CONST_CAST(VectorType4, hu).data());
+  }
+
+};
+
+} // namespace cgmres
+
+#endif // CGMRES_OCP_HPP_
@@ -45,7 +45,7 @@ sampling_time = settings.sampling_time
 t = t0
 x = x0.copy()
 for _ in range(int(tsim/sampling_time)):
-    u = mpc.uopt[0]
+    u = mpc.u0()
     x1 = forward_euler(ocp, t, sampling_time, x, u) 
     mpc.update(t, x)
 
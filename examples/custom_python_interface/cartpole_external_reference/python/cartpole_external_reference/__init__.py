@@ -6,3 +6,26 @@ from .ocp import *
 from .zero_horizon_ocp_solver import *
 from .single_shooting_cgmres_solver import *
 from .multiple_shooting_cgmres_solver import *
+from . import single_shooting_cgmres_solver as _single_shooting
+from . import multiple_shooting_cgmres_solver as _multiple_shooting
+
+
+def simulate(mpc, ocp, t0, x0, tsim, integrator='rk4'):
+    ''' Runs the closed-loop simulation in C++ without the GIL. 
+
+        Args:
+            mpc: The initialized SingleShootingCGMRESSolver or 
+                MultipleShootingCGMRESSolver.
+            ocp: The OCP whose dynamics is simulated.
+            t0: The initial time.
+            x0: The initial state.
+            tsim: The length of the simulation.
+            integrator: 'rk4' or 'forward_euler'.
+
+        Returns:
+            The dict of the arrays 't', 'x', 'u', 'opterr', and 'solve_time_ms'
+            whose i-th rows are the i-th sampling step.
+    '''
+    if isinstance(mpc, SingleShootingCGMRESSolver):
+        return _single_shooting.simulate(mpc, ocp, t0, x0, tsim, integrator)
+    return _multiple_shooting.simulate(mpc, ocp, t0, x0, tsim, integrator)
@@ -36,7 +36,7 @@ sampling_time = settings.sampling_time
 t = t0
 x = x0.copy()
 for _ in range(int(tsim/sampling_time)):
-    u = mpc.uopt[0]
+    u = mpc.u0()
     dx = ocp.eval_f(t, x, u)
     x1 = x + sampling_time * dx
     mpc.update(t, x)
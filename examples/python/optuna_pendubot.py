@@ -39,29 +39,14 @@ def run_simulation(params, verbose=False):
     mpc.init_x_lmd(t0, x0)
     mpc.init_dummy_mu()
 
-    # run simulation
-    t = t0
-    x = x0.copy()
-    sampling_time = SAMPLING_TIME
-    sim_steps = int(SIMULATION_TIME/SAMPLING_TIME)
-    xs = []
-    us = []
-    opt_error = []
-    for _ in range(sim_steps):
-        u = mpc.uopt[0]
-        xs.append(x)
-        us.append(u)
-        opt_error.append(mpc.opt_error())
-        dx = ocp.eval_f(t, x, u)
-        x1 = x + sampling_time * dx
-        mpc.update(t, x)
-        x = x1
-        t = t + sampling_time
-        if verbose:
-            print('t: ', t, ', x: ', x)
+    # run simulation in C++
+    logs = cgmres.pendubot.simulate(mpc, ocp, t0, x0, SIMULATION_TIME, 
+                                    integrator='forward_euler')
     if verbose:
+        for t, x in zip(logs['t'], logs['x']):
+            print('t: ', t, ', x: ', x)
         print(mpc)
-    return xs, us, opt_error
+    return logs['x'], logs['u'], logs['opterr']
 
 
 def eval_simulation(xs, us, opt_error):
@@ -0,0 +1,234 @@
+#ifndef CGMRES__BATCH_SOLVER_HPP_
+#define CGMRES__BATCH_SOLVER_HPP_
+
+#include <functional>
+#include <memory>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+#include "cgmres/types.hpp"
+#include "cgmres/detail/thread_pool.hpp"
+
+namespace cgmres {
+
+///
+/// @class BatchSolver
+/// @brief Batch of independent copies of a C/GMRES solver, e.g., for
+/// Monte-Carlo simulations or fleets of the same system. The solvers of the
+/// batch are updated in parallel on a persistent thread pool.
+/// @tparam Solver The solver, i.e., SingleShootingCGMRESSolver or
+/// MultipleShootingCGMRESSolver.
+///
+template <class Solver>
+class BatchSolver {
+public:
+  ///
+  /// @brief Dimension of the state.
+  ///
+  static constexpr int nx = Solver::nx;
+
+  ///
+  /// @brief Dimension of the control input.
+  ///
+  static constexpr int nu = Solver::nu;
+
+  ///
+  /// @brief Constructs the batch solver.
+  /// @param[in] solver The solver copied to each instance of the batch.
+  /// Should be initialized, e.g., by init_x_lmd() and init_dummy_mu().
+  /// @param[in] batch_size Number of the instances. Must be positive.
+  /// @param[in] num_threads Number of the threads including the calling
+  /// thread. If non-positive, the number of the hardware threads is used.
+  /// Default is 0.
+  ///
+  BatchSolver(const Solver& solver, const int batch_size,
+              const int num_threads=0)
+    : solvers_(),
+      thread_pool_(),
+      uopt_(),
+      opt_error_() {
+    if (batch_size <= 0) {
+      throw std::invalid_argument("[BatchSolver]: 'batch_size' must be positive!");
+    }
+    solvers_.assign(batch_size, solver);
+    thread_pool_ = std::make_unique<detail::ThreadPool>(num_threads);
+    uopt_.setZero(batch_size, nu);
+    opt_error_.setZero(batch_size);
+  }
+
+  ///
+  /// @brief Default constructor.
+  ///
+  BatchSolver() = default;
+
+  ///
+  /// @brief Default destructor.
+  ///
+  ~BatchSolver() = default;
+
+  ///
+  /// @brief Default move constructor.
+  ///
+  BatchSolver(BatchSolver&&) = default;
+
+  ///
+  /// @brief Default move assign operator.
+  ///
+  BatchSolver& operator=(BatchSolver&&) = default;
+
+  ///
+  /// @brief Gets the number of the instances.
+  /// @return Number of the instances.
+  ///
+  int batchSize() const { return solvers_.size(); }
+
+  ///
+  /// @brief Gets the number of the threads including the calling thread.
+  /// @return Number of the threads.
+  ///
+  int numThreads() const { return thread_pool_ ? thread_pool_->numThreads() : 1; }
+
+  ///
+  /// @brief Gets an instance of the batch.
+  /// @param[in] i Index of the instance.
+  /// @return Reference to the solver of the instance.
+  ///
+  Solver& solver(const int i) {
+    checkIndex(i);
+    return solvers_[i];
+  }
+
+  ///
+  /// @brief Gets an instance of the batch.
+  /// @param[in] i Index of the instance.
+  /// @return Const reference to the solver of the instance.
+  ///
+  const Solver& solver(const int i) const {
+    checkIndex(i);
+    return solvers_[i];
+  }
+
+  ///
+  /// @brief Gets the initial control inputs of the optimal solutions.
+  /// @return Matrix whose i-th row is the initial control input of the i-th
+  /// instance. Size is BatchSolver::batchSize() x BatchSolver::nu.
+  ///
+  const MatrixX& uopt() const { return uopt_; }
+
+  ///
+  /// @brief Gets the l2-norms of the current optimality errors.
+  /// @return Vector whose i-th element is the optimality error of the i-th
+  /// instance. Size is BatchSolver::batchSize().
+  ///
+  const VectorX& optError() {
+    forEach([this](const int i) { opt_error_.coeffRef(i) = solvers_[i].optError(); });
+    return opt_error_;
+  }
+
+  ///
+  /// @brief Calls f(i) for each instance i in parallel. If the batch solver
+  /// has no thread pool, e.g., if it is default-constructed or moved-from,
+  /// f(i) is called serially on the calling thread.
+  /// @param[in] f The function. Must be safe to call concurrently for
+  /// different instances.
+  ///
+  void forEach(const std::function<void(int)>& f) {
+    if (thread_pool_) {
+      thread_pool_->parallelFor(solvers_.size(), f);
+    }
+    else {
+      for (int i=0; i<batchSize(); ++i) {
+        f(i);
+      }
+    }
+  }
+
+  ///
+  /// @brief Updates the solutions of all the instances by the C/GMRES method.
+  /// @param[in] t Current times of the instances. Size must be
+  /// BatchSolver::batchSize().
+  /// @param[in] x Current states of the instances, whose i-th row is the
+  /// state of the i-th instance. Size must be BatchSolver::batchSize() x
+  /// BatchSolver::nx.
+  ///
+  template <typename VectorType, typename MatrixType>
+  void update(const MatrixBase<VectorType>& t, const MatrixBase<MatrixType>& x) {
+    if (t.size() != batchSize()) {
+      throw std::invalid_argument("[BatchSolver::update] t.size() must be " + std::to_string(batchSize()));
+    }
+    checkStates(x, "update");
+    forEach([&](const int i) {
+      const Vector<nx> xi = x.row(i).transpose();
+      solvers_[i].update(t.coeff(i), xi);
+      uopt_.row(i) = solvers_[i].uopt()[0].transpose();
+    });
+  }
+
+  ///
+  /// @brief Updates the solutions of all the instances at the same time by
+  /// the C/GMRES method.
+  /// @param[in] t Current time.
+  /// @param[in] x Current states of the instances, whose i-th row is the
+  /// state of the i-th instance. Size must be BatchSolver::batchSize() x
+  /// BatchSolver::nx.
+  ///
+  template <typename MatrixType>
+  void update(const Scalar t, const MatrixBase<MatrixType>& x) {
+    update(VectorX::Constant(batchSize(), t), x);
+  }
+
+  ///
+  /// @brief Initializes the state and costate vectors of all the instances
+  /// by simulating the system dynamics over the horizon. Available only if
+  /// Solver has init_x_lmd(), i.e., MultipleShootingCGMRESSolver.
+  /// @param[in] t Initial times of the instances. Size must be
+  /// BatchSolver::batchSize().
+  /// @param[in] x Initial states of the instances. Size must be
+  /// BatchSolver::batchSize() x BatchSolver::nx.
+  ///
+  template <typename VectorType, typename MatrixType>
+  void init_x_lmd(const MatrixBase<VectorType>& t, const MatrixBase<MatrixType>& x) {
+    if (t.size() != batchSize()) {
+      throw std::invalid_argument("[BatchSolver::init_x_lmd] t.size() must be " + std::to_string(batchSize()));
+    }
+    checkStates(x, "init_x_lmd");
+    forEach([&](const int i) {
+      const Vector<nx> xi = x.row(i).transpose();
+      solvers_[i].init_x_lmd(t.coeff(i), xi);
+    });
+  }
+
+  ///
+  /// @brief Initializes the dummy input vectors and Lagrange multipliers
+  /// with respect to the control input bounds constraint of all the
+  /// instances.
+  ///
+  void init_dummy_mu() {
+    forEach([this](const int i) { solvers_[i].init_dummy_mu(); });
+  }
+
+private:
+  std::vector<Solver> solvers_;
+  std::unique_ptr<detail::ThreadPool> thread_pool_;
+  MatrixX uopt_;
+  VectorX opt_error_;
+
+  void checkIndex(const int i) const {
+    if (i < 0 || i >= batchSize()) {
+      throw std::out_of_range("[BatchSolver::solver] i must be in [0, " + std::to_string(batchSize()) + ")");
+    }
+  }
+
+  template <typename MatrixType>
+  void checkStates(const MatrixBase<MatrixType>& x, const std::string& name) const {
+    if (x.rows() != batchSize() || x.cols() != nx) {
+      throw std::invalid_argument("[BatchSolver::" + name + "] x must be of size "
+                                  + std::to_string(batchSize()) + " x " + std::to_string(nx));
+    }
+  }
+};
+
+} // namespace cgmres
+
+#endif // CGMRES__BATCH_SOLVER_HPP_
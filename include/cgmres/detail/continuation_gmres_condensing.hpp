@@ -88,14 +88,12 @@ public:
                  const std::array<Vector<nx>, N+1>& x, const std::array<Vector<nx>, N+1>& lmd,
                  const std::array<Vector<nub>, N>& dummy, const std::array<Vector<nub>, N>& mu) {
     assert(x0.size() == nx);
-    nlp_.eval_fonc_hu(t, x0, solution, x, lmd, fonc_hu_);
+    nlp_.eval_fonc(t, x0, solution, x, lmd, fonc_hu_, fonc_f_, fonc_hx_);
     if constexpr (nub > 0) {
       nlp_.eval_fonc_hu(solution, dummy, mu, fonc_hu_);
       nlp_.eval_fonc_hdummy(solution, dummy, mu, fonc_hdummy_);
       nlp_.eval_fonc_hmu(solution, dummy, mu, fonc_hmu_);
     }
-    nlp_.eval_fonc_f(t, x0, solution, x, fonc_f_);
-    nlp_.eval_fonc_hx(t, x0, solution, x, lmd, fonc_hx_);
   }
 
   template <typename VectorType1, typename VectorType2, typename VectorType3, typename VectorType4>
@@ -117,16 +115,12 @@ public:
     x0_1_ = x0 + finite_difference_epsilon_ * dx_; 
     updated_solution_ = solution + finite_difference_epsilon_ * solution_update;
 
-    nlp_.eval_fonc_hu(t, x0, solution, x, lmd, fonc_hu_);
-    nlp_.eval_fonc_hu(t1, x0_1_, solution, x, lmd, fonc_hu_1_);
+    nlp_.eval_fonc(t, x0, solution, x, lmd, fonc_hu_, fonc_f_, fonc_hx_);
     if constexpr (nub > 0) {
       nlp_.eval_fonc_hu(solution, dummy, mu, fonc_hu_);
-      nlp_.eval_fonc_hu(solution, dummy, mu, fonc_hu_1_);
     }
 
     // condensing of x and lmd
-    nlp_.eval_fonc_f(t, x0, solution, x, fonc_f_);
-    nlp_.eval_fonc_hx(t, x0, solution, x, lmd, fonc_hx_);
     for (size_t i=0; i<=N; ++i) {
       fonc_f_1_[i] = (1.0 - finite_difference_epsilon_*zeta_) * fonc_f_[i];
     }
@@ -134,7 +128,7 @@ public:
       fonc_hx_1_[i] = (1.0 - finite_difference_epsilon_*zeta_) * fonc_hx_[i];
     }
     nlp_.retrieve_x(t1, x0_1_, solution, x_1_, fonc_f_1_);
-    nlp_.retrieve_lmd(t1, x0_1_, solution, x_1_, lmd_1_, fonc_hx_1_);
+    nlp_.retrieve_lmd(t1, x0_1_, solution, x_1_, lmd_1_, fonc_hx_1_, fonc_hu_3_);
 
     // condensing of dummy and mu
     if constexpr (nub > 0) {
@@ -153,25 +147,22 @@ public:
       }
     }
 
-    nlp_.eval_fonc_hu(t1, x0_1_, solution, x_1_, lmd_1_, fonc_hu_3_);
     if constexpr (nub > 0) {
       nlp_.eval_fonc_hu(solution, dummy_1_, mu_1_, fonc_hu_3_);
     }
 
-    nlp_.eval_fonc_f(t1, x0_1_, solution, x, fonc_f_1_);
-    nlp_.eval_fonc_hx(t1, x0_1_, solution, x, lmd, fonc_hx_1_);
+    nlp_.eval_fonc(t1, x0_1_, solution, x, lmd, fonc_hu_1_, fonc_f_1_, fonc_hx_1_);
+    if constexpr (nub > 0) {
+      nlp_.eval_fonc_hu(solution, dummy, mu, fonc_hu_1_);
+    }
 
     nlp_.retrieve_x(t1, x0_1_, updated_solution_, x_1_, fonc_f_1_);
-    nlp_.retrieve_lmd(t1, x0_1_, updated_solution_, x_1_, lmd_1_, fonc_hx_1_);
+    nlp_.retrieve_lmd(t1, x0_1_, updated_solution_, x_1_, lmd_1_, fonc_hx_1_, fonc_hu_2_);
     if constexpr (nub > 0) {
       nlp_.retrieve_mu_update(solution, dummy, mu, solution_update, mu_update_);
       for (size_t i=0; i<N; ++i) {
         mu_1_[i] = mu[i] - finite_difference_epsilon_ * mu_update_[i];
       }
-    }
-
-    nlp_.eval_fonc_hu(t1, x0_1_, updated_solution_, x_1_, lmd_1_, fonc_hu_2_);
-    if constexpr (nub > 0) {
       nlp_.eval_fonc_hu(updated_solution_, dummy_1_, mu_1_, fonc_hu_2_);
     }
     CGMRES_EIGEN_CONST_CAST(VectorType4, b_vec) = (1.0/finite_difference_epsilon_ - zeta_) * fonc_hu_ 
@@ -196,16 +187,12 @@ public:
     updated_solution_ = solution + finite_difference_epsilon_ * solution_update;
 
     nlp_.retrieve_x(t1, x0_1_, updated_solution_, x_1_, fonc_f_1_);
-    nlp_.retrieve_lmd(t1, x0_1_, updated_solution_, x_1_, lmd_1_, fonc_hx_1_);
+    nlp_.retrieve_lmd(t1, x0_1_, updated_solution_, x_1_, lmd_1_, fonc_hx_1_, fonc_hu_2_);
     if constexpr (nub > 0) {
       nlp_.retrieve_mu_update(solution, dummy, mu, solution_update, mu_update_);
       for (size_t i=0; i<N; ++i) {
         mu_1_[i] = mu[i] - finite_difference_epsilon_ * mu_update_[i];
       }
-    }
-
-    nlp_.eval_fonc_hu(t1, x0_1_, updated_solution_, x_1_, lmd_1_, fonc_hu_2_);
-    if constexpr (nub > 0) {
       nlp_.eval_fonc_hu(updated_solution_, dummy_1_, mu_1_, fonc_hu_2_);
     }
     CGMRES_EIGEN_CONST_CAST(VectorType4, ax_vec) = (fonc_hu_2_ - fonc_hu_1_) / finite_difference_epsilon_;
@@ -97,7 +97,7 @@ void retrieve_dummy_update(const OCP& ocp,
     assert(dummy_update.size() == nub);
     for (int i=0; i<nub; ++i) {
       const auto ui = OCP::ubound_indices[i];
-      CGMRES_EIGEN_CONST_CAST(VectorType5, dummy_update).coeffRef(ui) 
+      CGMRES_EIGEN_CONST_CAST(VectorType5, dummy_update).coeffRef(i) 
           = (2.0*u.coeff(ui) - ocp.umin[i] - ocp.umax[i]) * u_update.coeff(ui) / (2.0 * dummy.coeff(i));
     }
   }
@@ -116,7 +116,7 @@ void retrieve_mu_update(const OCP& ocp,
     assert(mu_udpate.size() == nub);
     for (int i=0; i<nub; ++i) {
       const auto ui = OCP::ubound_indices[i];
-      CGMRES_EIGEN_CONST_CAST(VectorType5, mu_udpate).coeffRef(ui) 
+      CGMRES_EIGEN_CONST_CAST(VectorType5, mu_udpate).coeffRef(i) 
           = - mu.coeff(i) * (2.0*u.coeff(ui) - ocp.umin[i] - ocp.umax[i]) * u_update.coeff(ui) 
                           / (2.0 * dummy.coeff(i) * dummy.coeff(i));
     }
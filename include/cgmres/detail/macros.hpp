@@ -6,6 +6,14 @@ namespace detail {
 
 #define CGMRES_EIGEN_CONST_CAST(TYPE, OBJ) const_cast<TYPE &>(OBJ.derived())
 
+#if defined(_MSC_VER)
+  #define CGMRES_NOINLINE __declspec(noinline)
+#elif defined(__GNUC__) || defined(__clang__)
+  #define CGMRES_NOINLINE __attribute__((noinline))
+#else
+  #define CGMRES_NOINLINE
+#endif
+
 } // namespace detail
 } // namespace cgmres
 
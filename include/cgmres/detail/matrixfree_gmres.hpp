@@ -21,12 +21,12 @@ public:
   static constexpr int kmax = std::min(dim, _kmax);
 
   MatrixFreeGMRES()
-    : hessenberg_mat_(Matrix<kmax+1, kmax+1>::Zero()), 
+    : hessenberg_mat_(GMRESMatrix<kmax+1, kmax+1>::Zero()), 
       basis_mat_(Matrix<dim, kmax+1>::Zero()), 
       b_vec_(Vector<dim>::Zero()), 
-      givens_c_vec_(Vector<kmax+1>::Zero()), 
-      givens_s_vec_(Vector<kmax+1>::Zero()), 
-      g_vec_(Vector<kmax+1>::Zero()) {
+      givens_c_vec_(GMRESVector<kmax+1>::Zero()), 
+      givens_s_vec_(GMRESVector<kmax+1>::Zero()), 
+      g_vec_(GMRESVector<kmax+1>::Zero()) {
     static_assert(dim > 0);
     static_assert(kmax > 0);
     static_assert(dim >= kmax);
@@ -45,7 +45,7 @@ public:
     // Generates the initial basis of the Krylov subspace.
     linear_problem.eval_b(linear_problem_args..., linear_problem_solution, b_vec_);
     g_vec_.coeffRef(0) = b_vec_.template lpNorm<2>();
-    basis_mat_.col(0) = b_vec_ / g_vec_.coeff(0);
+    basis_mat_.col(0) = b_vec_ / static_cast<Scalar>(g_vec_.coeff(0));
     // k : the dimension of the Krylov subspace at the current iteration.
     int k = 0;
     for (; k<kmax; ++k) {
@@ -53,20 +53,20 @@ public:
                              basis_mat_.col(k+1));
       for (int j=0; j<=k; ++j) {
         hessenberg_mat_.coeffRef(k, j) = basis_mat_.col(k+1).dot(basis_mat_.col(j));
-        basis_mat_.col(k+1).noalias() -= hessenberg_mat_.coeff(k, j) * basis_mat_.col(j);
+        basis_mat_.col(k+1).noalias() -= static_cast<Scalar>(hessenberg_mat_.coeff(k, j)) * basis_mat_.col(j);
       }
       hessenberg_mat_.coeffRef(k, k+1) = basis_mat_.col(k+1).template lpNorm<2>();
-      if (std::abs(hessenberg_mat_.coeff(k, k+1)) < std::numeric_limits<double>::epsilon()) {
+      if (std::abs(hessenberg_mat_.coeff(k, k+1)) < std::numeric_limits<Scalar>::epsilon()) {
         break;
       }
       else {
-        basis_mat_.col(k+1).array() /= hessenberg_mat_.coeff(k, k+1);
+        basis_mat_.col(k+1).array() /= static_cast<Scalar>(hessenberg_mat_.coeff(k, k+1));
       }
       // Givens Rotation for QR factrization of the least squares problem.
       for (int j=0; j<k; ++j) {
         givensRotation(hessenberg_mat_.row(k), j);
       }
-      const Scalar nu = std::sqrt(hessenberg_mat_.coeff(k, k)*hessenberg_mat_.coeff(k, k)
+      const GMRESScalar nu = std::sqrt(hessenberg_mat_.coeff(k, k)*hessenberg_mat_.coeff(k, k)
                                   +hessenberg_mat_.coeff(k, k+1)*hessenberg_mat_.coeff(k, k+1));
       if (nu) {
         givens_c_vec_.coeffRef(k) = hessenberg_mat_.coeff(k, k) / nu;
@@ -82,18 +82,18 @@ public:
     }
     // Computes solution_vec by solving hessenberg_mat_ * y = g_vec.
     for (int i=k-1; i>=0; --i) {
-      Scalar tmp = g_vec_.coeff(i);
+      GMRESScalar tmp = g_vec_.coeff(i);
       for (int j=i+1; j<k; ++j) {
         tmp -= hessenberg_mat_.coeff(j, i) * givens_c_vec_.coeff(j);
       }
       givens_c_vec_.coeffRef(i) = tmp / hessenberg_mat_.coeff(i, i);
     }
     for (int i=0; i<dim; ++i) {
-      Scalar tmp = 0.0;
+      GMRESScalar tmp = 0.0;
       for (int j=0; j<k; ++j) { 
         tmp += basis_mat_.coeff(i, j) * givens_c_vec_.coeff(j);
       }
-      linear_problem_solution.coeffRef(i) += tmp;
+      linear_problem_solution.coeffRef(i) += static_cast<Scalar>(tmp);
     }
     return k;
   }
@@ -101,17 +101,23 @@ public:
   EIGEN_MAKE_ALIGNED_OPERATOR_NEW
 
 private:
-  Matrix<kmax+1, kmax+1> hessenberg_mat_;
+  template <int rows, int cols>
+  using GMRESMatrix = Eigen::Matrix<GMRESScalar, rows, cols>;
+
+  template <int size>
+  using GMRESVector = Eigen::Matrix<GMRESScalar, size, 1>;
+
+  GMRESMatrix<kmax+1, kmax+1> hessenberg_mat_;
   Matrix<dim, kmax+1> basis_mat_;
   Vector<dim> b_vec_;
-  Vector<kmax+1> givens_c_vec_, givens_s_vec_, g_vec_;
+  GMRESVector<kmax+1> givens_c_vec_, givens_s_vec_, g_vec_;
 
   template <typename VectorType>
   inline void givensRotation(const MatrixBase<VectorType>& column_vec, 
                              const int i_column) const {
-    const Scalar tmp1 = givens_c_vec_.coeff(i_column) * column_vec.coeff(i_column) 
+    const GMRESScalar tmp1 = givens_c_vec_.coeff(i_column) * column_vec.coeff(i_column) 
                         - givens_s_vec_.coeff(i_column) * column_vec.coeff(i_column+1);
-    const Scalar tmp2 = givens_s_vec_.coeff(i_column) * column_vec.coeff(i_column) 
+    const GMRESScalar tmp2 = givens_s_vec_.coeff(i_column) * column_vec.coeff(i_column) 
                         + givens_c_vec_.coeff(i_column) * column_vec.coeff(i_column+1);
     CGMRES_EIGEN_CONST_CAST(VectorType, column_vec).coeffRef(i_column) = tmp1;
     CGMRES_EIGEN_CONST_CAST(VectorType, column_vec).coeffRef(i_column+1) = tmp2;
@@ -1,13 +1,17 @@
 #ifndef CGMRES__MULTIPLE_SHOOTING_NLP_HPP_
 #define CGMRES__MULTIPLE_SHOOTING_NLP_HPP_
 
+#include <algorithm>
 #include <array>
+#include <thread>
 
 #include "cgmres/types.hpp"
 #include "cgmres/horizon.hpp"
 
 #include "cgmres/detail/control_input_bounds.hpp"
 #include "cgmres/detail/control_input_bounds_shooting.hpp"
+#include "cgmres/detail/ocp_traits.hpp"
+#include "cgmres/detail/thread_pool.hpp"
 
 namespace cgmres {
 namespace detail {
@@ -22,14 +26,26 @@ public:
   static constexpr int nub = OCP::nub;
   static constexpr int dim = nuc * N;
 
-  MultipleShootingNLP(const OCP& ocp, const Horizon& horizon) 
+  // The independent stages are evaluated by num_threads threads, which is 
+  // reduced so that each thread has at least min_stages_per_thread stages. 
+  // The defaults are the same as those of SolverSettings. The recursions of 
+  // x and lmd over the horizon are always serial.
+  MultipleShootingNLP(const OCP& ocp, const Horizon& horizon, 
+                      const int num_threads=1, const int min_stages_per_thread=16) 
     : ocp_(ocp),
-      horizon_(horizon) {
+      horizon_(horizon),
+      executor_(num_stage_threads(num_threads, min_stages_per_thread)) {
     static_assert(OCP::nx > 0);
     static_assert(OCP::nu > 0);
     static_assert(OCP::nc >= 0);
     static_assert(OCP::nub >= 0);
     static_assert(N > 0);
+    if constexpr (has_sparsity_v<OCP>) {
+      // The kernels do not write the structurally zero and constant elements 
+      // of hx, so they are set once here. 
+      hx_.setZero();
+      ocp_.init_hx(hx_.data());
+    }
   }
 
   MultipleShootingNLP() = default;
@@ -45,11 +61,49 @@ public:
     const Scalar dt = T / N;
     assert(T >= 0);
     // Compute the erros in the first order necessary conditions (FONC)
-    ocp_.eval_hu(t, x0.derived().data(), solution.template head<nuc>().data(), lmd[1].data(), 
-                 fonc_hu.template head<nuc>().data());
-    for (size_t i=1; i<N; ++i) {
-      ocp_.eval_hu(t+i*dt, x[i].data(), solution.template segment<nuc>(nuc*i).data(),
+    init_fonc_hu(fonc_hu);
+    executor_.parallelFor(0, N, [&](const int i) {
+      ocp_.eval_hu(t+i*dt, stage_x(x0, x, i), solution.template segment<nuc>(nuc*i).data(),
                    lmd[i+1].data(), fonc_hu.template segment<nuc>(nuc*i).data());
+    });
+  }
+
+  // Evaluates fonc_hu, fonc_f, and fonc_hx at once. The state equation is 
+  // evaluated by eval_f() and hu is evaluated together with hx so that the 
+  // results are bitwise consistent with retrieve_x() and retrieve_lmd(), 
+  // which the finite difference approximations rely on.
+  template <typename VectorType>
+  void eval_fonc(const Scalar t, const MatrixBase<VectorType>& x0, const Vector<dim>& solution,
+                 const std::array<Vector<nx>, N+1>& x, const std::array<Vector<nx>, N+1>& lmd,
+                 Vector<dim>& fonc_hu, std::array<Vector<nx>, N+1>& fonc_f, 
+                 std::array<Vector<nx>, N+1>& fonc_hx) {
+    if constexpr (has_hx_hu_v<OCP>) {
+      const Scalar T = horizon_.T(t);
+      const Scalar dt = T / N;
+      assert(T >= 0);
+      init_fonc_hu(fonc_hu);
+      executor_.parallelFor(0, N, [&](const int i) {
+        const Scalar* xi = stage_x(x0, x, i);
+        Vector<nx> dx, hx(hx_);
+        ocp_.eval_f(t+i*dt, xi, solution.template segment<nuc>(nuc*i).data(), dx.data());
+        fonc_f[i] = x[i+1] - Map<const Vector<nx>>(xi) - dt * dx;
+        if (i == 0) {
+          ocp_.eval_hu(t, xi, solution.template head<nuc>().data(), lmd[1].data(), 
+                       fonc_hu.template head<nuc>().data());
+        }
+        else {
+          ocp_.eval_hx_hu(t+i*dt, xi, solution.template segment<nuc>(nuc*i).data(), 
+                          lmd[i+1].data(), hx.data(), fonc_hu.template segment<nuc>(nuc*i).data());
+          fonc_hx[i] = lmd[i] - lmd[i+1] - dt * hx;
+        }
+      });
+      ocp_.eval_phix(t+T, x[N].data(), dx_.data());
+      fonc_hx[N] = lmd[N] - dx_;
+    }
+    else {
+      eval_fonc_hu(t, x0, solution, x, lmd, fonc_hu);
+      eval_fonc_f(t, x0, solution, x, fonc_f);
+      eval_fonc_hx(t, x0, solution, x, lmd, fonc_hx);
     }
   }
 
@@ -61,12 +115,12 @@ public:
     const Scalar dt = T / N;
     assert(T >= 0);
     // Compute optimality error for state.
-    ocp_.eval_f(t, x0.derived().data(), solution.template head<nuc>().data(), dx_.data());
-    fonc_f[0] = x[1] - x0 - dt * dx_;
-    for (size_t i=1; i<N; ++i) {
-      ocp_.eval_f(t+i*dt, x[i].data(), solution.template segment<nuc>(nuc*i).data(), dx_.data());
-      fonc_f[i] = x[i+1] - x[i] - dt * dx_;
-    }
+    executor_.parallelFor(0, N, [&](const int i) {
+      const Scalar* xi = stage_x(x0, x, i);
+      Vector<nx> dx;
+      ocp_.eval_f(t+i*dt, xi, solution.template segment<nuc>(nuc*i).data(), dx.data());
+      fonc_f[i] = x[i+1] - Map<const Vector<nx>>(xi) - dt * dx;
+    });
   }
 
   template <typename VectorType>
@@ -95,11 +149,12 @@ public:
     // Compute optimality error for lambda.
     ocp_.eval_phix(t+T, x[N].data(), dx_.data());
     fonc_hx[N] = lmd[N] - dx_;
-    for (size_t i=N-1; i>=1; --i) {
-      ocp_.eval_hx(t+i*dt, x[i].data(), solution.template segment<nuc>(nuc*i).data(), 
-                   lmd[i+1].data(), dx_.data());
-      fonc_hx[i] = lmd[i] - lmd[i+1] - dt * dx_;
-    }
+    executor_.parallelFor(1, N, [&](const int i) {
+      Vector<nx> hx(hx_);
+      eval_hx(t+i*dt, x[i].data(), solution.template segment<nuc>(nuc*i).data(), 
+              lmd[i+1].data(), hx.data());
+      fonc_hx[i] = lmd[i] - lmd[i+1] - dt * hx;
+    });
   }
 
   template <typename VectorType>
@@ -113,9 +168,35 @@ public:
     ocp_.eval_phix(t+T, x[N].data(), dx_.data());
     lmd[N] = dx_ + fonc_hx[N];
     for (size_t i=N-1; i>=1; --i) {
-      ocp_.eval_hx(t+i*dt, x[i].data(), solution.template segment<nuc>(nuc*i).data(), 
-                   lmd[i+1].data(), dx_.data());
-      lmd[i] = lmd[i+1] + dt * dx_ + fonc_hx[i];
+      eval_hx(t+i*dt, x[i].data(), solution.template segment<nuc>(nuc*i).data(), 
+              lmd[i+1].data(), hx_.data());
+      lmd[i] = lmd[i+1] + dt * hx_ + fonc_hx[i];
+    }
+  }
+
+  // Retrieves lmd and evaluates fonc_hu on the retrieved lmd at once.
+  template <typename VectorType>
+  void retrieve_lmd(const Scalar t, const MatrixBase<VectorType>& x0, const Vector<dim>& solution,
+                   const std::array<Vector<nx>, N+1>& x, std::array<Vector<nx>, N+1>& lmd,
+                   const std::array<Vector<nx>, N+1>& fonc_hx, Vector<dim>& fonc_hu) {
+    if constexpr (has_hx_hu_v<OCP>) {
+      const Scalar T = horizon_.T(t);
+      const Scalar dt = T / N;
+      assert(T >= 0);
+      init_fonc_hu(fonc_hu);
+      ocp_.eval_phix(t+T, x[N].data(), dx_.data());
+      lmd[N] = dx_ + fonc_hx[N];
+      for (size_t i=N-1; i>=1; --i) {
+        ocp_.eval_hx_hu(t+i*dt, x[i].data(), solution.template segment<nuc>(nuc*i).data(), 
+                        lmd[i+1].data(), hx_.data(), fonc_hu.template segment<nuc>(nuc*i).data());
+        lmd[i] = lmd[i+1] + dt * hx_ + fonc_hx[i];
+      }
+      ocp_.eval_hu(t, x0.derived().data(), solution.template head<nuc>().data(), lmd[1].data(), 
+                   fonc_hu.template head<nuc>().data());
+    }
+    else {
+      retrieve_lmd(t, x0, solution, x, lmd, fonc_hx);
+      eval_fonc_hu(t, x0, solution, x, lmd, fonc_hu);
     }
   }
 
@@ -185,12 +266,53 @@ public:
 
   const Horizon& horizon() const { return horizon_; }
 
+  int num_threads() const { return executor_.numThreads(); }
+
   EIGEN_MAKE_ALIGNED_OPERATOR_NEW
 
 private:
   OCP ocp_;
   Horizon horizon_;
-  Vector<nx> dx_;
+  Vector<nx> dx_, hx_;
+  ParallelExecutor executor_;
+
+  static int num_stage_threads(int num_threads, const int min_stages_per_thread) {
+    if (num_threads <= 0) {
+      num_threads = std::max(static_cast<int>(std::thread::hardware_concurrency()), 1);
+    }
+    return std::max(std::min(num_threads, N/std::max(min_stages_per_thread, 1)), 1);
+  }
+
+  // Returns the state at the i-th grid point, which is x0 at the initial one. 
+  template <typename VectorType>
+  static const Scalar* stage_x(const MatrixBase<VectorType>& x0, 
+                               const std::array<Vector<nx>, N+1>& x, const int i) {
+    return (i == 0) ? x0.derived().data() : x[i].data();
+  }
+
+  // Evaluates hx by eval_hx_hu() if the OCP provides it, which eval_fonc() 
+  // uses, so that hx is rounded in the same way at every point of the finite 
+  // difference approximations. 
+  void eval_hx(const Scalar t, const Scalar* x, const Scalar* uc, 
+               const Scalar* lmd, Scalar* hx) const {
+    if constexpr (has_hx_hu_v<OCP>) {
+      Vector<nuc> hu;
+      ocp_.eval_hx_hu(t, x, uc, lmd, hx, hu.data());
+    }
+    else {
+      ocp_.eval_hx(t, x, uc, lmd, hx);
+    }
+  }
+
+  // Sets the structurally zero and constant elements of hu, which the kernels 
+  // do not write, in fonc_hu. 
+  void init_fonc_hu(Vector<dim>& fonc_hu) const {
+    if constexpr (has_sparsity_v<OCP>) {
+      for (size_t i=0; i<N; ++i) {
+        ocp_.init_hu(fonc_hu.template segment<nuc>(nuc*i).data());
+      }
+    }
+  }
 };
 
 } // namespace detail
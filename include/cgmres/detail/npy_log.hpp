@@ -0,0 +1,158 @@
+#ifndef CGMRES__NPY_LOG_HPP_
+#define CGMRES__NPY_LOG_HPP_
+
+#include <cassert>
+#include <cstdint>
+#include <fstream>
+#include <string>
+#include <vector>
+
+#include "cgmres/types.hpp"
+
+namespace cgmres {
+namespace detail {
+
+///
+/// @class NpyLog
+/// @brief Append-only .npy file of double rows. The rows are batched in
+/// memory and written in blocks. The header, which holds the shape of the
+/// array, is rewritten at each flush so that the file is always readable by
+/// numpy.load(), e.g., with mmap_mode='r'. The file format is the same as the
+/// binary logs of autogenu.Logger.
+///
+class NpyLog {
+public:
+  ///
+  /// @brief Size of the header of the file in bytes. The header is padded
+  /// to this fixed size so that it can be rewritten in place.
+  ///
+  static constexpr int kHeaderSize = 128;
+
+  NpyLog()
+    : file_(),
+      scalar_(true),
+      batch_size_(0),
+      dim_(-1),
+      num_rows_(0),
+      buffer_() {}
+
+  ~NpyLog() {
+    close();
+  }
+
+  NpyLog(const NpyLog&) = delete;
+  NpyLog& operator=(const NpyLog&) = delete;
+
+  ///
+  /// @brief Opens the file.
+  /// @param[in] file_path Path to the file.
+  /// @param[in] scalar If true, the array is 1D. Otherwise 2D.
+  /// @param[in] batch_size Number of the rows batched in memory.
+  ///
+  void open(const std::string& file_path, const bool scalar,
+            const size_t batch_size) {
+    file_.open(file_path, std::ios::out | std::ios::binary | std::ios::trunc);
+    scalar_ = scalar;
+    batch_size_ = batch_size;
+    dim_ = scalar ? 1 : -1;
+    num_rows_ = 0;
+    buffer_.clear();
+    writeHeader();
+  }
+
+  ///
+  /// @brief Appends a row.
+  /// @param[in] row The row. Its size must not change between the calls.
+  ///
+  template <typename VectorType>
+  void write(const MatrixBase<VectorType>& row) {
+    if (dim_ < 0) {
+      dim_ = row.size();
+      buffer_.reserve(batch_size_*dim_);
+    }
+    assert(row.size() == dim_);
+    for (int i=0; i<row.size(); ++i) {
+      buffer_.push_back(static_cast<double>(row.coeff(i)));
+    }
+    if (buffer_.size() >= batch_size_*dim_) {
+      flush();
+    }
+  }
+
+  ///
+  /// @brief Appends a scalar row.
+  /// @param[in] value The value.
+  ///
+  void write(const double value) {
+    assert(dim_ == 1);
+    buffer_.push_back(value);
+    if (buffer_.size() >= batch_size_) {
+      flush();
+    }
+  }
+
+  ///
+  /// @brief Writes the batched rows onto the file and updates the header.
+  ///
+  void flush() {
+    if (!file_.is_open()) return;
+    if (!buffer_.empty()) {
+      file_.seekp(0, std::ios::end);
+      file_.write(reinterpret_cast<const char*>(buffer_.data()),
+                  buffer_.size()*sizeof(double));
+      num_rows_ += buffer_.size() / dim_;
+      buffer_.clear();
+      writeHeader();
+    }
+    file_.flush();
+  }
+
+  ///
+  /// @brief Flushes and closes the file.
+  ///
+  void close() {
+    if (file_.is_open()) {
+      flush();
+      file_.close();
+    }
+  }
+
+private:
+  std::ofstream file_;
+  bool scalar_;
+  size_t batch_size_;
+  int dim_;
+  size_t num_rows_;
+  std::vector<double> buffer_;
+
+  static bool isLittleEndian() {
+    const std::uint16_t one = 1;
+    return *reinterpret_cast<const unsigned char*>(&one) == 1;
+  }
+
+  void writeHeader() {
+    std::string shape = "(" + std::to_string(num_rows_) + ",";
+    if (!scalar_) {
+      shape += " " + std::to_string(dim_ < 0 ? 0 : dim_);
+    }
+    shape += ")";
+    std::string header = std::string("{'descr': '")
+                          + (isLittleEndian() ? "<" : ">")
+                          + "f8', 'fortran_order': False, 'shape': " + shape + ", }";
+    // magic string (6), version (2), header length (2), header, and '\n'
+    header.resize(kHeaderSize-11, ' ');
+    header += '\n';
+    const std::uint16_t header_len = static_cast<std::uint16_t>(header.size());
+    const char preamble[10] = {'\x93', 'N', 'U', 'M', 'P', 'Y', '\x01', '\x00',
+                               static_cast<char>(header_len & 0xff),
+                               static_cast<char>(header_len >> 8)};
+    file_.seekp(0, std::ios::beg);
+    file_.write(preamble, 10);
+    file_.write(header.data(), header.size());
+  }
+};
+
+} // namespace detail
+} // namespace cgmres
+
+#endif // CGMRES__NPY_LOG_HPP_
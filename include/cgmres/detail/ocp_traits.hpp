@@ -0,0 +1,49 @@
+#ifndef CGMRES__OCP_TRAITS_HPP_
+#define CGMRES__OCP_TRAITS_HPP_
+
+#include <type_traits>
+#include <utility>
+
+#include "cgmres/types.hpp"
+
+
+namespace cgmres {
+namespace detail {
+
+///
+/// @brief Checks whether the OCP provides the fused kernel eval_hx_hu().
+///
+template <class OCP, class = void>
+struct has_hx_hu : std::false_type {};
+
+template <class OCP>
+struct has_hx_hu<OCP, std::void_t<
+    decltype(std::declval<const OCP&>().eval_hx_hu(
+        std::declval<Scalar>(), std::declval<const Scalar*>(), std::declval<const Scalar*>(),
+        std::declval<const Scalar*>(), std::declval<Scalar*>(), std::declval<Scalar*>()))>> 
+    : std::true_type {};
+
+template <class OCP>
+inline constexpr bool has_hx_hu_v = has_hx_hu<OCP>::value;
+
+///
+/// @brief Checks whether the OCP exploits the sparsity of hx and hu, i.e., 
+/// whether it provides init_hx() and init_hu() that set the structurally zero 
+/// and constant elements of hx and hu, which its kernels do not write.
+///
+template <class OCP, class = void>
+struct has_sparsity : std::false_type {};
+
+template <class OCP>
+struct has_sparsity<OCP, std::void_t<
+    decltype(std::declval<const OCP&>().init_hx(std::declval<Scalar*>())),
+    decltype(std::declval<const OCP&>().init_hu(std::declval<Scalar*>()))>> 
+    : std::true_type {};
+
+template <class OCP>
+inline constexpr bool has_sparsity_v = has_sparsity<OCP>::value;
+
+} // namespace detail
+} // namespace cgmres
+
+#endif // CGMRES__OCP_TRAITS_HPP_
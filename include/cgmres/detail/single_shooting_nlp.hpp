@@ -8,6 +8,7 @@
 
 #include "cgmres/detail/control_input_bounds.hpp"
 #include "cgmres/detail/control_input_bounds_shooting.hpp"
+#include "cgmres/detail/ocp_traits.hpp"
 
 namespace cgmres {
 namespace detail {
@@ -25,7 +26,8 @@ public:
   SingleShootingNLP(const OCP& ocp, const Horizon& horizon) 
     : ocp_(ocp),
       horizon_(horizon),
-      dx_(Vector<nx>::Zero()) {
+      dx_(Vector<nx>::Zero()),
+      hx_(Vector<nx>::Zero()) {
     static_assert(OCP::nx > 0);
     static_assert(OCP::nu > 0);
     static_assert(OCP::nc >= 0);
@@ -33,6 +35,12 @@ public:
     static_assert(N > 0);
     std::fill(x_.begin(), x_.end(), Vector<nx>::Zero());
     std::fill(lmd_.begin(), lmd_.end(), Vector<nx>::Zero());
+    if constexpr (has_sparsity_v<OCP>) {
+      // The kernels do not write the structurally zero and constant elements 
+      // of hx, so they are set once here. 
+      hx_.setZero();
+      ocp_.init_hx(hx_.data());
+    }
   }
 
   SingleShootingNLP() = default;
@@ -56,19 +64,35 @@ public:
     }
     // Compute the Lagrange multiplier over the horizon  
     ocp_.eval_phix(t+T, x_[N].data(), lmd_[N].data());
-    for (size_t i=N-1; i>=1; --i) {
-      const int inucb2 = i * (nuc + 2 * nub);
-      ocp_.eval_hx(t+i*dt, x_[i].data(), solution.template segment<nuc>(inucb2).data(),
-                   lmd_[i+1].data(), dx_.data());
-      lmd_[i] = lmd_[i+1] + dt * dx_;
+    if constexpr (has_hx_hu_v<OCP>) {
+      // Compute the Lagrange multiplier and the erros in the first order 
+      // necessary conditions (FONC) at once
+      init_fonc_hu(fonc_hu);
+      for (size_t i=N-1; i>=1; --i) {
+        const int inucb2 = i * (nuc + 2 * nub);
+        ocp_.eval_hx_hu(t+i*dt, x_[i].data(), solution.template segment<nuc>(inucb2).data(),
+                        lmd_[i+1].data(), hx_.data(), fonc_hu.template segment<nuc>(inucb2).data());
+        lmd_[i] = lmd_[i+1] + dt * hx_;
+      }
+      ocp_.eval_hu(t, x_[0].data(), solution.template head<nuc>().data(), lmd_[1].data(), 
+                   fonc_hu.template head<nuc>().data());
     }
-    // Compute the erros in the first order necessary conditions (FONC)
-    ocp_.eval_hu(t, x_[0].data(), solution.template head<nuc>().data(), lmd_[1].data(), 
-                 fonc_hu.template head<nuc>().data());
-    for (size_t i=1; i<N; ++i) {
-      const int inucb2 = i * (nuc + 2 * nub);
-      ocp_.eval_hu(t+i*dt, x_[i].data(), solution.template segment<nuc>(inucb2).data(),
-                   lmd_[i+1].data(), fonc_hu.template segment<nuc>(inucb2).data());
+    else {
+      for (size_t i=N-1; i>=1; --i) {
+        const int inucb2 = i * (nuc + 2 * nub);
+        ocp_.eval_hx(t+i*dt, x_[i].data(), solution.template segment<nuc>(inucb2).data(),
+                     lmd_[i+1].data(), hx_.data());
+        lmd_[i] = lmd_[i+1] + dt * hx_;
+      }
+      // Compute the erros in the first order necessary conditions (FONC)
+      init_fonc_hu(fonc_hu);
+      ocp_.eval_hu(t, x_[0].data(), solution.template head<nuc>().data(), lmd_[1].data(), 
+                   fonc_hu.template head<nuc>().data());
+      for (size_t i=1; i<N; ++i) {
+        const int inucb2 = i * (nuc + 2 * nub);
+        ocp_.eval_hu(t+i*dt, x_[i].data(), solution.template segment<nuc>(inucb2).data(),
+                     lmd_[i+1].data(), fonc_hu.template segment<nuc>(inucb2).data());
+      }
     }
     if constexpr (nub > 0) {
       for (size_t i=0; i<N; ++i) {
@@ -131,8 +155,19 @@ public:
 private:
   OCP ocp_;
   Horizon horizon_;
-  Vector<nx> dx_;
+  Vector<nx> dx_, hx_;
   std::array<Vector<nx>, N+1> x_, lmd_;
+
+  // Sets the structurally zero and constant elements of hu, which the kernels 
+  // do not write, in fonc_hu. 
+  void init_fonc_hu(Vector<dim>& fonc_hu) const {
+    if constexpr (has_sparsity_v<OCP>) {
+      for (size_t i=0; i<N; ++i) {
+        const int inucb2 = i * (nuc + 2 * nub);
+        ocp_.init_hu(fonc_hu.template segment<nuc>(inucb2).data());
+      }
+    }
+  }
 };
 
 } // namespace detail
@@ -0,0 +1,217 @@
+#ifndef CGMRES__THREAD_POOL_HPP_
+#define CGMRES__THREAD_POOL_HPP_
+
+#include <algorithm>
+#include <condition_variable>
+#include <exception>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+namespace cgmres {
+namespace detail {
+
+///
+/// @class ThreadPool
+/// @brief Fixed-size pool of threads that runs parallel for-loops. The
+/// threads are created once and sleep between the loops, so that a loop
+/// does not pay the cost of creating threads.
+///
+class ThreadPool {
+public:
+  ///
+  /// @brief Constructs the thread pool.
+  /// @param[in] num_threads Number of the threads including the calling
+  /// thread. If non-positive, std::thread::hardware_concurrency() is used.
+  ///
+  explicit ThreadPool(const int num_threads=0)
+    : num_threads_(num_threads > 0 ? num_threads
+                                   : std::max(static_cast<int>(std::thread::hardware_concurrency()), 1)),
+      workers_(),
+      mutex_(),
+      start_cv_(),
+      done_cv_(),
+      task_(),
+      num_tasks_(0),
+      generation_(0),
+      num_running_(0),
+      exception_(),
+      stop_(false) {
+    for (int i=1; i<num_threads_; ++i) {
+      workers_.emplace_back(&ThreadPool::workerLoop, this, i);
+    }
+  }
+
+  ~ThreadPool() {
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      stop_ = true;
+    }
+    start_cv_.notify_all();
+    for (auto& e : workers_) {
+      e.join();
+    }
+  }
+
+  ThreadPool(const ThreadPool&) = delete;
+  ThreadPool& operator=(const ThreadPool&) = delete;
+
+  ///
+  /// @brief Gets the number of the threads including the calling thread.
+  /// @return Number of the threads.
+  ///
+  int numThreads() const { return num_threads_; }
+
+  ///
+  /// @brief Calls task(i) for i = 0, ..., num_tasks-1 in parallel and waits
+  /// for all of them. The tasks are split into contiguous blocks, one for
+  /// each thread, and the calling thread runs the first block. If some tasks
+  /// throw, the first exception is rethrown after all the blocks finish.
+  /// @param[in] num_tasks Number of the tasks.
+  /// @param[in] task The task.
+  ///
+  void parallelFor(const int num_tasks, const std::function<void(int)>& task) {
+    if (num_threads_ == 1 || num_tasks <= 1) {
+      for (int i=0; i<num_tasks; ++i) {
+        task(i);
+      }
+      return;
+    }
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      task_ = &task;
+      num_tasks_ = num_tasks;
+      num_running_ = num_threads_ - 1;
+      exception_ = nullptr;
+      ++generation_;
+    }
+    start_cv_.notify_all();
+    runBlock(0);
+    std::unique_lock<std::mutex> lock(mutex_);
+    done_cv_.wait(lock, [this] { return num_running_ == 0; });
+    task_ = nullptr;
+    if (exception_) {
+      std::rethrow_exception(exception_);
+    }
+  }
+
+private:
+  int num_threads_;
+  std::vector<std::thread> workers_;
+  std::mutex mutex_;
+  std::condition_variable start_cv_, done_cv_;
+  const std::function<void(int)>* task_;
+  int num_tasks_;
+  unsigned long generation_;
+  int num_running_;
+  std::exception_ptr exception_;
+  bool stop_;
+
+  void runBlock(const int thread_id) {
+    const int begin = (num_tasks_ * thread_id) / num_threads_;
+    const int end = (num_tasks_ * (thread_id+1)) / num_threads_;
+    try {
+      for (int i=begin; i<end; ++i) {
+        (*task_)(i);
+      }
+    }
+    catch (...) {
+      std::lock_guard<std::mutex> lock(mutex_);
+      if (!exception_) exception_ = std::current_exception();
+    }
+  }
+
+  void workerLoop(const int thread_id) {
+    unsigned long generation = 0;
+    while (true) {
+      {
+        std::unique_lock<std::mutex> lock(mutex_);
+        start_cv_.wait(lock, [&] { return stop_ || generation_ != generation; });
+        if (stop_) return;
+        generation = generation_;
+      }
+      runBlock(thread_id);
+      {
+        std::lock_guard<std::mutex> lock(mutex_);
+        --num_running_;
+      }
+      done_cv_.notify_one();
+    }
+  }
+};
+
+///
+/// @class ParallelExecutor
+/// @brief Copyable owner of a ThreadPool for the members of the solvers,
+/// which are copied, e.g., by clone() in Python. A copy owns a new pool of
+/// the same size so that the copies can be used concurrently. With a single
+/// thread, no pool is created and the loops run on the calling thread.
+///
+class ParallelExecutor {
+public:
+  ///
+  /// @brief Constructs the executor.
+  /// @param[in] num_threads Number of the threads including the calling
+  /// thread. Default is 1, i.e., serial.
+  ///
+  explicit ParallelExecutor(const int num_threads=1)
+    : num_threads_(std::max(num_threads, 1)),
+      thread_pool_() {
+    if (num_threads_ > 1) {
+      thread_pool_ = std::make_unique<ThreadPool>(num_threads_);
+    }
+  }
+
+  ParallelExecutor(const ParallelExecutor& other)
+    : ParallelExecutor(other.num_threads_) {}
+
+  ParallelExecutor& operator=(const ParallelExecutor& other) {
+    if (this != &other && num_threads_ != other.num_threads_) {
+      num_threads_ = other.num_threads_;
+      thread_pool_.reset();
+      if (num_threads_ > 1) {
+        thread_pool_ = std::make_unique<ThreadPool>(num_threads_);
+      }
+    }
+    return *this;
+  }
+
+  ~ParallelExecutor() = default;
+
+  ///
+  /// @brief Gets the number of the threads including the calling thread.
+  /// @return Number of the threads.
+  ///
+  int numThreads() const { return num_threads_; }
+
+  ///
+  /// @brief Calls f(i) for i = begin, ..., end-1, in parallel if the
+  /// executor has more than one thread.
+  /// @param[in] begin First index.
+  /// @param[in] end Last index plus one.
+  /// @param[in] f The function. Must be safe to call concurrently for
+  /// different indices.
+  ///
+  template <typename Func>
+  void parallelFor(const int begin, const int end, const Func& f) {
+    if (thread_pool_) {
+      thread_pool_->parallelFor(end-begin, [&](const int i) { f(begin+i); });
+    }
+    else {
+      for (int i=begin; i<end; ++i) {
+        f(i);
+      }
+    }
+  }
+
+private:
+  int num_threads_;
+  std::unique_ptr<ThreadPool> thread_pool_;
+};
+
+} // namespace detail
+} // namespace cgmres
+
+#endif // CGMRES__THREAD_POOL_HPP_
@@ -7,6 +7,7 @@
 #include "cgmres/horizon.hpp"
 
 #include "cgmres/detail/control_input_bounds.hpp"
+#include "cgmres/detail/ocp_traits.hpp"
 
 namespace cgmres {
 namespace detail {
@@ -40,6 +41,9 @@ public:
     // Compute the Lagrange multiplier over the horizon  
     ocp_.eval_phix(t, x.derived().data(), lmd_.data());
     // Compute the erros in the first order necessary conditions (FONC)
+    if constexpr (has_sparsity_v<OCP>) {
+      ocp_.init_hu(fonc_hu.data());
+    }
     ocp_.eval_hu(t, x.derived().data(), solution.data(), lmd_.data(), fonc_hu.data());
     if constexpr (nub > 0) {
       const auto uc    = solution.template head<nuc>();
@@ -3,56 +3,163 @@
 
 #include <fstream>
 #include <string>
+#include <vector>
+#include <atomic>
+#include <thread>
+#include <chrono>
+#include <stdexcept>
 
 #include "cgmres/types.hpp"
 #include "cgmres/timer.hpp"
 
+#include "cgmres/detail/npy_log.hpp"
+
 
 namespace cgmres {
 
+///
+/// @brief Policy of the asynchronous Logger when its ring buffer is full.
+///
+enum class LogOverflowPolicy {
+  /// @brief Logger::save() waits until the background thread frees a slot.
+  Block,
+  /// @brief Logger::save() discards the data.
+  Drop
+};
+
+///
+/// @class LoggerSettings
+/// @brief Settings of Logger.
+///
+struct LoggerSettings {
+  ///
+  /// @brief If true, Logger::save() only copies the data into a ring buffer
+  /// and a background thread writes them onto the files. Default is false.
+  ///
+  bool async = false;
+
+  ///
+  /// @brief Number of the samples that the ring buffer of the asynchronous
+  /// Logger can hold. Must be positive. Default is 65536.
+  ///
+  size_t capacity = 65536;
+
+  ///
+  /// @brief Policy of the asynchronous Logger when its ring buffer is full.
+  /// Default is LogOverflowPolicy::Block.
+  ///
+  LogOverflowPolicy overflow_policy = LogOverflowPolicy::Block;
+
+  ///
+  /// @brief If true, the logs are saved as binary .npy files of
+  /// little-endian (native) doubles, whose headers hold the dimensions,
+  /// instead of the text .log files. The .npy files can be memory-mapped by
+  /// numpy.load(mmap_mode='r') and are loaded by autogenu.Plotter.
+  /// Default is false.
+  ///
+  bool binary = false;
+
+  ///
+  /// @brief Number of the samples batched in memory before they are written
+  /// onto the files in the binary mode. Must be positive. Default is 1000.
+  ///
+  size_t batch_size = 1000;
+};
+
 ///
 /// @class Logger
-/// @brief Logger for MPC. 
+/// @brief Logger for MPC.
 ///
 class Logger {
 public:
   ///
   /// @brief Constructor.
   /// @param[in] log_name Name of the log.
+  /// @param[in] settings Settings of the logger.
   ///
-  explicit Logger(const std::string& log_name)
+  explicit Logger(const std::string& log_name,
+                  const LoggerSettings& settings=LoggerSettings())
     : log_name_(log_name),
-       t_log_(log_name+ "_t.log"), 
-       x_log_(log_name+ "_x.log"), 
-       u_log_(log_name + "_u.log"), 
-       opterr_log_(log_name + "_opterr.log") {
+       t_log_(),
+       x_log_(),
+       u_log_(),
+       opterr_log_(),
+       t_npy_(),
+       x_npy_(),
+       u_npy_(),
+       opterr_npy_(),
+       settings_(settings),
+       ring_(),
+       dim_x_(0),
+       dim_u_(0),
+       row_size_(0),
+       head_(0),
+       tail_(0),
+       num_dropped_(0),
+       closing_(false),
+       writer_() {
+    if (settings_.capacity <= 0) {
+      throw std::invalid_argument("[Logger]: 'capacity' must be positive!");
+    }
+    if (settings_.batch_size <= 0) {
+      throw std::invalid_argument("[Logger]: 'batch_size' must be positive!");
+    }
+    if (settings_.binary) {
+      t_npy_.open(log_name + "_t.npy", true, settings_.batch_size);
+      x_npy_.open(log_name + "_x.npy", false, settings_.batch_size);
+      u_npy_.open(log_name + "_u.npy", false, settings_.batch_size);
+      opterr_npy_.open(log_name + "_opterr.npy", true, settings_.batch_size);
+    }
+    else {
+      t_log_.open(log_name + "_t.log");
+      x_log_.open(log_name + "_x.log");
+      u_log_.open(log_name + "_u.log");
+      opterr_log_.open(log_name + "_opterr.log");
+    }
+    if (settings_.async) {
+      writer_ = std::thread(&Logger::writeLoop, this);
+    }
   }
 
   ///
-  /// @brief Destructor.
+  /// @brief Destructor. Writes all the data in the ring buffer before closing the files.
   ///
   ~Logger() {
+    if (writer_.joinable()) {
+      closing_.store(true, std::memory_order_release);
+      writer_.join();
+    }
     t_log_.close();
     x_log_.close();
     u_log_.close();
     opterr_log_.close();
+    t_npy_.close();
+    x_npy_.close();
+    u_npy_.close();
+    opterr_npy_.close();
   }
 
+  Logger(const Logger&) = delete;
+  Logger& operator=(const Logger&) = delete;
+
   ///
   /// @brief Save datas.
   /// @param[in] t Time.
   /// @param[in] x State.
   /// @param[in] u Control input.
   /// @param[in] opterr Optimality error.
+  /// @remark In the asynchronous mode, this only copies the data into the
+  /// ring buffer. This must be called from a single thread.
   ///
   template <typename StateVectorType, typename ControlInputVectorType>
-  void save(const Scalar t, const MatrixBase<StateVectorType>& x, 
+  void save(const Scalar t, const MatrixBase<StateVectorType>& x,
             const MatrixBase<ControlInputVectorType >& u,
             const double opterr) {
-    t_log_ << t << '\n';
-    x_log_ << x.transpose() << '\n';
-    u_log_ << u.transpose() << '\n';
-    opterr_log_ << opterr << '\n';
+    if (settings_.async) {
+      push(t, x, u, opterr);
+      return;
+    }
+    write(t, x, u, opterr);
   }
 
   ///
@@ -65,11 +172,96 @@ public:
     timing_log.close();
   }
 
+  ///
+  /// @brief Gets the number of the samples discarded by the asynchronous
+  /// Logger with LogOverflowPolicy::Drop.
+  /// @return Number of the discarded samples.
+  ///
+  size_t numDropped() const { return num_dropped_; }
+
 private:
   std::string log_name_;
   std::ofstream t_log_, x_log_, u_log_, opterr_log_;
+  detail::NpyLog t_npy_, x_npy_, u_npy_, opterr_npy_;
+  LoggerSettings settings_;
+  // Single-producer single-consumer ring buffer of the rows of
+  // [t, x, u, opterr]. save() only advances head_ and the background thread
+  // only advances tail_.
+  std::vector<double> ring_;
+  int dim_x_, dim_u_, row_size_;
+  std::atomic<size_t> head_, tail_;
+  size_t num_dropped_;
+  std::atomic<bool> closing_;
+  std::thread writer_;
+
+  template <typename StateVectorType, typename ControlInputVectorType>
+  void write(const Scalar t, const MatrixBase<StateVectorType>& x,
+             const MatrixBase<ControlInputVectorType >& u,
+             const double opterr) {
+    if (settings_.binary) {
+      t_npy_.write(t);
+      x_npy_.write(x);
+      u_npy_.write(u);
+      opterr_npy_.write(opterr);
+    }
+    else {
+      t_log_ << t << '\n';
+      x_log_ << x.transpose() << '\n';
+      u_log_ << u.transpose() << '\n';
+      opterr_log_ << opterr << '\n';
+    }
+  }
+
+  template <typename StateVectorType, typename ControlInputVectorType>
+  void push(const Scalar t, const MatrixBase<StateVectorType>& x,
+            const MatrixBase<ControlInputVectorType >& u,
+            const double opterr) {
+    const size_t head = head_.load(std::memory_order_relaxed);
+    if (head == 0) {
+      dim_x_ = x.size();
+      dim_u_ = u.size();
+      row_size_ = dim_x_ + dim_u_ + 2;
+      ring_.resize(settings_.capacity*row_size_);
+    }
+    if (head - tail_.load(std::memory_order_acquire) >= settings_.capacity) {
+      if (settings_.overflow_policy == LogOverflowPolicy::Drop) {
+        ++num_dropped_;
+        return;
+      }
+      while (head - tail_.load(std::memory_order_acquire) >= settings_.capacity) {
+        std::this_thread::yield();
+      }
+    }
+    double* row = ring_.data() + (head%settings_.capacity) * row_size_;
+    row[0] = t;
+    Map<Eigen::VectorXd>(row+1, dim_x_) = x.template cast<double>();
+    Map<Eigen::VectorXd>(row+1+dim_x_, dim_u_) = u.template cast<double>();
+    row[row_size_-1] = opterr;
+    head_.store(head+1, std::memory_order_release);
+  }
+
+  void writeLoop() {
+    while (true) {
+      const size_t tail = tail_.load(std::memory_order_relaxed);
+      const bool closing = closing_.load(std::memory_order_acquire);
+      const size_t head = head_.load(std::memory_order_acquire);
+      if (head == tail) {
+        if (closing) return;
+        std::this_thread::sleep_for(std::chrono::microseconds(500));
+        continue;
+      }
+      for (size_t i=tail; i<head; ++i) {
+        const double* row = ring_.data() + (i%settings_.capacity) * row_size_;
+        write(static_cast<Scalar>(row[0]),
+              Map<const Eigen::VectorXd>(row+1, dim_x_).template cast<Scalar>(),
+              Map<const Eigen::VectorXd>(row+1+dim_x_, dim_u_).template cast<Scalar>(),
+              row[row_size_-1]);
+      }
+      tail_.store(head, std::memory_order_release);
+    }
+  }
 };
 
 } // namespace cgmres
 
-#endif // CGMRES__LOGGER_HPP_
\ No newline at end of file
+#endif // CGMRES__LOGGER_HPP_
@@ -67,7 +67,8 @@ public:
   ///
   MultipleShootingCGMRESSolver(const OCP& ocp, const Horizon& horizon, 
                                const SolverSettings& settings) 
-    : continuation_gmres_(MultipleShootingNLP_(ocp, horizon), settings.finite_difference_epsilon, settings.zeta),
+    : continuation_gmres_(MultipleShootingNLP_(ocp, horizon, settings.num_threads, settings.min_stages_per_thread),
+                          settings.finite_difference_epsilon, settings.zeta),
       gmres_(),
       settings_(settings),
       solution_(Vector<dim>::Zero()),
@@ -455,6 +456,12 @@ public:
     return timer_.getProfile();
   }
 
+  ///
+  /// @brief Getter of the solver settings.
+  /// @return const reference to the solver settings.
+  ///
+  const SolverSettings& settings() const { return settings_; }
+
   void disp(std::ostream& os) const {
     os << "Multiple shooting CGMRES solver: " << std::endl;
     os << "  N:    " << N << std::endl;
@@ -1,5 +1,10 @@
+#include "cgmres/batch_solver.hpp"
+#include "cgmres/python/trajectory_view.hpp"
+#include "cgmres/python/simulation.hpp"
+
 #define DEFINE_PYBIND11_MODULE_MULTIPLE_SHOOTING_CGMRES_SOLVER(OCP, N, KMAX) \
 using MultipleShootingCGMRESSolver_ = MultipleShootingCGMRESSolver<OCP, N, KMAX>; \
+using BatchMultipleShootingCGMRESSolver_ = BatchSolver<MultipleShootingCGMRESSolver_>; \
 PYBIND11_MODULE(multiple_shooting_cgmres_solver, m) { \
   py::class_<MultipleShootingCGMRESSolver_>(m, "MultipleShootingCGMRESSolver") \
     .def(py::init<OCP, Horizon, SolverSettings>(), \ 
@@ -39,33 +44,91 @@ PYBIND11_MODULE(multiple_shooting_cgmres_solver, m) { \
     .def("set_mu_array", [](MultipleShootingCGMRESSolver_& self, const std::vector<VectorX>& mu_array) { \
         self.set_mu_array(mu_array); \ 
      }, py::arg("mu_array")) \
-    .def_property_readonly("uopt", &MultipleShootingCGMRESSolver_::uopt) \
-    .def_property_readonly("ucopt", &MultipleShootingCGMRESSolver_::ucopt) \
-    .def_property_readonly("xopt", &MultipleShootingCGMRESSolver_::xopt) \
-    .def_property_readonly("lmdopt", &MultipleShootingCGMRESSolver_::lmdopt) \
-    .def_property_readonly("dummyopt", &MultipleShootingCGMRESSolver_::dummyopt) \
-    .def_property_readonly("muopt", &MultipleShootingCGMRESSolver_::muopt) \
+    .def("u0", [](const MultipleShootingCGMRESSolver_& self) { \
+        return self.uopt()[0]; \
+    }) \
+    .def_property_readonly("uopt", [](py::object self) { \
+        return trajectory_view(self.cast<const MultipleShootingCGMRESSolver_&>().uopt(), self); \
+    }) \
+    .def_property_readonly("ucopt", [](py::object self) { \
+        return trajectory_view(self.cast<const MultipleShootingCGMRESSolver_&>().ucopt(), self); \
+    }) \
+    .def_property_readonly("xopt", [](py::object self) { \
+        return trajectory_view(self.cast<const MultipleShootingCGMRESSolver_&>().xopt(), self); \
+    }) \
+    .def_property_readonly("lmdopt", [](py::object self) { \
+        return trajectory_view(self.cast<const MultipleShootingCGMRESSolver_&>().lmdopt(), self); \
+    }) \
+    .def_property_readonly("dummyopt", [](py::object self) { \
+        return trajectory_view(self.cast<const MultipleShootingCGMRESSolver_&>().dummyopt(), self); \
+    }) \
+    .def_property_readonly("muopt", [](py::object self) { \
+        return trajectory_view(self.cast<const MultipleShootingCGMRESSolver_&>().muopt(), self); \
+    }) \
     .def("opt_error", [](MultipleShootingCGMRESSolver_& self, const Scalar t, const VectorX& x) { \
         return self.optError(t, x); \
-    }, py::arg("t"), py::arg("x")) \
-    .def("opt_error", static_cast<Scalar (MultipleShootingCGMRESSolver_::*)() const>(&MultipleShootingCGMRESSolver_::optError)) \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("opt_error", static_cast<Scalar (MultipleShootingCGMRESSolver_::*)() const>(&MultipleShootingCGMRESSolver_::optError), \
+         py::call_guard<py::gil_scoped_release>()) \
     .def("update", [](MultipleShootingCGMRESSolver_& self, const Scalar t, const VectorX& x) { \
         self.update(t, x); \
-    }, py::arg("t"), py::arg("x")) \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
     .def("init_x", [](MultipleShootingCGMRESSolver_& self, const Scalar t, const VectorX& x) { \
         self.init_x(t, x); \
-    }, py::arg("t"), py::arg("x")) \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
     .def("init_lmd", [](MultipleShootingCGMRESSolver_& self, const Scalar t, const VectorX& x) { \
         self.init_lmd(t, x); \
-    }, py::arg("t"), py::arg("x")) \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
     .def("init_x_lmd", [](MultipleShootingCGMRESSolver_& self, const Scalar t, const VectorX& x) { \
         self.init_x_lmd(t, x); \
-    }, py::arg("t"), py::arg("x")) \
-    .def("init_dummy_mu", &MultipleShootingCGMRESSolver_::init_dummy_mu) \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("init_dummy_mu", &MultipleShootingCGMRESSolver_::init_dummy_mu, \
+         py::call_guard<py::gil_scoped_release>()) \
     .def("get_profile", &MultipleShootingCGMRESSolver_::getProfile) \
     .def("__str__", [](const MultipleShootingCGMRESSolver_& self) { \
         std::stringstream ss; \
         ss << self; \ 
         return ss.str(); \
       }); \
+  py::class_<BatchMultipleShootingCGMRESSolver_>(m, "BatchMultipleShootingCGMRESSolver") \
+    .def(py::init<MultipleShootingCGMRESSolver_, int, int>(), \
+          py::arg("solver"), py::arg("batch_size"), py::arg("num_threads")=0) \
+    .def_property_readonly("batch_size", &BatchMultipleShootingCGMRESSolver_::batchSize) \
+    .def_property_readonly("num_threads", &BatchMultipleShootingCGMRESSolver_::numThreads) \
+    .def("__len__", &BatchMultipleShootingCGMRESSolver_::batchSize) \
+    .def("solver", [](BatchMultipleShootingCGMRESSolver_& self, const int i) -> MultipleShootingCGMRESSolver_& { \
+        return self.solver(i); \
+     }, py::arg("i"), py::return_value_policy::reference_internal) \
+    .def_property_readonly("uopt", &BatchMultipleShootingCGMRESSolver_::uopt) \
+    .def("opt_error", [](BatchMultipleShootingCGMRESSolver_& self) { \
+        return VectorX(self.optError()); \
+    }, py::call_guard<py::gil_scoped_release>()) \
+    .def("update", [](BatchMultipleShootingCGMRESSolver_& self, const VectorX& t, const MatrixX& x) { \
+        self.update(t, x); \
+        return self.uopt(); \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("update", [](BatchMultipleShootingCGMRESSolver_& self, const Scalar t, const MatrixX& x) { \
+        self.update(t, x); \
+        return self.uopt(); \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("init_x_lmd", [](BatchMultipleShootingCGMRESSolver_& self, const VectorX& t, const MatrixX& x) { \
+        self.init_x_lmd(t, x); \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("init_x_lmd", [](BatchMultipleShootingCGMRESSolver_& self, const Scalar t, const MatrixX& x) { \
+        self.init_x_lmd(VectorX::Constant(self.batchSize(), t), x); \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("init_dummy_mu", &BatchMultipleShootingCGMRESSolver_::init_dummy_mu, \
+         py::call_guard<py::gil_scoped_release>()); \
+  m.def("simulate", &simulate_logs<MultipleShootingCGMRESSolver_, OCP>, \
+        py::arg("mpc"), py::arg("ocp"), py::arg("t0"), py::arg("x0"), py::arg("tsim"), \
+        py::arg("integrator")="rk4"); \
 }
\ No newline at end of file
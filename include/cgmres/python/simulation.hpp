@@ -0,0 +1,61 @@
+#ifndef CGMRES__PYTHON__SIMULATION_HPP_
+#define CGMRES__PYTHON__SIMULATION_HPP_
+
+#include <stdexcept>
+#include <string>
+#include <utility>
+
+#include <pybind11/pybind11.h>
+#include <pybind11/eigen.h>
+
+#include "cgmres/types.hpp"
+#include "cgmres/simulation.hpp"
+
+namespace cgmres {
+namespace python {
+
+///
+/// @brief Runs the closed-loop simulation of cgmres::simulate() without the
+/// GIL.
+/// @param[in, out] mpc The MPC solver. Should be initialized.
+/// @param[in] ocp The optimal control problem whose dynamics is simulated.
+/// @param[in] t0 Initial time.
+/// @param[in] x0 Initial state.
+/// @param[in] tsim Length of the simulation.
+/// @param[in] integrator 'rk4' or 'forward_euler'.
+/// @return Dict of the NumPy arrays 't', 'x', 'u', 'opterr', and
+/// 'solve_time_ms', whose i-th rows are the i-th sampling step. The arrays
+/// take over the memory of the logs without copying.
+///
+template <typename MPC, typename OCP>
+pybind11::dict simulate_logs(MPC& mpc, const OCP& ocp, const Scalar t0,
+                             const VectorX& x0, const Scalar tsim,
+                             const std::string& integrator) {
+  IntegratorType integrator_type;
+  if (integrator == "rk4") {
+    integrator_type = IntegratorType::RK4;
+  }
+  else if (integrator == "forward_euler") {
+    integrator_type = IntegratorType::ForwardEuler;
+  }
+  else {
+    throw std::invalid_argument("[simulate]: 'integrator' must be 'rk4' or 'forward_euler'!");
+  }
+  SimulationResult result;
+  {
+    pybind11::gil_scoped_release release;
+    result = simulate(mpc, ocp, t0, x0, tsim, integrator_type);
+  }
+  pybind11::dict logs;
+  logs["t"] = pybind11::cast(std::move(result.t));
+  logs["x"] = pybind11::cast(std::move(result.x));
+  logs["u"] = pybind11::cast(std::move(result.u));
+  logs["opterr"] = pybind11::cast(std::move(result.opt_error));
+  logs["solve_time_ms"] = pybind11::cast(std::move(result.solve_time_ms));
+  return logs;
+}
+
+} // namespace python
+} // namespace cgmres
+
+#endif // CGMRES__PYTHON__SIMULATION_HPP_
@@ -1,5 +1,10 @@
+#include "cgmres/batch_solver.hpp"
+#include "cgmres/python/trajectory_view.hpp"
+#include "cgmres/python/simulation.hpp"
+
 #define DEFINE_PYBIND11_MODULE_SINGLE_SHOOTING_CGMRES_SOLVER(OCP, N, KMAX) \
 using SingleShootingCGMRESSolver_ = SingleShootingCGMRESSolver<OCP, N, KMAX>; \
+using BatchSingleShootingCGMRESSolver_ = BatchSolver<SingleShootingCGMRESSolver_>; \
 PYBIND11_MODULE(single_shooting_cgmres_solver, m) { \
   py::class_<SingleShootingCGMRESSolver_>(m, "SingleShootingCGMRESSolver") \
     .def(py::init<OCP, Horizon, SolverSettings>(), \ 
@@ -27,21 +32,69 @@ PYBIND11_MODULE(single_shooting_cgmres_solver, m) { \
     .def("set_mu_array", [](SingleShootingCGMRESSolver_& self, const std::vector<VectorX>& mu_array) { \
         self.set_mu_array(mu_array); \ 
      }, py::arg("mu_array")) \
-    .def_property_readonly("uopt", &SingleShootingCGMRESSolver_::uopt) \
-    .def_property_readonly("ucopt", &SingleShootingCGMRESSolver_::ucopt) \
-    .def_property_readonly("xopt", &SingleShootingCGMRESSolver_::xopt) \
-    .def_property_readonly("lmdopt", &SingleShootingCGMRESSolver_::lmdopt) \
+    .def("u0", [](const SingleShootingCGMRESSolver_& self) { \
+        return self.uopt()[0]; \
+    }) \
+    .def_property_readonly("uopt", [](py::object self) { \
+        return trajectory_view(self.cast<const SingleShootingCGMRESSolver_&>().uopt(), self); \
+    }) \
+    .def_property_readonly("ucopt", [](py::object self) { \
+        return trajectory_view(self.cast<const SingleShootingCGMRESSolver_&>().ucopt(), self); \
+    }) \
+    .def_property_readonly("xopt", [](py::object self) { \
+        return trajectory_view(self.cast<const SingleShootingCGMRESSolver_&>().xopt(), self); \
+    }) \
+    .def_property_readonly("lmdopt", [](py::object self) { \
+        return trajectory_view(self.cast<const SingleShootingCGMRESSolver_&>().lmdopt(), self); \
+    }) \
+    .def_property_readonly("dummyopt", [](py::object self) { \
+        return trajectory_view(self.cast<const SingleShootingCGMRESSolver_&>().dummyopt(), self); \
+    }) \
+    .def_property_readonly("muopt", [](py::object self) { \
+        return trajectory_view(self.cast<const SingleShootingCGMRESSolver_&>().muopt(), self); \
+    }) \
     .def("opt_error", [](SingleShootingCGMRESSolver_& self, const Scalar t, const VectorX& x) { \
         return self.optError(t, x); \
-    }, py::arg("t"), py::arg("x")) \
-    .def("opt_error", static_cast<Scalar (SingleShootingCGMRESSolver_::*)() const>(&SingleShootingCGMRESSolver_::optError)) \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("opt_error", static_cast<Scalar (SingleShootingCGMRESSolver_::*)() const>(&SingleShootingCGMRESSolver_::optError), \
+         py::call_guard<py::gil_scoped_release>()) \
     .def("update", [](SingleShootingCGMRESSolver_& self, const Scalar t, const VectorX& x) { \
         self.update(t, x); \
-    }, py::arg("t"), py::arg("x")) \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
     .def("get_profile", &SingleShootingCGMRESSolver_::getProfile) \
     .def("__str__", [](const SingleShootingCGMRESSolver_& self) { \
         std::stringstream ss; \
         ss << self; \ 
         return ss.str(); \
       }); \
+  py::class_<BatchSingleShootingCGMRESSolver_>(m, "BatchSingleShootingCGMRESSolver") \
+    .def(py::init<SingleShootingCGMRESSolver_, int, int>(), \
+          py::arg("solver"), py::arg("batch_size"), py::arg("num_threads")=0) \
+    .def_property_readonly("batch_size", &BatchSingleShootingCGMRESSolver_::batchSize) \
+    .def_property_readonly("num_threads", &BatchSingleShootingCGMRESSolver_::numThreads) \
+    .def("__len__", &BatchSingleShootingCGMRESSolver_::batchSize) \
+    .def("solver", [](BatchSingleShootingCGMRESSolver_& self, const int i) -> SingleShootingCGMRESSolver_& { \
+        return self.solver(i); \
+     }, py::arg("i"), py::return_value_policy::reference_internal) \
+    .def_property_readonly("uopt", &BatchSingleShootingCGMRESSolver_::uopt) \
+    .def("opt_error", [](BatchSingleShootingCGMRESSolver_& self) { \
+        return VectorX(self.optError()); \
+    }, py::call_guard<py::gil_scoped_release>()) \
+    .def("update", [](BatchSingleShootingCGMRESSolver_& self, const VectorX& t, const MatrixX& x) { \
+        self.update(t, x); \
+        return self.uopt(); \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("update", [](BatchSingleShootingCGMRESSolver_& self, const Scalar t, const MatrixX& x) { \
+        self.update(t, x); \
+        return self.uopt(); \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("init_dummy_mu", &BatchSingleShootingCGMRESSolver_::init_dummy_mu, \
+         py::call_guard<py::gil_scoped_release>()); \
+  m.def("simulate", &simulate_logs<SingleShootingCGMRESSolver_, OCP>, \
+        py::arg("mpc"), py::arg("ocp"), py::arg("t0"), py::arg("x0"), py::arg("tsim"), \
+        py::arg("integrator")="rk4"); \
 }
\ No newline at end of file
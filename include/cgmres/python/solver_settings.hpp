@@ -13,6 +13,8 @@ PYBIND11_MODULE(solver_settings, m) { \
     .def_readwrite("zeta", &SolverSettings::zeta) \
     .def_readwrite("min_dummy", &SolverSettings::min_dummy) \
     .def_readwrite("verbose_level", &SolverSettings::verbose_level) \
+    .def_readwrite("num_threads", &SolverSettings::num_threads) \
+    .def_readwrite("min_stages_per_thread", &SolverSettings::min_stages_per_thread) \
     .def("__str__", [](const SolverSettings& self) { \
         std::stringstream ss; \
         ss << self; \ 
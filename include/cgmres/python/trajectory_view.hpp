@@ -0,0 +1,41 @@
+#ifndef CGMRES__PYTHON__TRAJECTORY_VIEW_HPP_
+#define CGMRES__PYTHON__TRAJECTORY_VIEW_HPP_
+
+#include <array>
+#include <cstddef>
+
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+
+#include "cgmres/types.hpp"
+
+namespace cgmres {
+namespace python {
+
+///
+/// @brief Makes a read-only NumPy array that views a trajectory without
+/// copying it. The view reflects the later changes of the trajectory, e.g.,
+/// by update() of the solver, and keeps the owner alive.
+/// @param[in] trajectory The trajectory.
+/// @param[in] owner The Python object that owns the trajectory.
+/// @return The array of size (size, n).
+///
+template <int n, std::size_t size>
+pybind11::array_t<Scalar> trajectory_view(const std::array<Vector<n>, size>& trajectory,
+                                          pybind11::handle owner) {
+  if constexpr (n == 0) {
+    return pybind11::array_t<Scalar>({size, static_cast<std::size_t>(0)});
+  }
+  else {
+    pybind11::array_t<Scalar> view({size, static_cast<std::size_t>(n)},
+                                   {sizeof(Vector<n>), sizeof(Scalar)},
+                                   trajectory[0].data(), owner);
+    pybind11::detail::array_proxy(view.ptr())->flags &= ~pybind11::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+    return view;
+  }
+}
+
+} // namespace python
+} // namespace cgmres
+
+#endif // CGMRES__PYTHON__TRAJECTORY_VIEW_HPP_
@@ -28,11 +28,14 @@ PYBIND11_MODULE(zero_horizon_ocp_solver, m) { \
     .def_property_readonly("muopt", &ZeroHorizonOCPSolver_::muopt) \
     .def("opt_error", [](ZeroHorizonOCPSolver_& self, const Scalar t, const VectorX& x) { \
         return self.optError(t, x); \
-    }, py::arg("t"), py::arg("x")) \
-    .def("opt_error", static_cast<Scalar (ZeroHorizonOCPSolver_::*)() const>(&ZeroHorizonOCPSolver_::optError)) \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
+    .def("opt_error", static_cast<Scalar (ZeroHorizonOCPSolver_::*)() const>(&ZeroHorizonOCPSolver_::optError), \
+         py::call_guard<py::gil_scoped_release>()) \
     .def("solve", [](ZeroHorizonOCPSolver_& self, const Scalar t, const VectorX& x) { \
         self.solve(t, x); \
-    }, py::arg("t"), py::arg("x")) \
+    }, py::arg("t"), py::arg("x"), \
+         py::call_guard<py::gil_scoped_release>()) \
     .def("get_profile", &ZeroHorizonOCPSolver_::getProfile) \
     .def("__str__", [](const ZeroHorizonOCPSolver_& self) { \
         std::stringstream ss; \
@@ -0,0 +1,128 @@
+#ifndef CGMRES__SIMULATION_HPP_
+#define CGMRES__SIMULATION_HPP_
+
+#include <chrono>
+#include <cmath>
+#include <stdexcept>
+#include <string>
+
+#include "cgmres/types.hpp"
+#include "cgmres/integrator.hpp"
+
+namespace cgmres {
+
+///
+/// @enum IntegratorType
+/// @brief Numerical integrator of the system dynamics in the closed-loop
+/// simulation.
+///
+enum class IntegratorType {
+  ForwardEuler,
+  RK4
+};
+
+///
+/// @class SimulationResult
+/// @brief Logs of a closed-loop simulation. The i-th row of each log is the
+/// i-th sampling step.
+///
+struct SimulationResult {
+  ///
+  /// @brief Alias of the row-major dynamic-size matrix, which has the same
+  /// memory layout as the NumPy arrays.
+  ///
+  using RowMajorMatrixX = Eigen::Matrix<Scalar, Eigen::Dynamic, Eigen::Dynamic, Eigen::RowMajor>;
+
+  ///
+  /// @brief Times. Size is the number of the steps.
+  ///
+  VectorX t;
+
+  ///
+  /// @brief States. Size is the number of the steps x nx.
+  ///
+  RowMajorMatrixX x;
+
+  ///
+  /// @brief Control inputs applied from each time. Size is the number of
+  /// the steps x nu.
+  ///
+  RowMajorMatrixX u;
+
+  ///
+  /// @brief Optimality errors after the update of each step. Size is the
+  /// number of the steps.
+  ///
+  VectorX opt_error;
+
+  ///
+  /// @brief Computational times of the update of each step in milliseconds.
+  /// Size is the number of the steps.
+  ///
+  VectorX solve_time_ms;
+};
+
+///
+/// @brief Runs a closed-loop simulation, in the same manner as the
+/// generated main.cpp. At each sampling step, the initial control input of
+/// the MPC solution is applied to the system, the MPC solution is updated,
+/// and the logs are recorded.
+/// @param[in, out] mpc The MPC solver, e.g., MultipleShootingCGMRESSolver.
+/// Should be initialized. The sampling time is mpc.settings().sampling_time.
+/// @param[in] ocp The optimal control problem whose dynamics is simulated.
+/// @param[in] t0 Initial time.
+/// @param[in] x0 Initial state. Size must be OCP::nx.
+/// @param[in] tsim Length of the simulation.
+/// @param[in] integrator The numerical integrator. Default is
+/// IntegratorType::RK4.
+/// @return Logs of the simulation.
+///
+template <typename MPC, typename OCP, typename StateVectorType>
+SimulationResult simulate(MPC& mpc, const OCP& ocp, const Scalar t0,
+                          const MatrixBase<StateVectorType>& x0, const Scalar tsim,
+                          const IntegratorType integrator=IntegratorType::RK4) {
+  if (x0.size() != OCP::nx) {
+    throw std::invalid_argument("[simulate] x0.size() must be " + std::to_string(OCP::nx));
+  }
+  if (tsim < 0.0) {
+    throw std::invalid_argument("[simulate] 'tsim' must be non-negative!");
+  }
+  const Scalar sampling_time = mpc.settings().sampling_time;
+  const int sim_steps = std::floor(tsim / sampling_time);
+  SimulationResult result;
+  result.t.resize(sim_steps);
+  result.x.resize(sim_steps, OCP::nx);
+  result.u.resize(sim_steps, OCP::nu);
+  result.opt_error.resize(sim_steps);
+  result.solve_time_ms.resize(sim_steps);
+
+  Scalar t = t0;
+  VectorX x = x0;
+  VectorX x1(x0.size());
+  for (int i=0; i<sim_steps; ++i) {
+    const Vector<OCP::nu> u = mpc.uopt()[0];
+    if (integrator == IntegratorType::RK4) {
+      x1 = RK4(ocp, t, sampling_time, x, u);
+    }
+    else {
+      x1 = ForwardEuler(ocp, t, sampling_time, x, u);
+    }
+    const auto start = std::chrono::high_resolution_clock::now();
+    mpc.update(t, x);
+    const std::chrono::duration<Scalar, std::milli> elapsed_time
+        = std::chrono::high_resolution_clock::now() - start;
+
+    result.t.coeffRef(i) = t;
+    result.x.row(i) = x.transpose();
+    result.u.row(i) = u.transpose();
+    result.opt_error.coeffRef(i) = mpc.optError();
+    result.solve_time_ms.coeffRef(i) = elapsed_time.count();
+    x = x1;
+    t = t + sampling_time;
+  }
+  return result;
+}
+
+} // namespace cgmres
+
+#endif // CGMRES__SIMULATION_HPP_
@@ -352,6 +352,12 @@ public:
     return timer_.getProfile();
   }
 
+  ///
+  /// @brief Getter of the solver settings.
+  /// @return const reference to the solver settings.
+  ///
+  const SolverSettings& settings() const { return settings_; }
+
   void disp(std::ostream& os) const {
     os << "Single shooting CGMRES solver: " << std::endl;
     os << "  N:    " << N << std::endl;
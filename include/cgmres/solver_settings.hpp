@@ -2,6 +2,7 @@
 #define CGMRES__SOLVER_SETTINGS_HPP_
 
 #include <iostream>
+#include <type_traits>
 
 #include "cgmres/types.hpp"
 
@@ -28,9 +29,9 @@ struct SolverSettings {
 
   ///
   /// @brief Epsilon of the finite difference approximation. Must be positive.
-  /// Default value is 1.0e-08.
+  /// Default value is 1.0e-08, or 1.0e-04 if Scalar is float.
   ///
-  Scalar finite_difference_epsilon = 1.0e-08;
+  Scalar finite_difference_epsilon = std::is_same<Scalar, float>::value ? 1.0e-04 : 1.0e-08;
 
   ///
   /// @brief The sampling time of MPC and used in SingleShootingCGMRESSolver
@@ -67,6 +68,22 @@ struct SolverSettings {
   ///
   bool profile_solver = true;
 
+  ///
+  /// @brief Number of the threads, including the calling thread, that 
+  /// evaluate the independent stages of the horizon in parallel in 
+  /// MultipleShootingCGMRESSolver. Has nothing to do with the other solvers.
+  /// 0 uses the number of the hardware threads. Default is 1, i.e., serial.
+  ///
+  size_t num_threads = 1;
+
+  ///
+  /// @brief Minimum number of the stages of the horizon evaluated by each 
+  /// thread. The number of the threads is reduced to N / min_stages_per_thread
+  /// so that the short horizons, for which the synchronization costs more 
+  /// than the evaluations, stay serial. Default is 16.
+  ///
+  size_t min_stages_per_thread = 16;
+
   void disp(std::ostream& os) const {
     os << "Soler settings: " << std::endl; 
     os << "  max iter:                  " << max_iter << std::endl;
@@ -77,6 +94,8 @@ struct SolverSettings {
     os << "  min dummy:                 " << min_dummy << std::endl;
     os << "  verbose level:             " << verbose_level << std::endl;
     os << "  profile solver:            " << std::boolalpha << profile_solver << std::endl;
+    os << "  num threads:               " << num_threads << std::endl;
+    os << "  min stages per thread:     " << min_stages_per_thread << std::endl;
   }
 
   friend std::ostream& operator<<(std::ostream& os, const SolverSettings& settings) {
@@ -7,10 +7,32 @@
 
 namespace cgmres {
 
+#if defined(CGMRES_MIXED_PRECISION) && !defined(CGMRES_USE_FLOAT)
+  #define CGMRES_USE_FLOAT
+#endif
+
 ///
-/// @brief Alias of double.  
+/// @brief Alias of double, or of float if CGMRES_USE_FLOAT or 
+/// CGMRES_MIXED_PRECISION is defined. The OCP definitions must be generated 
+/// with the same precision.
 ///
+#ifdef CGMRES_USE_FLOAT
+using Scalar = float;
+#else
 using Scalar = double;
+#endif
+
+///
+/// @brief Scalar type of the least squares problem of GMRES (the Hessenberg 
+/// matrix and the Givens rotations) and of the update of its solution. 
+/// Alias of double if CGMRES_MIXED_PRECISION is defined, in which the Krylov 
+/// basis and the OCP kernels are in float, and of Scalar otherwise.
+///
+#ifdef CGMRES_MIXED_PRECISION
+using GMRESScalar = double;
+#else
+using GMRESScalar = Scalar;
+#endif
 
 ///
 /// @brief Alias of Eigen::Matrix.  
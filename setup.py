@@ -16,4 +16,5 @@ setup(
     include_package_data=True,
     zip_safe=False,
     install_requires=_requires_from_file('requirements.txt'),
+    extras_require={'symengine': ['symengine']},
 )
\ No newline at end of file